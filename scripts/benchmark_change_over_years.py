@@ -0,0 +1,108 @@
+# author: Jade Bouchard
+# date: 2026-10-19
+#
+# This script benchmarks the year-over-year change computation of scripts/exploratory_analysis.py
+# ('find_changes_over_years', which sorts the data once by person and year) against the self-merge it replaced,
+# on synthetic salary data of increasing size. It checks that both give the same output where the merge is run.
+# The merge builds every pair of years of each person, so it is skipped above --max_merge_rows rows.
+#
+# Usage: python scripts/benchmark_change_over_years.py --sizes=10000,100000,1000000,5000000 \
+# --years_per_person=10 --max_merge_rows=1000000
+
+
+import time
+import click
+import numpy as np
+import pandas as pd
+from exploratory_analysis import find_changes_over_years
+
+
+def find_changes_over_years_by_merge(data, numeric_cols):
+    '''The self-merge implementation of 'find_changes_over_years', kept as a reference for the benchmark.'''
+    sub_data = data.drop_duplicates(subset=['First_Name','Last_Name','Year'], keep = False)
+    merged_df = sub_data.merge(sub_data, how='inner', on=['First_Name', 'Last_Name'])
+    merged_df = merged_df[merged_df['Year_y'] == merged_df['Year_x'] + 1]
+    merged_df['transition_year'] = merged_df['Year_y']
+    columns = ['First_Name', 'Last_Name', 'Guessed_Gender_x', 'transition_year']
+    for numeric_col, numeric_str in numeric_cols.items():
+        merged_df[f'{numeric_str}_change_amount'] = merged_df[f'{numeric_col}_y'] - merged_df[f'{numeric_col}_x']
+        merged_df[f'{numeric_str}_change_percent'] = round(100*(merged_df[f'{numeric_col}_y'] - merged_df[f'{numeric_col}_x'])/merged_df[f'{numeric_col}_x'],2)
+        columns += [f'{numeric_str}_change_amount', f'{numeric_str}_change_percent']
+    return merged_df[columns].rename(columns = {'Guessed_Gender_x':'Guessed_Gender'})
+
+
+def make_person_years(n_rows, years_per_person, seed=123):
+    '''Create synthetic salary data with about n_rows person-years.
+
+    Each person has up to years_per_person years (with some gaps), in shuffled row order. A few first and
+    last name pairs are shared by two people, and about a quarter of the expenses are missing.
+
+    Parameters:
+    ----------
+    n_rows : int
+        Approximate number of rows.
+    years_per_person : int
+        Largest number of years of a person.
+    seed : int
+        Random seed.
+
+    Returns:
+    -------
+    data : pandas.DataFrame
+        Data with the columns 'First_Name', 'Last_Name', 'Remuneration', 'Expenses', 'Year' and 'Guessed_Gender'.
+    '''
+    rng = np.random.default_rng(seed)
+    n_people = max(n_rows // years_per_person, 1)
+    person = np.repeat(np.arange(n_people), years_per_person)
+    year = 2000 + np.tile(np.arange(years_per_person), n_people)
+    # drop about a tenth of the years to leave gaps
+    kept = rng.random(len(person)) > 0.1
+    person, year = person[kept], year[kept]
+    # about 1 in 50 people shares its name with the person before it
+    name_id = person - (rng.random(n_people) < 0.02)[person]
+    data = pd.DataFrame({'First_Name': np.char.add('First', (name_id % 997).astype(str)),
+                         'Last_Name': np.char.add('Last', (name_id // 997).astype(str)),
+                         'Remuneration': rng.integers(75_000, 400_000, len(person)),
+                         'Expenses': np.where(rng.random(len(person)) < 0.25, np.nan, rng.integers(0, 50_000, len(person))),
+                         'Year': year,
+                         'Guessed_Gender': rng.choice(np.array(['Female', 'Male', None], dtype = object), len(person))})
+    return data.sample(frac = 1, random_state = seed).reset_index(drop = True)
+
+
+@click.command
+@click.option('--sizes', type=str, default='10000,100000,1000000')
+@click.option('--years_per_person', type=int, default=10)
+@click.option('--max_merge_rows', type=int, default=1_000_000)
+def main(sizes, years_per_person, max_merge_rows):
+    '''Time the sorted and merged year-over-year change computations on synthetic data of each size.
+
+    Parameters:
+    -----------
+    sizes : str
+        Comma-separated numbers of person-years to benchmark.
+    years_per_person : int
+        Largest number of years of each synthetic person.
+    max_merge_rows : int
+        Largest data size to run the self-merge on.
+    '''
+    numeric_cols = {'Remuneration': 'salary', 'Expenses': 'expenses'}
+    print(f"{'rows':>10} {'changes':>10} {'sorted (s)':>11} {'merge (s)':>10}")
+    for size in [int(size) for size in sizes.split(',')]:
+        data = make_person_years(size, years_per_person)
+
+        start = time.perf_counter()
+        changes = find_changes_over_years(data, numeric_cols)
+        sorted_seconds = time.perf_counter() - start
+
+        merge_seconds = '-'
+        if len(data) <= max_merge_rows:
+            start = time.perf_counter()
+            merged_changes = find_changes_over_years_by_merge(data, numeric_cols)
+            merge_seconds = f'{time.perf_counter() - start:.2f}'
+            pd.testing.assert_frame_equal(changes, merged_changes)
+
+        print(f"{len(data):>10} {len(changes):>10} {sorted_seconds:>11.2f} {merge_seconds:>10}")
+
+
+if __name__ == "__main__":
+    main()
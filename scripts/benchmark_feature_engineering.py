@@ -0,0 +1,92 @@
+# author: Jade Bouchard
+# date: 2026-10-19
+#
+# This script benchmarks the row-by-row (iterrows) feature engineering used by the original
+# NLTK gender classifier against the vectorized feature engineering, and checks that both
+# produce exactly the same featuresets.
+#
+# Usage: python scripts/benchmark_feature_engineering.py --sizes=10000,100000,1000000 --output_file=bench_output.txt
+
+
+import time
+import click
+import numpy as np
+import pandas as pd
+from gender_features import gender_features, vectorized_gender_features, iter_featuresets
+
+
+def make_random_names(n_names, seed=123):
+    '''Create a DataFrame of random names and genders for benchmarking.
+
+    Parameters:
+    ----------
+    n_names : int
+        Number of names to create.
+    seed : int
+        Seed for the random number generator.
+
+    Returns:
+    -------
+    data : pandas.DataFrame
+        Data with columns 'First_Name' and 'Sex_at_birth'.
+    '''
+    rng = np.random.default_rng(seed)
+    letters = np.array(list("abcdefghijklmnopqrstuvwxyz"))
+    lengths = rng.integers(2, 11, size = n_names)
+    characters = letters[rng.integers(0, len(letters), size = lengths.sum())]
+    names = np.split(characters, np.cumsum(lengths)[:-1])
+    data = pd.DataFrame({'First_Name': ["".join(name).title() for name in names],
+                         'Sex_at_birth': rng.choice(['Female', 'Male'], size = n_names)})
+    return data
+
+
+def iterrows_feature_engineering(data, name_col, gender_col):
+    '''The original row-by-row feature engineering, kept as a reference for the benchmark.'''
+    return [(gender_features(row[name_col]), row[gender_col]) for (index, row) in data.iterrows()]
+
+
+def time_call(function, *args):
+    '''Return the result of calling function(*args) and the wall time it took in seconds.'''
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+@click.command
+@click.option('--sizes', type=str, default='10000,100000,1000000')
+@click.option('--output_file', type=str, default=None)
+def main(sizes, output_file):
+    '''Time iterrows and vectorized feature engineering for several numbers of names and
+    check that they produce identical featuresets.
+
+    Parameters:
+    -----------
+    sizes : str
+        Comma separated numbers of names to benchmark.
+    output_file : str
+        Optional path to save the benchmark results to (as a csv).
+    '''
+    results = []
+    for size in [int(size) for size in sizes.split(',')]:
+        data = make_random_names(size)
+
+        reference, iterrows_seconds = time_call(iterrows_feature_engineering, data, 'First_Name', 'Sex_at_birth')
+        features, vectorized_seconds = time_call(vectorized_gender_features, data['First_Name'])
+        featuresets, featureset_seconds = time_call(lambda: list(iter_featuresets(features, data['Sex_at_birth'])))
+
+        if featuresets != reference:
+            raise AssertionError(f"vectorized featuresets differ from gender_features for {size} names")
+
+        results.append({'names': size,
+                        'iterrows_seconds': round(iterrows_seconds, 3),
+                        'vectorized_seconds': round(vectorized_seconds, 3),
+                        'vectorized_plus_featuresets_seconds': round(vectorized_seconds + featureset_seconds, 3),
+                        'speedup': round(iterrows_seconds / (vectorized_seconds + featureset_seconds), 1)})
+        print(results[-1])
+
+    if output_file:
+        pd.DataFrame(results).to_csv(output_file, index = False)
+
+
+if __name__ == "__main__":
+    main()
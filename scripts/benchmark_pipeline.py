@@ -0,0 +1,212 @@
+# author: Jade Bouchard
+# date: 2026-10-19
+#
+# This script benchmarks every stage of the pipeline (after fetching the salary data) on synthetic data
+# at multiples of UBC's size (1x, 10x and 100x by default, see scripts/synthetic_data.py).
+# For each scale, it generates the data in a work folder, runs the pipeline there with scripts/run_pipeline.py
+# (one stage at a time, with --profile) and records each stage's status, wall and CPU time, throughput
+# (person-years per second, or babyname rows per second for the stages that only read the babyname data)
+# and peak memory. The results are appended to a results file and compared with a stored baseline:
+# a stage whose throughput dropped or whose peak memory grew by more than --tolerance, or that failed where it
+# ran in the baseline, is reported as a regression (and the script exits with an error).
+# Baselines depend on the machine, so make one with --save_baseline on the machine the benchmarks run on.
+# Stages that take a second or two vary by about 30% between runs at 1x, so compare the larger scales for small changes.
+#
+# Usage: python scripts/benchmark_pipeline.py --scales=1,10,100
+# Usage: python scripts/benchmark_pipeline.py --scales=1,10 --save_baseline
+
+
+import datetime
+import json
+import os
+import shutil
+import subprocess
+import sys
+import click
+import pandas as pd
+from synthetic_data import scale_parameters, write_synthetic_dataset
+
+
+# what each stage's throughput is measured in
+STAGE_ITEMS = {'clean_salary_data': 'person_years',
+               'build_name_corpus': 'babyname_rows',
+               'corpus_gender_prediction': 'person_years',
+               'nltk_train_gender_classifier': 'babyname_rows',
+               'nltk_make_predictions': 'person_years',
+               'combine_and_clean_predictions': 'person_years',
+               'exploratory_analysis': 'person_years'}
+
+RESULT_COLUMNS = ['finished', 'scale', 'people', 'years', 'first_names', 'babynames', 'stage', 'status', 'items',
+                  'wall_seconds', 'cpu_seconds', 'items_per_second', 'peak_rss_mb', 'slowest_phase']
+
+
+def benchmark_scale(scale, work_folder, scale_babynames=False, plot_jobs=1, seed=123):
+    '''Generate synthetic data at one scale and run every stage of the pipeline on it with profiling on.
+
+    Parameters:
+    ----------
+    scale : float
+        Multiple of UBC's size.
+    work_folder : str
+        Folder to generate the data and run the pipeline in (in a scale_<scale> folder).
+    scale_babynames : bool
+        Also multiply the size of the babyname data by the scale.
+    plot_jobs : int
+        Number of worker processes used to render plots (with 1, the plots' memory is part of the stage's peak memory).
+    seed : int
+        Random seed of the synthetic data.
+
+    Returns:
+    -------
+    results : list of dict
+        One dictionary per stage with the keys of RESULT_COLUMNS (except 'finished').
+    '''
+    folder = f'{work_folder}/scale_{scale:g}'
+    shutil.rmtree(folder, ignore_errors = True)
+    parameters = scale_parameters(scale, scale_babynames)
+    sizes = write_synthetic_dataset(folder, **parameters, seed = seed)
+    items = {'person_years': sizes['person_years'],
+             'babyname_rows': sum(size for name, size in sizes.items() if name != 'person_years')}
+
+    # run the pipeline on the synthetic data, with a copy of the scripts so the stages' relative paths work
+    scripts_folder = os.path.dirname(os.path.abspath(__file__))
+    shutil.copytree(scripts_folder, f'{folder}/scripts', ignore = shutil.ignore_patterns('__pycache__'))
+    subprocess.run([sys.executable, 'scripts/run_pipeline.py', '--skip=fetch_salary_data', '--force=all', '--jobs=1',
+                    f'--plot_jobs={plot_jobs}', '--profile_folder=cache/profiles'],
+                   cwd = folder, stdout = subprocess.DEVNULL, stderr = subprocess.STDOUT)
+    with open(f'{folder}/cache/pipeline_run_log.jsonl') as run_log:
+        run = json.loads(run_log.readlines()[-1])
+
+    results = []
+    for stage in run['stages']:
+        if stage['stage'] not in STAGE_ITEMS:
+            continue
+        result = {'scale': scale, 'people': parameters['people'], 'years': parameters['years'],
+                  'first_names': parameters['first_names'], 'babynames': parameters['babynames'],
+                  'stage': stage['stage'], 'status': stage['status'], 'items': items[STAGE_ITEMS[stage['stage']]]}
+        report_path = f"{folder}/cache/profiles/{stage['stage']}.json"
+        if stage['status'] == 'ran' and os.path.exists(report_path):
+            with open(report_path) as report_file:
+                report = json.load(report_file)
+            slowest_phase = max(report['phases'], key = lambda phase: phase['wall_seconds'], default = None)
+            result.update({'wall_seconds': report['wall_seconds'], 'cpu_seconds': report['cpu_seconds'],
+                           'items_per_second': round(result['items'] / report['wall_seconds'], 1),
+                           'peak_rss_mb': report['peak_rss_mb'],
+                           'slowest_phase': slowest_phase['phase'] if slowest_phase else None})
+        elif stage['status'] == 'failed':
+            print(f"{stage['stage']} failed at scale {scale:g}, see {folder}/cache/pipeline_logs/{stage['stage']}.log")
+        results.append(result)
+    return results
+
+
+def find_regressions(results, baseline, tolerance):
+    '''Compare benchmark results with a baseline.
+
+    Parameters:
+    ----------
+    results : pandas.DataFrame
+        Results of this run (the columns of RESULT_COLUMNS).
+    baseline : pandas.DataFrame
+        Baseline results, with the same columns.
+    tolerance : float
+        Largest relative drop in throughput or growth in peak memory that is not a regression (ex: 0.35).
+
+    Returns:
+    -------
+    regressions : pandas.DataFrame
+        One row per regression, with the columns 'scale', 'stage', 'metric', 'baseline' and 'current'.
+    '''
+    compared = results.merge(baseline, on = ['scale', 'stage'], suffixes = ('', '_baseline'))
+    regressions = []
+    for row in compared.itertuples():
+        if row.status_baseline == 'ran' and row.status != 'ran':
+            regressions.append((row.scale, row.stage, 'status', row.status_baseline, row.status))
+            continue
+        if row.items_per_second < row.items_per_second_baseline * (1 - tolerance):
+            regressions.append((row.scale, row.stage, 'items_per_second', row.items_per_second_baseline, row.items_per_second))
+        if row.peak_rss_mb > row.peak_rss_mb_baseline * (1 + tolerance):
+            regressions.append((row.scale, row.stage, 'peak_rss_mb', row.peak_rss_mb_baseline, row.peak_rss_mb))
+    return pd.DataFrame(regressions, columns = ['scale', 'stage', 'metric', 'baseline', 'current'])
+
+
+def print_results(results):
+    '''Print each stage's throughput and peak memory at every scale, and its throughput relative to the smallest scale.'''
+    smallest = results[results['scale'] == results['scale'].min()].set_index('stage')['items_per_second']
+    relative = results['items_per_second'] / results['stage'].map(smallest)
+    print(f"{'scale':>6} {'stage':<32} {'status':<8} {'items':>11} {'wall (s)':>9} {'items/s':>11} {'vs smallest':>11} "
+          f"{'peak rss (MB)':>14}  slowest phase")
+    for row, relative_throughput in zip(results.itertuples(), relative):
+        if row.status != 'ran':
+            print(f"{row.scale:>6g} {row.stage:<32} {row.status:<8} {row.items:>11,}")
+            continue
+        print(f"{row.scale:>6g} {row.stage:<32} {row.status:<8} {row.items:>11,} {row.wall_seconds:>9.2f} "
+              f"{row.items_per_second:>11,.0f} {relative_throughput:>11.2f} {row.peak_rss_mb:>14.0f}  {row.slowest_phase}")
+
+
+@click.command
+@click.option('--scales', type=str, default='1,10,100')
+@click.option('--work_folder', type=str, default='cache/benchmark_data')
+@click.option('--results_path', type=str, default='benchmarks/pipeline_results.csv')
+@click.option('--baseline_path', type=str, default='benchmarks/pipeline_baseline.csv')
+@click.option('--save_baseline', is_flag=True, default=False)
+@click.option('--tolerance', type=float, default=0.35)
+@click.option('--scale_babynames', is_flag=True, default=False)
+@click.option('--plot_jobs', type=int, default=1)
+@click.option('--keep_data', is_flag=True, default=False)
+def main(scales, work_folder, results_path, baseline_path, save_baseline, tolerance, scale_babynames, plot_jobs, keep_data):
+    '''Benchmark every stage at each scale, save the results and report regressions against the baseline.
+
+    Parameters:
+    -----------
+    scales : str
+        Comma-separated multiples of UBC's size to benchmark.
+    work_folder : str
+        Folder to generate the synthetic data and run the pipeline in.
+    results_path : str
+        Path to the results file (csv). The results of every run are appended to it.
+    baseline_path : str
+        Path to the baseline results (csv).
+    save_baseline : bool
+        Save the results of this run as the baseline (replacing the baseline of the scales that were run).
+    tolerance : float
+        Largest relative drop in throughput or growth in peak memory that is not reported as a regression.
+    scale_babynames : bool
+        Also multiply the size of the babyname data by the scale.
+    plot_jobs : int
+        Number of worker processes used to render plots.
+    keep_data : bool
+        Keep the synthetic data and pipeline outputs of each scale (they are deleted by default).
+    '''
+    finished = datetime.datetime.now().isoformat(timespec = 'seconds')
+    rows = []
+    for scale in [float(scale) for scale in scales.split(',')]:
+        print(f"benchmarking {scale:g}x UBC scale")
+        rows += benchmark_scale(scale, work_folder, scale_babynames, plot_jobs)
+        if not keep_data:
+            shutil.rmtree(f'{work_folder}/scale_{scale:g}', ignore_errors = True)
+    results = pd.DataFrame(rows).assign(finished = finished).reindex(columns = RESULT_COLUMNS)
+    print_results(results)
+
+    os.makedirs(os.path.dirname(results_path) or '.', exist_ok = True)
+    results.to_csv(results_path, mode = 'a', header = not os.path.exists(results_path), index = False)
+
+    if save_baseline:
+        if os.path.exists(baseline_path):
+            baseline = pd.read_csv(baseline_path)
+            results = pd.concat([baseline[~baseline['scale'].isin(results['scale'])], results])
+        os.makedirs(os.path.dirname(baseline_path) or '.', exist_ok = True)
+        results.sort_values(['scale'], kind = 'stable').to_csv(baseline_path, index = False)
+        print(f"saved the baseline to {baseline_path}")
+    elif os.path.exists(baseline_path):
+        regressions = find_regressions(results, pd.read_csv(baseline_path), tolerance)
+        if len(regressions):
+            print(f"\nregressions against {baseline_path}:")
+            print(regressions.to_string(index = False))
+            sys.exit(f"{len(regressions)} regressions")
+        print(f"\nno regressions against {baseline_path}")
+    else:
+        print(f"\nno baseline at {baseline_path}, save one with --save_baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# author: Jade Bouchard
+# date: 2026-10-19
+#
+# This script checks that the pipeline's scripts start quickly. For each entry point it imports the script with
+# python -X importtime and checks that the import stays within the script's startup budget, and that none
+# of the slow libraries that are only needed by some code paths (ex: matplotlib, nltk, scikit-learn) are imported
+# when the script is loaded. It also checks that each script's --help runs.
+# The budgets leave about twice the time measured when they were set; use --budget_scale on slower machines.
+#
+# Usage: python scripts/check_startup_time.py
+# Usage: python scripts/check_startup_time.py --scripts=exploratory_analysis,nltk_make_predictions --budget_scale=2
+
+
+import os
+import subprocess
+import sys
+import click
+
+
+# import time budget of each entry point, in milliseconds (pandas alone takes about 400 ms)
+STARTUP_BUDGETS = {'fetch_salary_data': 250,
+                   'clean_salary_data': 1000,
+                   'corpus_gender_prediction': 1000,
+                   'nltk_train_gender_classifier': 1000,
+                   'nltk_make_predictions': 1000,
+                   'combine_and_clean_predictions': 1000,
+                   'exploratory_analysis': 1000,
+                   'run_pipeline': 250,
+                   'pipeline_api': 1000,
+                   'salary_queries': 1000,
+                   'evaluate_gender_models': 1000,
+                   'update_gender_classifier': 1000,
+                   'gender_inference_server': 1000,
+                   'gender_inference_client': 250,
+                   'load_test_inference_server': 250}
+
+# libraries that are only imported by the code paths that use them
+DEFERRED_MODULES = ['matplotlib', 'seaborn', 'scipy', 'nltk', 'sklearn', 'bs4', 'requests', 'pypdf', 'regex']
+
+
+def measure_import(script, scripts_folder):
+    '''Import a script with python -X importtime and find how long the import took and which packages it loaded.
+
+    Parameters:
+    ----------
+    script : str
+        Name of the script's module (ex: 'exploratory_analysis').
+    scripts_folder : str
+        Folder of the scripts.
+
+    Returns:
+    -------
+    milliseconds : float or None
+        Cumulative import time of the script's module (None if the import failed).
+    packages : set of str
+        Top-level packages imported while loading the script.
+    '''
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {script}'],
+                            cwd = scripts_folder, capture_output = True, text = True)
+    if result.returncode != 0:
+        return None, set()
+    milliseconds, packages = None, set()
+    # lines look like 'import time:       412 |     395064 |   pandas'
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        name = name.strip()
+        packages.add(name.split('.')[0])
+        if name == script:
+            milliseconds = int(cumulative) / 1000
+    return milliseconds, packages
+
+
+def help_runs(script, scripts_folder):
+    '''Return True if running the script with --help succeeds.'''
+    result = subprocess.run([sys.executable, f'{script}.py', '--help'], cwd = scripts_folder, capture_output = True)
+    return result.returncode == 0
+
+
+@click.command
+@click.option('--scripts', type=str, default=None)
+@click.option('--budget_scale', type=float, default=1.0)
+@click.option('--repeats', type=int, default=3)
+def main(scripts, budget_scale, repeats):
+    '''Check the import time and imported libraries of each entry point, and exit with an error if one fails.
+
+    Parameters:
+    -----------
+    scripts : str
+        Comma-separated scripts to check (all of STARTUP_BUDGETS by default).
+    budget_scale : float
+        Factor applied to every budget (ex: 2 on a machine about twice as slow).
+    repeats : int
+        Number of times each script is imported. The fastest import is compared with the budget.
+    '''
+    scripts_folder = os.path.dirname(os.path.abspath(__file__))
+    scripts = scripts.split(',') if scripts else list(STARTUP_BUDGETS)
+    failures = []
+    print(f"{'script':<32} {'import (ms)':>11} {'budget (ms)':>11}  result")
+    for script in scripts:
+        budget = STARTUP_BUDGETS[script] * budget_scale
+        measurements = [measure_import(script, scripts_folder) for _ in range(repeats)]
+        if any(milliseconds is None for milliseconds, _ in measurements):
+            failures.append(script)
+            print(f"{script:<32} {'-':>11} {budget:>11.0f}  import fails")
+            continue
+        milliseconds = min(milliseconds for milliseconds, _ in measurements)
+        deferred = sorted(set(DEFERRED_MODULES) & set.union(*(packages for _, packages in measurements)))
+
+        problems = []
+        if milliseconds > budget:
+            problems.append('over budget')
+        if deferred:
+            problems.append(f"imports {', '.join(deferred)}")
+        if not help_runs(script, scripts_folder):
+            problems.append('--help fails')
+        if problems:
+            failures.append(script)
+        print(f"{script:<32} {milliseconds:>11.0f} {budget:>11.0f}  {'; '.join(problems) or 'ok'}")
+
+    if failures:
+        sys.exit(f"{len(failures)} of {len(scripts)} scripts failed the startup check: {', '.join(failures)}")
+
+
+if __name__ == "__main__":
+    main()
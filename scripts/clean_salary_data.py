@@ -3,6 +3,7 @@
 #
 # This script converts a dictionary of raw salary text data into a clean dataframe.
 # The script then saves the data in csv format in the data folder
+# (and, with --store_path, in the SQLite salary store, see scripts/salary_store.py)
 #
 # Usage: python scripts/clean_salary_data.py --raw_salary_data_file=data/salary_data/raw_salary_data.pickle --clean_salary_data_output_folder=data/salary_data/clean_salary_data
 
@@ -12,6 +13,9 @@ import re
 import pickle
 import warnings
 from unidecode import unidecode
+from name_cleaning import shorten_name
+from salary_store import write_store_table
+from stage_profiler import profile_options, profile_phase
 pd.options.mode.chained_assignment = None  # copy warnings are not an issue for this script
 warnings.simplefilter(action='ignore', category=FutureWarning) # ok to paste empty dataframe with non-empty one
 
@@ -225,26 +229,28 @@ def clean_salary_data(year, raw_data):
 
     '''
 
-    # Remove beginning/end text
-    salary_text = take_subset_of_text(raw_data, 'external cost recoveries.', 'Earnings greater than')
+    with profile_phase('tokenization'):
+        # Remove beginning/end text
+        salary_text = take_subset_of_text(raw_data, 'external cost recoveries.', 'Earnings greater than')
 
-    # Remove spaces and new lines
-    peoples_salaries_formatted = remove_extra_spaces_and_new_lines(salary_text)
+        # Remove spaces and new lines
+        peoples_salaries_formatted = remove_extra_spaces_and_new_lines(salary_text)
+
+        # Split text into a list of people's salary information
+        list_of_peoples_salaries = split_by_person(peoples_salaries_formatted)
+
+        # Remove unnessessary lines
+        list_of_peoples_salaries_clean = remove_uninformative_values(list_of_peoples_salaries,[","],["SCHEDULE","*"])
+
+        # Split data into Names/Remuneration/Expenses
+        list_of_split_salaries = [i.rsplit(' ',2) for i in list_of_peoples_salaries_clean]
 
-    # Split text into a list of people's salary information
-    list_of_peoples_salaries = split_by_person(peoples_salaries_formatted)
-    
-    # Remove unnessessary lines
-    list_of_peoples_salaries_clean = remove_uninformative_values(list_of_peoples_salaries,[","],["SCHEDULE","*"])
-    
-    # Split data into Names/Remuneration/Expenses
-    list_of_split_salaries = [i.rsplit(' ',2) for i in list_of_peoples_salaries_clean]
-    
     # Create Column names
     ubc_salary_data = pd.DataFrame(list_of_split_salaries, columns = ['Name', 'Remuneration', 'Expenses'])
     
     # Split Name into First/Last Name
-    ubc_salary_data[['First_Name', 'Last_Name']] = ubc_salary_data["Name"].apply(lambda x: pd.Series(split_name_with_and_without_comma(x)))
+    with profile_phase('name_splitting'):
+        ubc_salary_data[['First_Name', 'Last_Name']] = ubc_salary_data["Name"].apply(lambda x: pd.Series(split_name_with_and_without_comma(x)))
 
     # Remove rows with empty first name
     ubc_salary_data_removed_empty_rows = ubc_salary_data[(ubc_salary_data['First_Name'] != "") & (ubc_salary_data['First_Name'] != "-")].reset_index()
@@ -262,61 +268,66 @@ def clean_salary_data(year, raw_data):
     return ubc_salary_data_clean
 
 
-def shorten_name(name):
-    '''remove initials from names, and if two names just keep the first one
+def clean_year_salary_data(year, raw_text_data):
+    '''decode and clean the salary data of one year, and shorten the names
+
+    Parameters:
+    ----------
+    year : str
+        the fiscal year of the data (ex: "2023")
+    raw_text_data : str
+        salary information of that year as a string
+
+    Returns:
+    -------
+    salaries : pandas.DataFrame
+        clean salary data of the year
+    '''
+    with profile_phase('unidecode'):
+        decoded_raw_text_data = unidecode(raw_text_data) # decode raw string (ex: Ayşe -> Ayse)
+    salaries = clean_salary_data(year, decoded_raw_text_data) # get clean data as a dataframe 
+    with profile_phase('shorten_name'):
+        salaries.loc[:,"First_Name"] = salaries["First_Name"].apply(shorten_name) # shorten first name for ease of analysis
+        salaries.loc[:,"Last_Name"] = salaries["Last_Name"].apply(shorten_name) # shorten last name for ease of analysis
+    return salaries
+
+
+def clean_all_salary_data(raw_salary_text_data):
+    '''clean the salary data of every year and paste the years together
     
     Parameters:
     ----------
-    name : str
-        name of a person
+    raw_salary_text_data : dict
+        dictionary with year-strings for keys (ex:"2023") 
+        and strings of salary information for that year as values
         
     Returns:
     -------
-    name : str
-        shortened name
-    
-    Examples:
-    _______
-    >>> name = "A Bobby"
-    >>> shortened_name = shorten_name(name)
-    >>> print(shortened_name)
-    >>> Bobby
-
-    >>> name = "Anne Michele"
-    >>> shortened_name = shorten_name(name)
-    >>> print(shortened_name)
-    >>> Anne
-
-    >>> name = "Kristen"
-    >>> shortened_name = shorten_name(name)
-    >>> print(shortened_name)
-    >>> Kristen
-
-    >>> name = "Anne -Michelle"
-    >>> shortened_name = shorten_name(name)
-    >>> print(shortened_name)
-    >>> Anne-Michelle
-
+    yearly_salary_data : dict
+        dictionary of {year: clean salary dataframe of that year}
+    salary_data : pandas.DataFrame
+        clean salary data of every year
     '''
-    name = str(name)
-    name = name.strip() # remove white space
-    name = name.replace(" -","-").replace("- ","-") # make sure names that should be connected are connected
-    if len(name.split(" ")) <= 1: # if only one word, return word
-        shortened_name = name
-    else:
-        words = name.split(" ")
-        for word in words: # remove one-letter initials if they exist
-            if len(word) == 1:
-                words.remove(word)
-        shortened_name = words[0]  # save first word
-    return shortened_name
 
+    # create empty dataframe for salary data
+    salary_data = pd.DataFrame(columns = ['Last_Name', 'First_Name', 'Remuneration', 'Expenses','Year']) 
+    yearly_salary_data = {}
+
+    for year, raw_text_data in raw_salary_text_data.items(): # for each year that UBC has data for
+        salaries = clean_year_salary_data(year, raw_text_data)
+        yearly_salary_data[year] = salaries
+        with profile_phase('concat'):
+            salary_data = pd.concat([salary_data,salaries],ignore_index = True) # paste dataframes together
+
+    return yearly_salary_data, salary_data
 
 
 @click.command()
 @click.option('--raw_salary_data_file', type=str)
 @click.option('--clean_salary_data_output_folder', type=str)
-def main(raw_salary_data_file, clean_salary_data_output_folder):
+@click.option('--store_path', type=str, default=None)
+@profile_options
+def main(raw_salary_data_file, clean_salary_data_output_folder, store_path):
     '''clean salary data for all years and then export the dataframes to csv files
     
     Parameters:
@@ -327,6 +338,9 @@ def main(raw_salary_data_file, clean_salary_data_output_folder):
         and the values are strings of salary information for that year
     clean_salary_data_output_folder : str
         path to the folder that the clean data should go to
+    store_path : str
+        optional path to the SQLite salary store (see scripts/salary_store.py),
+        whose 'salaries' table is replaced with the clean data of every year
         
     Outputs:
     -------
@@ -336,24 +350,25 @@ def main(raw_salary_data_file, clean_salary_data_output_folder):
         data containing all salary information for every available fiscal year
     '''
 
-    # create empty dataframe for salary data
-    salary_data = pd.DataFrame(columns = ['Last_Name', 'First_Name', 'Remuneration', 'Expenses','Year']) 
-
     # read in the raw salary data dictionary
-    with open(raw_salary_data_file, "rb") as raw_salary_dict:
+    with profile_phase('read_raw_data'), open(raw_salary_data_file, "rb") as raw_salary_dict:
         raw_salary_text_data = pickle.load(raw_salary_dict)
 
-    # clean and write data
-    for year, raw_text_data in raw_salary_text_data.items(): # for each year that UBC has data for
-        decoded_raw_text_data = unidecode(raw_text_data) # decode raw string (ex: Ayşe -> Ayse)
-        salaries = clean_salary_data(year, decoded_raw_text_data) # get clean data as a dataframe 
-        salaries.loc[:,"First_Name"] = salaries["First_Name"].apply(shorten_name) # shorten first name for ease of analysis
-        salaries.loc[:,"Last_Name"] = salaries["Last_Name"].apply(shorten_name) # shorten last name for ease of analysis
-        salaries.to_csv(f"{clean_salary_data_output_folder}/FY{year}_clean_salary_data.csv", index = False) # export individual clean dataframes
-        salary_data = pd.concat([salary_data,salaries],ignore_index = True) # paste dataframes together
+    # clean data
+    yearly_salary_data, salary_data = clean_all_salary_data(raw_salary_text_data)
+
+    with profile_phase('export'):
+        # export individual clean dataframes
+        for year, salaries in yearly_salary_data.items():
+            salaries.to_csv(f"{clean_salary_data_output_folder}/FY{year}_clean_salary_data.csv", index = False)
+
+        # export dataframe with all years
+        salary_data.to_csv(f"{clean_salary_data_output_folder}/all_clean_salary_data.csv", index = False) 
 
-    # export dataframe with all years
-    salary_data.to_csv(f"{clean_salary_data_output_folder}/all_clean_salary_data.csv", index = False) 
+    # write the data of every year to the salary store
+    if store_path is not None:
+        with profile_phase('store'):
+            write_store_table(store_path, 'salaries', salary_data)
 
 
 if __name__ == "__main__":
@@ -3,70 +3,243 @@
 #
 # This script combines the gender predictions from the corpus and machine learning (nltk) methods
 # the script then removes weak predictions and fixes known incorrect predictions
+# (listed in data/gender_overrides.csv)
+# The predictions are processed in fixed-size chunks, so memory use does not grow with the size of the data
+# With --store_path, the final predictions are also written to the SQLite salary store (see scripts/salary_store.py)
 #
 # Usage: python scripts/combine_and_clean_predictions.py \
 # --nltk_gender_predictions_input=data/gender_predictions/nltk_gender_predictions.csv \
 # --corpus_gender_predictions_input=data/gender_predictions/corpus_gender_predictions.csv \
-# --all_gender_predictions_output=data/gender_predictions/all_clean_gender_predictions.csv
+# --all_gender_predictions_output=data/gender_predictions/all_clean_gender_predictions.csv \
+# --gender_overrides_input=data/gender_overrides.csv
 
 
+import os
 import click
+import numpy as np
 import pandas as pd
+from salary_store import append_store_rows, finish_store_table, open_salary_store, start_store_table
+from stage_profiler import profile_options, profile_phase
 
-def change_sex(dataframe, first_name, last_name, update_sex):
-    '''Change the sex of a person in the given DataFrame.
+def load_gender_overrides(overrides_path):
+    '''Read and validate the table of manual gender corrections.
 
-    This function modifies the 'Guessed_Gender' column of the DataFrame to change the sex of a person 
-    specified by their first name and last name. If a person with the specified first name and last name 
-    is found in the DataFrame, their sex is updated to the specified sex.
+    The overrides file has the columns 'First_Name', 'Last_Name', 'Year' and 'Guessed_Gender'.
+    An empty Year applies the correction to every year.
+
+    Parameters:
+    -----------
+    overrides_path : str
+        Path to the overrides csv file.
+
+    Returns:
+    --------
+    overrides : pandas.DataFrame
+        The overrides, with 'Year' as a nullable integer column.
+
+    Example
+    -------
+    gender_overrides.csv:
+    | First_Name | Last_Name | Year | Guessed_Gender |
+    |------------|-----------|------|----------------|
+    | Emily      | Johnson   |      | Male           |
+    | John       | Smith     | 2023 | Female         |
+    '''
+    overrides = pd.read_csv(overrides_path, dtype = {'First_Name': str, 'Last_Name': str, 'Guessed_Gender': str})
+    missing_columns = {'First_Name', 'Last_Name', 'Year', 'Guessed_Gender'} - set(overrides.columns)
+    if missing_columns:
+        raise ValueError(f"{overrides_path} is missing the columns {sorted(missing_columns)}")
+    overrides['Year'] = overrides['Year'].astype('Int64')
+    if overrides[['First_Name', 'Last_Name', 'Guessed_Gender']].isnull().any().any():
+        raise ValueError(f"every override in {overrides_path} needs a First_Name, Last_Name and Guessed_Gender")
+    duplicates = overrides[overrides.duplicated(subset = ['First_Name', 'Last_Name', 'Year'], keep = False)]
+    if len(duplicates):
+        raise ValueError(f"{overrides_path} has more than one override for the same person and year:\n{duplicates}")
+    return overrides
+
+
+def apply_gender_overrides(dataframe, overrides):
+    '''Apply manual gender corrections to the people they match, in one indexed lookup.
+
+    Each row is looked up in an index of the overrides, so the cost grows with the number of rows
+    plus the number of overrides, not their product. An override with a Year only applies to that year,
+    and takes precedence over an override of the same person without a Year.
 
     Parameters:
     -----------
     dataframe : pandas.DataFrame
-        DataFrame containing person data with columns 'First_Name', 'Last_Name', and 'Guessed_Gender'.
-    first_name : str
-        First name of the person whose sex is to be changed.
-    last_name : str
-        Last name of the person whose sex is to be changed.
-    update_sex : str
-        Sex to set for the person specified by the first name and last name.
+        DataFrame containing person data with columns 'First_Name', 'Last_Name', 'Year' and 'Guessed_Gender'.
+    overrides : pandas.DataFrame
+        Overrides loaded by 'load_gender_overrides'.
 
     Returns:
     --------
-    pandas.DataFrame
-        Modified DataFrame with the sex of the specified person updated.
+    dataframe : pandas.DataFrame
+        DataFrame with the 'Guessed_Gender' of the matched people updated.
+    matched : numpy.ndarray
+        Boolean array that is True for every override that matched at least one row.
 
     Example
     -------
     data:
-    | First_Name | Last_Name | Guessed_Gender |
-    |------------|-----------|--------------|
-    | John       | Smith     | Male         |
-    | Emily      | Johnson   | Female       |
+    | First_Name | Last_Name | Year | Guessed_Gender |
+    |------------|-----------|------|----------------|
+    | John       | Smith     | 2023 | Male           |
+    | Emily      | Johnson   | 2023 | Female         |
+
+    overrides:
+    | First_Name | Last_Name | Year | Guessed_Gender |
+    |------------|-----------|------|----------------|
+    | Emily      | Johnson   |      | Male           |
 
-    change_gender(data, 'Emily', 'Johnson', 'Male')
+    apply_gender_overrides(data, overrides)
     Output:
-    | First_Name | Last_Name | Guessed_Gender |
-    |------------|-----------|--------------|
-    | John       | Smith     | Male         |
-    | Emily      | Johnson   | Male         |
+    | First_Name | Last_Name | Year | Guessed_Gender |
+    |------------|-----------|------|----------------|
+    | John       | Smith     | 2023 | Male           |
+    | Emily      | Johnson   | 2023 | Male           |
     '''
-    dataframe.loc[(dataframe['First_Name'] == first_name) & (dataframe['Last_Name'] == last_name),'Guessed_Gender'] = update_sex
-    return dataframe
+    matched = np.zeros(len(overrides), dtype = bool)
+    # apply overrides for every year first, so that year-specific overrides are applied last and win
+    for key_columns, override_rows in [(['First_Name', 'Last_Name'], np.flatnonzero(overrides['Year'].isna())),
+                                       (['First_Name', 'Last_Name', 'Year'], np.flatnonzero(overrides['Year'].notna()))]:
+        if len(override_rows) == 0:
+            continue
+        override_index = pd.MultiIndex.from_frame(overrides.iloc[override_rows][key_columns])
+        positions = override_index.get_indexer(pd.MultiIndex.from_frame(dataframe[key_columns]))
+        found = positions >= 0
+        dataframe.loc[found, 'Guessed_Gender'] = overrides['Guessed_Gender'].to_numpy()[override_rows[positions[found]]]
+        matched[override_rows[np.unique(positions[found])]] = True
+    return dataframe, matched
+
+
+# column types of the prediction files, so that every chunk is parsed (and written) the same way
+PREDICTION_DTYPES = {'Last_Name': 'object', 'First_Name': 'object', 'Guessed_Gender': 'object', 'Remuneration': 'Int64', 'Expenses': 'float64', 'Year': 'Int64', 'index': 'float64',
+                     'Confidence_Score': 'float64'}
+
+
+def iter_prediction_chunks(prediction_paths, chunk_size):
+    '''Read prediction files one after the other, in chunks of at most chunk_size rows.
+
+    Parameters:
+    -----------
+    prediction_paths : list of str
+        Paths to the prediction csv files.
+    chunk_size : int
+        Largest number of rows in a chunk.
+
+    Yields:
+    -------
+    chunk : pandas.DataFrame
+        A chunk of rows from one of the files, with the column types in PREDICTION_DTYPES.
+    '''
+    for prediction_path in prediction_paths:
+        columns = pd.read_csv(prediction_path, nrows = 0).columns
+        dtypes = {column: dtype for column, dtype in PREDICTION_DTYPES.items() if column in columns}
+        yield from pd.read_csv(prediction_path, dtype = dtypes, chunksize = chunk_size)
+
+
+def clean_prediction_chunk(chunk, output_columns, overrides):
+    '''Clean a chunk of combined predictions: remove weak predictions and apply manual corrections.
+
+    Parameters:
+    -----------
+    chunk : pandas.DataFrame
+        A chunk of gender predictions.
+    output_columns : list of str
+        Columns to keep, in order. Columns missing from the chunk are added as empty columns.
+    overrides : pandas.DataFrame
+        Overrides loaded by 'load_gender_overrides'.
+
+    Returns:
+    --------
+    clean_chunk : pandas.DataFrame
+        The cleaned chunk.
+    matched : numpy.ndarray
+        Boolean array that is True for every override that matched a row of the chunk.
+    '''
+    with profile_phase('remove_weak_predictions'):
+        clean_chunk = chunk.reindex(columns = output_columns)
+
+        # remove gender predictions that have an accuracy of less than 0.8
+        clean_chunk.loc[clean_chunk['Confidence_Score'] < 0.8,'Guessed_Gender'] = ""
+
+    # change gender predictions that were found to be incorrect
+    with profile_phase('apply_overrides'):
+        return apply_gender_overrides(clean_chunk, overrides)
+
+
+def clean_prediction_frames(prediction_frames, overrides):
+    '''Combine and clean gender predictions that are already in memory, and find which overrides matched a row.
+
+    The frames go through the same steps as the chunks of the prediction files: their columns are given
+    the types in PREDICTION_DTYPES, weak predictions are removed and the overrides are applied.
+
+    Parameters:
+    -----------
+    prediction_frames : list of pandas.DataFrame
+        Gender predictions, in output order (corpus predictions first).
+    overrides : pandas.DataFrame
+        Overrides loaded by 'load_gender_overrides'.
+
+    Returns:
+    --------
+    predictions : pandas.DataFrame
+        The combined and cleaned predictions, with the columns of every frame except 'index'.
+    matched : numpy.ndarray
+        Boolean array that is True for every override that matched a row of the frames.
+    '''
+    output_columns = list(dict.fromkeys(column for frame in prediction_frames for column in frame.columns))
+    output_columns.remove('index')
+
+    clean_frames = []
+    matched = np.zeros(len(overrides), dtype = bool)
+    for frame in prediction_frames:
+        dtypes = {column: dtype for column, dtype in PREDICTION_DTYPES.items() if column in frame.columns}
+        clean_frame, frame_matched = clean_prediction_chunk(frame.astype(dtypes), output_columns, overrides)
+        matched |= frame_matched
+        clean_frames.append(clean_frame)
+    return pd.concat(clean_frames, ignore_index = True), matched
+
+
+def combine_and_clean_prediction_frames(prediction_frames, overrides):
+    '''Combine and clean gender predictions that are already in memory (ex: in the in-process pipeline).
+
+    Parameters:
+    -----------
+    prediction_frames : list of pandas.DataFrame
+        Gender predictions, in output order (corpus predictions first).
+    overrides : pandas.DataFrame
+        Overrides loaded by 'load_gender_overrides'. Every override must match at least one person.
+
+    Returns:
+    --------
+    predictions : pandas.DataFrame
+        The combined and cleaned predictions, with the columns of every frame except 'index'.
+    '''
+    predictions, matched = clean_prediction_frames(prediction_frames, overrides)
+    if not matched.all():
+        raise ValueError(f"these gender overrides did not match anyone:\n{overrides[~matched]}")
+    return predictions
 
 
 @click.command
 @click.option('--nltk_gender_predictions_input',type=str)
 @click.option('--corpus_gender_predictions_input',type=str)
 @click.option('--all_gender_predictions_output',type=str)
-def main(nltk_gender_predictions_input,corpus_gender_predictions_input,all_gender_predictions_output):
+@click.option('--gender_overrides_input',type=str,default='data/gender_overrides.csv')
+@click.option('--chunk_size',type=int,default=100_000)
+@click.option('--store_path',type=str,default=None)
+@profile_options
+def main(nltk_gender_predictions_input,corpus_gender_predictions_input,all_gender_predictions_output,gender_overrides_input,
+         chunk_size,store_path):
     '''Combine and process gender predictions from different sources and output the final predictions.
 
     This function serves as the entry point for combining and processing gender predictions from 
     two different sources: NLTK classifier predictions and corpus predictions. It reads in the predictions 
-    from the specified input files, concatenates them together, drops unnecessary columns, removes 
+    from the specified input files in chunks, concatenates them together, drops unnecessary columns, removes 
     predictions with an accuracy of less than 0.8, and corrects gender predictions that were found 
-    to be incorrect for specific individuals. Finally, it exports the cleaned and combined predictions 
+    to be incorrect for specific individuals (listed in the gender overrides file). Finally, it exports the cleaned and combined predictions 
     to the specified output file.
 
     Parameters:
@@ -77,32 +250,51 @@ def main(nltk_gender_predictions_input,corpus_gender_predictions_input,all_gende
         Path to the file containing corpus predictions.
     all_gender_predictions_output : str
         Path to the output file where the final predictions will be saved.
+    gender_overrides_input : str
+        Path to the csv file of manual gender corrections (see 'load_gender_overrides').
+        Every correction must match at least one person.
+    chunk_size : int
+        Number of rows read, cleaned and written at a time. Memory use depends on this, not on the size of the inputs.
+    store_path : str
+        Optional path to the SQLite salary store (see scripts/salary_store.py). Its 'predictions' table is replaced
+        with the final predictions (written chunk by chunk, like the output file).
     '''
 
-    # read in the corpus predictions and nltk classifier predictions
-    nltk_predictions = pd.read_csv(nltk_gender_predictions_input)
-    corpus_predictions = pd.read_csv(corpus_gender_predictions_input)
-
-    # concat the prediction data together
-    complete_predictions = pd.concat([corpus_predictions, nltk_predictions])
+    overrides = load_gender_overrides(gender_overrides_input)
+    prediction_paths = [corpus_gender_predictions_input, nltk_gender_predictions_input]
 
-    # drop the unecessary index column
-    complete_predictions_clean = complete_predictions.drop(columns = ['index'])
+    # the output has the columns of both prediction files (corpus columns first), without the unecessary index column
+    output_columns = list(dict.fromkeys(column for prediction_path in prediction_paths
+                                        for column in pd.read_csv(prediction_path, nrows = 0).columns))
+    output_columns.remove('index')
 
-    # remove gender predictions that have an accuracy of less than 0.8
-    complete_predictions_clean.loc[complete_predictions_clean['Confidence_Score'] < 0.8,'Guessed_Gender'] = ""
+    # stream the corpus predictions and then the nltk classifier predictions through the cleaning steps,
+    # writing to a temporary file that only replaces the output once every chunk has been cleaned
+    temporary_output = f'{all_gender_predictions_output}.tmp'
+    pd.DataFrame(columns = output_columns).to_csv(temporary_output, index = False)
+    store = open_salary_store(store_path) if store_path is not None else None
+    if store is not None:
+        start_store_table(store, 'predictions')
+    matched = np.zeros(len(overrides), dtype = bool)
+    for chunk in iter_prediction_chunks(prediction_paths, chunk_size):
+        clean_chunk, chunk_matched = clean_prediction_chunk(chunk, output_columns, overrides)
+        matched |= chunk_matched
+        with profile_phase('export'):
+            clean_chunk.to_csv(temporary_output, mode = 'a', header = False, index = False)
+        if store is not None:
+            with profile_phase('store'):
+                append_store_rows(store, 'predictions', clean_chunk)
 
-    # change gender predictions that were found to be incorrect
-    complete_predictions_clean = change_sex(complete_predictions_clean, "Lakshmi", "Yatham", "Male")
-    complete_predictions_clean = change_sex(complete_predictions_clean, "Santa", "Ono", "Male")
-    complete_predictions_clean = change_sex(complete_predictions_clean, "Ali", "Lazrak", "Male")
-    complete_predictions_clean = change_sex(complete_predictions_clean, "Jan", "Bena", "Female")
-    complete_predictions_clean = change_sex(complete_predictions_clean, "Zu-Hua", "Gao", "Male")
-    complete_predictions_clean = change_sex(complete_predictions_clean, "Takamasa", "Momose", "Male")
-    
-    # export dataset
-    complete_predictions_clean.to_csv(all_gender_predictions_output, index = False)
+    if not matched.all():
+        os.remove(temporary_output)
+        raise ValueError(f"these gender overrides did not match anyone:\n{overrides[~matched]}")
 
+    # export dataset (and replace the predictions in the salary store)
+    os.replace(temporary_output, all_gender_predictions_output)
+    if store is not None:
+        with profile_phase('store'):
+            finish_store_table(store, 'predictions')
+        store.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -11,12 +11,29 @@
 # --indian_f_babyname_data_file=data/gender_corpus/Indian-Female-Names.csv \
 # --indian_m_babyname_data_file=data/gender_corpus/Indian-Male-Names.csv \
 # --clean_babyname_corpus_output_folder=data/gender_corpus \
-# --prediction_ouput_folder=data/gender_predictions
+# --prediction_ouput_folder=data/gender_predictions \
+# --fuzzy_max_distance=1
+#
+# The babyname corpus can also be built on its own (leave out --clean_salary_data_file), and predictions
+# can be made with a corpus built earlier (use --name_corpus_file instead of the babyname data files):
+# Usage: python scripts/corpus_gender_prediction.py \
+# --canadian_babyname_data_file=data/gender_corpus/canadian_babyname.csv \
+# --american_babyname_data_file=data/gender_corpus/american_babyname.csv \
+# --indian_f_babyname_data_file=data/gender_corpus/Indian-Female-Names.csv \
+# --indian_m_babyname_data_file=data/gender_corpus/Indian-Male-Names.csv \
+# --clean_babyname_corpus_output_folder=data/gender_corpus
+# Usage: python scripts/corpus_gender_prediction.py \
+# --clean_salary_data_file=data/salary_data/clean_salary_data/all_clean_salary_data.csv \
+# --name_corpus_file=data/gender_corpus/clean_name_corpus.csv \
+# --prediction_ouput_folder=data/gender_predictions \
+# --fuzzy_max_distance=1
 
 
 import pandas as pd
 import click
-from clean_salary_data import shorten_name
+from name_cleaning import shorten_name
+from fuzzy_name_matching import make_gender_predictions_using_fuzzy_match
+from stage_profiler import profile_options, profile_phase
 
 
 def sum_frequency_counts(df):
@@ -307,6 +324,46 @@ def prepare_indian_babyname_data(indian_female_df,indian_male_df):
     return indian_names
 
 
+def build_name_corpus(canadian_names, american_names, f_indian_names, m_indian_names):
+    '''Clean and combine the babyname datasets into one name corpus, with one row per first name.
+
+    Parameters:
+    -----------
+    canadian_names : pandas.DataFrame
+        Raw canadian babyname data.
+    american_names : pandas.DataFrame
+        Raw american babyname data.
+    f_indian_names : pandas.DataFrame
+        Raw indian female babyname data.
+    m_indian_names : pandas.DataFrame
+        Raw indian male babyname data.
+
+    Returns:
+    --------
+    name_corpus : pandas.DataFrame
+        Name corpus with the columns 'First_Name', 'Sex_at_birth' and 'Confidence_Score'.
+    '''
+    ############# CLEAN DATA ##############
+    with profile_phase('clean_babyname_data'):
+        # clean canadian data
+        canadian_babyname_data = prepare_canadian_babyname_data(canadian_names)
+
+        # clean american data
+        american_babyname_data = prepare_american_babyname_data(american_names)
+
+        # clean indian data
+        indian_babyname_data = prepare_indian_babyname_data(f_indian_names, m_indian_names)
+
+    ############# COMBINE DATA ##############
+    with profile_phase('combine_babyname_data'):
+        canadian_and_american_babyname_data = combine_two_babyname_datasets(canadian_babyname_data,american_babyname_data)
+
+        canadian_and_american_babyname_data_with_accuracy = create_and_filter_accuracy_column(canadian_and_american_babyname_data)
+
+        # Indian dataset goes last so when there is a name in both sets, we keep the one with the more accurate confidence score
+        return pd.concat([canadian_and_american_babyname_data_with_accuracy,indian_babyname_data]).drop_duplicates(subset = 'First_Name')
+
+
 def make_gender_predictions_using_corpus(salary_data, name_corpus):
     '''Make gender predictions for individuals in salary data using a large dataset of names 
     and their associated genders.
@@ -356,7 +413,8 @@ def make_gender_predictions_using_corpus(salary_data, name_corpus):
     | Jane       | 610000 |
     | Alex       | 20000  |
     '''
-    pop_df_predicted = pd.merge(salary_data, name_corpus, on = ['First_Name'], how = 'left')
+    with profile_phase('merge'):
+        pop_df_predicted = pd.merge(salary_data, name_corpus, on = ['First_Name'], how = 'left')
     pop_df_predicted = pop_df_predicted.rename(columns={'Sex_at_birth': 'Guessed_Gender'})
     # Create dataset for exact name matches
     pop_df_predictions = pop_df_predicted[pop_df_predicted['Guessed_Gender'].notnull()]
@@ -366,23 +424,63 @@ def make_gender_predictions_using_corpus(salary_data, name_corpus):
     return pop_df_predictions, pop_df_needs_predictions
      
    
+def predict_genders_using_corpus(salary_data, name_corpus, fuzzy_max_distance=0, fuzzy_corpus=None):
+    '''Make gender predictions using exact (and, optionally, fuzzy) name matches in the name corpus.
+
+    Parameters:
+    -----------
+    salary_data : pandas.DataFrame
+        Clean salary data.
+    name_corpus : pandas.DataFrame
+        Name corpus built by 'build_name_corpus'.
+    fuzzy_max_distance : int
+        Names with no exact match are matched to corpus names within this many edits.
+        0 (the default) turns fuzzy matching off.
+    fuzzy_corpus : dict, optional
+        The name corpus prepared for fuzzy matching by 'build_fuzzy_corpus' (with fuzzy_max_distance),
+        to reuse it across calls. It is built from name_corpus if None.
+
+    Returns:
+    --------
+    gender_predictions : pandas.DataFrame
+        data which contains predictions for individuals with exact (or fuzzy) name matches found in the name corpus.
+    needs_gender_predictions : pandas.DataFrame
+        data which contains individuals where there was no name match, and their gender still needs to be predicted.
+    '''
+    # Merge the names and gender dataset onto the UBC dataset to see if there are exact name matches
+    gender_predictions, needs_gender_predictions = make_gender_predictions_using_corpus(salary_data, name_corpus)
+
+    # Match the remaining names to corpus names within a small edit distance (ex: Jenifer -> Jennifer)
+    if fuzzy_max_distance > 0:
+        with profile_phase('fuzzy_match'):
+            fuzzy_gender_predictions, needs_gender_predictions = make_gender_predictions_using_fuzzy_match(
+                needs_gender_predictions, name_corpus, max_distance = fuzzy_max_distance, fuzzy_corpus = fuzzy_corpus)
+        gender_predictions = pd.concat([gender_predictions, fuzzy_gender_predictions])
+
+    return gender_predictions, needs_gender_predictions
+
+
 @click.command
-@click.option('--clean_salary_data_file', type=str)
-@click.option('--canadian_babyname_data_file', type=str)
-@click.option('--american_babyname_data_file', type=str)
-@click.option('--indian_f_babyname_data_file', type=str)
-@click.option('--indian_m_babyname_data_file', type=str)
-@click.option('--clean_babyname_corpus_output_folder', type=str)
-@click.option('--prediction_ouput_folder', type=str)
+@click.option('--clean_salary_data_file', type=str, default=None)
+@click.option('--canadian_babyname_data_file', type=str, default=None)
+@click.option('--american_babyname_data_file', type=str, default=None)
+@click.option('--indian_f_babyname_data_file', type=str, default=None)
+@click.option('--indian_m_babyname_data_file', type=str, default=None)
+@click.option('--clean_babyname_corpus_output_folder', type=str, default=None)
+@click.option('--prediction_ouput_folder', type=str, default=None)
+@click.option('--fuzzy_max_distance', type=int, default=0)
+@click.option('--name_corpus_file', type=str, default=None)
+@profile_options
 def main(clean_salary_data_file, canadian_babyname_data_file, american_babyname_data_file, 
-         indian_f_babyname_data_file, indian_m_babyname_data_file, clean_babyname_corpus_output_folder, prediction_ouput_folder):
+         indian_f_babyname_data_file, indian_m_babyname_data_file, clean_babyname_corpus_output_folder, prediction_ouput_folder,
+         fuzzy_max_distance, name_corpus_file):
     '''Main function to process salary data and make gender predictions.
     read in the data, clean babyname data, combine babyname data, and make predictions
 
     Parameters:
     -----------
     clean_salary_data_file : str
-        Path to the clean salary data file.
+        Path to the clean salary data file. If it is not given, only the name corpus is built and saved.
     canadian_babyname_data_file : str
         Path to the canadian babyname data file.
     american_babyname_data_file : str
@@ -391,60 +489,63 @@ def main(clean_salary_data_file, canadian_babyname_data_file, american_babyname_
         Path to the indian female babyname data file.
     indian_m_babyname_data_file : str
         Path to the indian male babyname data file.
+    clean_babyname_corpus_output_folder : str
+        Folder to save the clean name corpus in.
+    prediction_ouput_folder : str
+        Folder to save the predictions in.
+    fuzzy_max_distance : int
+        Names with no exact match are matched to corpus names within this many edits.
+        0 (the default) turns fuzzy matching off.
+    name_corpus_file : str
+        Path to a clean name corpus saved by an earlier run. If it is given, it is used instead of 
+        building the corpus from the babyname data files.
 
     Output:
     -------
     corpus_gender_predictions.csv : csv
-        data which contains predictions for individuals with exact name matches found in the name corpus.
+        data which contains predictions for individuals with exact (or fuzzy) name matches found in the name corpus.
     needs_gender_predictions.csv : csv
-        data which contains individuals where there was no exact name match, and their gender still needs to be predicted.
+        data which contains individuals where there was no name match, and their gender still needs to be predicted.
     '''
 
-    ############# READ IN DATA ##############
-    # Read in canadian data we will use to make predictions
-    # Data from statcan - https://www150.statcan.gc.ca/t1/tbl1/en/tv.action?pid=1710014701
-    # Includes baby name data (name, sex at birth) for babies from 1991 to 2021
-    canadian_names = pd.read_csv(canadian_babyname_data_file)
-
-    # Read in extra data for american names and clean it up so that it can be merged with other name-sex data
-    # https://www.kaggle.com/datasets/kaggle/us-baby-names/code
-    american_names = pd.read_csv(american_babyname_data_file)
-
-    # Read in data for indian names and clean it up so that it can be merged with other name-sex data
-    # https://www.kaggle.com/datasets/ananysharma/indian-names-dataset
-    f_indian_names = pd.read_csv(indian_f_babyname_data_file)
-    m_indian_names = pd.read_csv(indian_m_babyname_data_file)
+    if name_corpus_file is not None:
+        with profile_phase('read_name_corpus'):
+            name_corpus = pd.read_csv(name_corpus_file)
+    else:
+        ############# READ IN DATA ##############
+        with profile_phase('read_babyname_data'):
+            # Read in canadian data we will use to make predictions
+            # Data from statcan - https://www150.statcan.gc.ca/t1/tbl1/en/tv.action?pid=1710014701
+            # Includes baby name data (name, sex at birth) for babies from 1991 to 2021
+            canadian_names = pd.read_csv(canadian_babyname_data_file)
+
+            # Read in extra data for american names and clean it up so that it can be merged with other name-sex data
+            # https://www.kaggle.com/datasets/kaggle/us-baby-names/code
+            american_names = pd.read_csv(american_babyname_data_file)
+
+            # Read in data for indian names and clean it up so that it can be merged with other name-sex data
+            # https://www.kaggle.com/datasets/ananysharma/indian-names-dataset
+            f_indian_names = pd.read_csv(indian_f_babyname_data_file)
+            m_indian_names = pd.read_csv(indian_m_babyname_data_file)
+
+        name_corpus = build_name_corpus(canadian_names, american_names, f_indian_names, m_indian_names)
+        with profile_phase('export'):
+            name_corpus.to_csv(f'{clean_babyname_corpus_output_folder}/clean_name_corpus.csv', index = False)
+
+    if clean_salary_data_file is None:
+        return
 
     # Read in clean salary data
-    salary_data = pd.read_csv(clean_salary_data_file)
-    
-    ############# CLEAN DATA ##############
-    # clean canadian data
-    canadian_babyname_data = prepare_canadian_babyname_data(canadian_names)
-
-    # clean american data
-    american_babyname_data = prepare_american_babyname_data(american_names)
-
-    # clean indian data
-    indian_babyname_data = prepare_indian_babyname_data(f_indian_names, m_indian_names)
-
-    ############# COMBINE DATA ##############
-    canadian_and_american_babyname_data = combine_two_babyname_datasets(canadian_babyname_data,american_babyname_data)
-
-    canadian_and_american_babyname_data_with_accuracy = create_and_filter_accuracy_column(canadian_and_american_babyname_data)
-
-    # Indian dataset goes last so when there is a name in both sets, we keep the one with the more accurate confidence score
-    name_corpus = pd.concat([canadian_and_american_babyname_data_with_accuracy,indian_babyname_data]).drop_duplicates(subset = 'First_Name')
+    with profile_phase('read_salary_data'):
+        salary_data = pd.read_csv(clean_salary_data_file)
 
     ############# MAKE PREDICTIONS ##############
-    # Merge the names and gender dataset onto the UBC dataset to see if there are exact name matches
-
-    gender_predictions, needs_gender_predictions = make_gender_predictions_using_corpus(salary_data, name_corpus)
+    gender_predictions, needs_gender_predictions = predict_genders_using_corpus(salary_data, name_corpus, fuzzy_max_distance)
 
-    ############# SAVE PREDICTIONS AND CORPUS ##############
-    gender_predictions.to_csv(f'{prediction_ouput_folder}/corpus_gender_predictions.csv', index = False)
-    needs_gender_predictions.to_csv(f'{prediction_ouput_folder}/needs_gender_predictions.csv', index = False)
-    name_corpus.to_csv(f'{clean_babyname_corpus_output_folder}/clean_name_corpus.csv', index = False)
+    ############# SAVE PREDICTIONS ##############
+    with profile_phase('export'):
+        gender_predictions.to_csv(f'{prediction_ouput_folder}/corpus_gender_predictions.csv', index = False)
+        needs_gender_predictions.to_csv(f'{prediction_ouput_folder}/needs_gender_predictions.csv', index = False)
 
 
 if __name__ == "__main__":
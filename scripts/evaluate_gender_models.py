@@ -0,0 +1,242 @@
+# author: Jade Bouchard
+# date: 2026-10-19
+#
+# This script compares gender classifier configurations (feature sets and backends) with stratified
+# k-fold cross-validation on the clean babyname corpus. Folds are trained and scored in a process pool.
+# For each configuration it reports accuracy, calibration (Brier score and expected calibration error)
+# and training/prediction throughput (names per second).
+# Optionally, the cross-validated accuracy of the configuration used by the pipeline is stored
+# with the current model's fingerprint. The configuration is found from the model folder
+# (the sklearn estimator saved in it, or the pipeline's nltk feature set) unless it is given.
+#
+# Usage: python scripts/evaluate_gender_models.py \
+# --name_data_path=data/gender_corpus/clean_name_corpus.csv \
+# --results_output_path=data/gender_predictions/model_evaluation.csv \
+# --n_folds=5 --jobs=4 \
+# --model_path=models/gender_classifier \
+# --model_metrics_path=models/gender_classifier_metrics.json
+
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import click
+import numpy as np
+import pandas as pd
+from gender_features import vectorized_gender_features, iter_featuresets
+from naive_bayes_engine import compile_classifier, predict_naive_bayes
+from sklearn_gender_classifier import train_sklearn_gender_classifier, predict_sklearn_gender, is_sklearn_model_folder
+from model_metrics import write_model_metrics
+
+
+# feature sets for the nltk backend (the pipeline uses 'all_suffixes_and_name')
+FEATURE_SETS = {'all_suffixes_and_name': ['last_5_letters', 'last_two_letters', 'last_letter',
+                                          'last_3_letters', 'last_4_letters', 'name'],
+                'all_suffixes': ['last_5_letters', 'last_two_letters', 'last_letter', 'last_3_letters', 'last_4_letters'],
+                'suffixes_2_to_4': ['last_two_letters', 'last_3_letters', 'last_4_letters'],
+                'last_letter': ['last_letter']}
+
+# every configuration that is evaluated: (configuration name, backend, feature set or sklearn estimator)
+CONFIGURATIONS = ([(f'nltk_{feature_set}', 'nltk', feature_set) for feature_set in FEATURE_SETS] +
+                  [('sklearn_multinomial_nb', 'sklearn', 'multinomial_nb'),
+                   ('sklearn_logistic_regression', 'sklearn', 'logistic_regression')])
+
+# names and labels shared with the worker processes, so they are not sent with every task
+_worker_data = {}
+
+
+def _init_worker(names, labels):
+    '''Store the corpus in a worker process.'''
+    _worker_data['names'] = names
+    _worker_data['labels'] = labels
+
+
+def calibration_metrics(probabilities, classes, true_labels, n_bins=10):
+    '''Compute the Brier score and expected calibration error (ECE) of predicted probabilities.
+
+    Parameters:
+    ----------
+    probabilities : numpy.ndarray
+        Array of shape [items, classes] with the predicted probability of each class.
+    classes : numpy.ndarray
+        Class label of each column of probabilities.
+    true_labels : numpy.ndarray
+        True label of each item.
+    n_bins : int
+        Number of equal-width confidence bins used for the ECE.
+
+    Returns:
+    -------
+    brier_score : float
+        Mean squared difference between the predicted probabilities and the one-hot true labels.
+    expected_calibration_error : float
+        Weighted mean absolute difference between confidence and accuracy across confidence bins.
+    '''
+    one_hot = (np.asarray(true_labels)[:, None] == np.asarray(classes)[None, :]).astype(float)
+    brier_score = np.mean(np.sum((probabilities - one_hot)**2, axis = 1))
+
+    confidence = probabilities.max(axis = 1)
+    correct = one_hot[np.arange(len(one_hot)), probabilities.argmax(axis = 1)]
+    bins = np.minimum((confidence * n_bins).astype(int), n_bins - 1)
+    bin_confidence = np.bincount(bins, weights = confidence, minlength = n_bins)
+    bin_correct = np.bincount(bins, weights = correct, minlength = n_bins)
+    expected_calibration_error = np.abs(bin_correct - bin_confidence).sum() / len(confidence)
+    return brier_score, expected_calibration_error
+
+
+def evaluate_fold(configuration, fold, train_index, test_index):
+    '''Train one configuration on one fold's training names and score it on the fold's test names.
+
+    Parameters:
+    ----------
+    configuration : tuple
+        (configuration name, backend, feature set or sklearn estimator) from CONFIGURATIONS.
+    fold : int
+        Fold number.
+    train_index : numpy.ndarray
+        Positions of the training names.
+    test_index : numpy.ndarray
+        Positions of the test names.
+
+    Returns:
+    -------
+    result : dict
+        Accuracy, calibration and throughput of the configuration on this fold.
+    '''
+    name, backend, option = configuration
+    names, labels = _worker_data['names'], _worker_data['labels']
+    train_names, test_names = names.iloc[train_index], names.iloc[test_index]
+    train_labels, test_labels = labels[train_index], labels[test_index]
+
+    train_start = time.perf_counter()
+    if backend == 'nltk':
+        import nltk
+        features = vectorized_gender_features(train_names, FEATURE_SETS[option])
+        model = compile_classifier(nltk.NaiveBayesClassifier.train(iter_featuresets(features, train_labels)))
+    else:
+        model = train_sklearn_gender_classifier(train_names, train_labels, estimator_type = option)
+    train_seconds = time.perf_counter() - train_start
+
+    predict_start = time.perf_counter()
+    if backend == 'nltk':
+        predicted_labels, probabilities = predict_naive_bayes(model, vectorized_gender_features(test_names, FEATURE_SETS[option]))
+        classes, probabilities = probabilities.columns.to_numpy(), probabilities.to_numpy()
+    else:
+        predicted_labels, probabilities = predict_sklearn_gender(model, test_names)
+        classes = model['estimator'].classes_
+    predict_seconds = time.perf_counter() - predict_start
+
+    brier_score, expected_calibration_error = calibration_metrics(probabilities, classes, test_labels)
+    return {'configuration': name, 'fold': fold,
+            'accuracy': np.mean(predicted_labels == test_labels),
+            'brier_score': brier_score,
+            'expected_calibration_error': expected_calibration_error,
+            'train_names_per_second': len(train_names) / train_seconds,
+            'predict_names_per_second': len(test_names) / predict_seconds}
+
+
+def model_configuration_name(model_path):
+    '''Find the name of the configuration (in CONFIGURATIONS) a pipeline model folder was trained with.
+
+    Parameters:
+    ----------
+    model_path : str
+        Path to the model folder saved by scripts/nltk_train_gender_classifier.py.
+
+    Returns:
+    -------
+    configuration : str
+        'sklearn_<estimator type>' for a scikit-learn model, 'nltk_all_suffixes_and_name' otherwise.
+    '''
+    if is_sklearn_model_folder(model_path):
+        with open(os.path.join(model_path, 'model.json')) as metadata_file:
+            return f"sklearn_{json.load(metadata_file)['estimator_type']}"
+    return 'nltk_all_suffixes_and_name'
+
+
+def summarize_results(fold_results):
+    '''Average fold results for each configuration (with the standard deviation of the accuracy).
+
+    Parameters:
+    ----------
+    fold_results : pandas.DataFrame
+        One row per (configuration, fold) returned by 'evaluate_fold'.
+
+    Returns:
+    -------
+    summary : pandas.DataFrame
+        One row per configuration, sorted from most to least accurate.
+    '''
+    summary = fold_results.drop(columns = ['fold']).groupby('configuration').mean()
+    summary['accuracy_std'] = fold_results.groupby('configuration')['accuracy'].std()
+    return summary.sort_values('accuracy', ascending = False).reset_index().round(4)
+
+
+@click.command
+@click.option('--name_data_path', type=str)
+@click.option('--results_output_path', type=str)
+@click.option('--n_folds', type=int, default=5)
+@click.option('--jobs', type=int, default=1)
+@click.option('--model_path', type=str, default=None)
+@click.option('--model_metrics_path', type=str, default=None)
+@click.option('--model_configuration', type=str, default=None)
+def main(name_data_path, results_output_path, n_folds, jobs, model_path, model_metrics_path, model_configuration):
+    '''Cross-validate every gender classifier configuration and save a comparison table.
+
+    Parameters:
+    -----------
+    name_data_path : str
+        Path to the clean babyname corpus.
+    results_output_path : str
+        Path to save the per-configuration results to (csv).
+    n_folds : int
+        Number of stratified cross-validation folds.
+    jobs : int
+        Number of worker processes.
+    model_path : str
+        Optional path to the trained pipeline model. If given together with model_metrics_path,
+        the cross-validated accuracy of model_configuration is stored with the model's fingerprint.
+    model_metrics_path : str
+        Optional path to the model metrics file.
+    model_configuration : str
+        Optional name of the configuration the pipeline model was trained with
+        (found from the model folder by default).
+    '''
+    store_metrics = bool(model_path and model_metrics_path)
+    if store_metrics:
+        if model_configuration is None:
+            model_configuration = model_configuration_name(model_path)
+        configuration_names = [name for name, _, _ in CONFIGURATIONS]
+        if model_configuration not in configuration_names:
+            raise click.BadParameter(f"'{model_configuration}' is not one of {configuration_names}",
+                                     param_hint = '--model_configuration')
+
+    name_corpus = pd.read_csv(name_data_path)
+    names = name_corpus['First_Name'].astype(str).reset_index(drop = True)
+    labels = name_corpus['Sex_at_birth'].to_numpy()
+
+    # scikit-learn is only imported when the models are evaluated, so that --help starts quickly
+    from sklearn.model_selection import StratifiedKFold
+    folds = list(StratifiedKFold(n_splits = n_folds, shuffle = True, random_state = 123).split(names, labels))
+    tasks = [(configuration, fold, train_index, test_index)
+             for configuration in CONFIGURATIONS
+             for fold, (train_index, test_index) in enumerate(folds)]
+
+    with ProcessPoolExecutor(max_workers = jobs, initializer = _init_worker, initargs = (names, labels)) as pool:
+        fold_results = pd.DataFrame(list(pool.map(evaluate_fold, *zip(*tasks))))
+
+    summary = summarize_results(fold_results)
+    summary.to_csv(results_output_path, index = False)
+    print(summary.to_string(index = False))
+
+    if store_metrics:
+        configuration_summary = summary.set_index('configuration').loc[model_configuration]
+        write_model_metrics(model_metrics_path, model_path,
+                            {'cross_validated_accuracy': configuration_summary['accuracy'],
+                             'cross_validated_accuracy_std': configuration_summary['accuracy_std'],
+                             'cross_validation_folds': n_folds})
+
+
+if __name__ == "__main__":
+    main()
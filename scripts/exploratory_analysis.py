@@ -2,34 +2,65 @@
 # date: 2024-05-02
 #
 # This script creates plots for the salary and gender data 
+# The bar plots and histograms of every year are drawn on one reused template figure per plot family
+# (see scripts/figure_templates.py)
+# The per-year statistics the plots need (top rows, histogram bin counts, yearly ranges) are computed
+# in one grouped pass over the data (see scripts/salary_aggregates.py)
+# With --jobs N, the plots are rendered by N worker processes (each reading only its year's rows
+# from a memory-mapped columnar copy of the data)
 #
-# Usage: python scripts/exploratory_analysis.py --predictions_input_file=data/gender_predictions/all_clean_gender_predictions.csv --plot_output_folder=plots 
+# Usage: python scripts/exploratory_analysis.py --predictions_input_file=data/gender_predictions/all_clean_gender_predictions.csv --plot_output_folder=plots --jobs=4
 
 
+import multiprocessing
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
-import numpy
-import matplotlib.pyplot as plt
 from math import log10
 import numpy as np
-import seaborn as sns
 import click
+from mergeable_quantiles import grouped_quantile_states, grouped_quantiles, merge_grouped_quantile_states
+import figure_templates
+from figure_templates import get_figure_template, reset_subplot_layout
+from render_cache import RENDER_CACHE, configure_render_cache, render_cache, write_render_manifest
+from salary_aggregates import (aggregate_by_year_and_gender, save_histogram_cube, select_year,
+                               write_summary_by_year_and_gender)
+from stage_profiler import profile_options, profile_phase
 
-plt.rcParams.update({'font.size': 14, 'font.family': 'sans-serif'})
-sns.set_theme(rc={'figure.figsize':(10,4)},font = "sans-serif")
 pd.options.mode.chained_assignment = None  # copy warnings are not an issue for this script
 
+# matplotlib's pyplot and seaborn, imported by 'load_plotting_libraries' when the first plot is made
+plt = None
+sns = None
+
+
+def load_plotting_libraries():
+    '''Import matplotlib's pyplot and seaborn and set the style of the plots, the first time it is called in a process.
+
+    The libraries are slow to import, so they are only loaded when plots are made (not for --help or
+    when other scripts import the data functions). The style must be set before the render cache hashes the style
+    settings, so 'create_year_plot', 'create_line_plots' and 'run_plot_job' call this before making plots.
+    '''
+    global plt, sns
+    if plt is None:
+        import matplotlib.pyplot
+        import seaborn
+        plt, sns = matplotlib.pyplot, seaborn
+        plt.rcParams.update({'font.size': 14, 'font.family': 'sans-serif'})
+        sns.set_theme(rc={'figure.figsize':(10,4)},font = "sans-serif")
+
 
 def prepare_data_for_plot(data, year, salary_col, first_name_col, last_name_col, name_col):
     """
     Prepare data for plotting by filtering for a specific year, dividing salary by 1000, and
-    adding a new column that contains first and last name.
+    adding a new column that contains first and last name. With year None, every year is kept.
 
     Parameters:
     -----------
     data : pandas.DataFrame
         The input DataFrame containing the data.
-    year : int
-        The specific year to filter the data.
+    year : int or None
+        The specific year to filter the data, or None to keep every year.
     salary_col : str
         The name of the column containing salary information.
     first_name_col : str
@@ -63,7 +94,7 @@ def prepare_data_for_plot(data, year, salary_col, first_name_col, last_name_col,
 
     """
     # filter for specific year
-    processed_data = data[data["Year"] == year]
+    processed_data = data[data["Year"] == year] if year is not None else data.copy()
     # devide salary by 1000 to help with plot readability
     processed_data[salary_col] = processed_data[salary_col]/1000
     # create column with both names for bar plots
@@ -71,6 +102,43 @@ def prepare_data_for_plot(data, year, salary_col, first_name_col, last_name_col,
     return processed_data
 
 
+def build_bar_plot_template(colours, colour_bar_opt1, colour_bar_opt2):
+    '''Create the template figure of the top ten bar plots: the axes, spines and legend, with no bars yet.
+
+    Parameters:
+    -----------
+    colours : list of str
+        The colours of colour_bar_opt1, colour_bar_opt2 and unknown values.
+    colour_bar_opt1 : str
+        The first categorical value for coloring bars.
+    colour_bar_opt2 : str
+        The second categorical value for coloring bars.
+
+    Returns:
+    --------
+    template : dict
+        Dictionary with the keys 'figure', 'axes' and 'bars' (None until the first plot).
+    '''
+    figure = plt.figure(figsize=(10, 6))
+    ax = plt.gca()
+
+    # Hide the top and right spines
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+
+    # Create legend for bar plot colors
+    ax.legend(handles=[
+        plt.Rectangle((0,0),1,1, color=colours[0], label=colour_bar_opt1),
+        plt.Rectangle((0,0),1,1, color=colours[1], label=colour_bar_opt2),
+        plt.Rectangle((0,0),1,1, color=colours[2], label='Unknown')
+    ], loc='upper right', title='Guessed Gender')
+
+    ax.grid(False)
+    return {'figure': figure, 'axes': ax, 'bars': None}
+
+
+@render_cache(lambda arguments: f"{arguments['plot_output_folder']}/bar_plots/top_ten_{arguments['file_name']}.png",
+              code_dependencies = [build_bar_plot_template, figure_templates])
 def create_top_ten_bar_plot(data, numeric_column_name, categorical_column_name, colour_bar_column_name, colour_bar_opt1,
                             colour_bar_opt2, file_name, plot_title, x_axis_lab, y_axis_lab,plot_output_folder):
     '''Finds the ten largest values in the data and crates a bar plot of them. Categorical column values
@@ -111,62 +179,85 @@ def create_top_ten_bar_plot(data, numeric_column_name, categorical_column_name,
     # Define colors 
     colours = ['#FF8C00', '#2B2F42','#808080']
 
-    # Create bar plot for the top ten values colored by colour column
-    plt.figure(figsize=(10, 6))
-    for index, row in top_ten_data.iterrows():
-        if row[colour_bar_column_name] == colour_bar_opt1:
-            colour = colours[0] 
-        elif row[colour_bar_column_name] == colour_bar_opt2:
-            colour = colours[1]
-        else:
-            colour = colours[2]
-        plt.bar(row[categorical_column_name], row[numeric_column_name], color=colour)
+    template = get_figure_template(f'top_ten_bar_plot_{colour_bar_opt1}_{colour_bar_opt2}',
+                                   lambda: build_bar_plot_template(colours, colour_bar_opt1, colour_bar_opt2))
+    ax = template['axes']
+
+    # Replace the bars of the previous plot with the top ten values colored by colour column, in one call
+    categories = top_ten_data[categorical_column_name].tolist()
+    if template['bars'] is not None:
+        from matplotlib.category import UnitData
+        template['bars'].remove()
+        # start a new set of categories for the x axis
+        ax.xaxis.set_units(UnitData(categories))
+    bar_colours = np.select([top_ten_data[colour_bar_column_name] == colour_bar_opt1,
+                             top_ten_data[colour_bar_column_name] == colour_bar_opt2],
+                            colours[:2], colours[2])
+    template['bars'] = ax.bar(categories, top_ten_data[numeric_column_name].tolist(),
+                              color=bar_colours.tolist())
+    ax.relim()
 
     # Set labels and title
-    plt.xlabel(x_axis_lab, fontdict={'size':14})
-    plt.ylabel(y_axis_lab, fontdict={'size':14})
-    plt.title(plot_title, fontdict={'size':22})
+    ax.set_xlabel(x_axis_lab, fontdict={'size':14})
+    ax.set_ylabel(y_axis_lab, fontdict={'size':14})
+    ax.set_title(plot_title, fontdict={'size':22})
 
     # Rotate x-axis labels for better readability
-    plt.xticks(rotation=45, ha='right')
+    plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
+
+    reset_subplot_layout(template)
+    template['figure'].tight_layout()
+    template['figure'].savefig(f'{plot_output_folder}/bar_plots/top_ten_{file_name}.png', dpi=300, bbox_inches='tight')
+
+
+def build_histogram_template(n_bin_edges):
+    '''Create the template figure of the histograms with n_bin_edges bin edges: two overlapping histograms
+    (with empty bins), the legend, spines and grid.
+
+    Parameters:
+    -----------
+    n_bin_edges : int
+        The number of bin edges.
+
+    Returns:
+    --------
+    template : dict
+        Dictionary with the keys 'figure', 'axes', 'male_bars' and 'female_bars'.
+    '''
+    bin_edges = np.arange(n_bin_edges, dtype=float)
+    empty_counts = np.zeros(n_bin_edges - 1)
+
+    # Create histogram plot (each bin's left edge weighted by its count draws the same bars as the raw values)
+    figure = plt.figure(figsize=(9, 5))
+    _, _, male_bars = plt.hist(bin_edges[:-1], bin_edges, weights=empty_counts, alpha=0.5, label='Male', color="#6495ED")
+    _, _, female_bars = plt.hist(bin_edges[:-1], bin_edges, weights=empty_counts, alpha=0.5, label='Female', color="#FF8C00")
+    plt.legend(loc='upper right', title = "Guessed Gender")
 
     # Hide the top and right spines
     plt.gca().spines['top'].set_visible(False)
     plt.gca().spines['right'].set_visible(False)
 
-    # Create legend for bar plot colors
-    plt.legend(handles=[
-        plt.Rectangle((0,0),1,1, color=colours[0], label=colour_bar_opt1),
-        plt.Rectangle((0,0),1,1, color=colours[1], label=colour_bar_opt2),
-        plt.Rectangle((0,0),1,1, color=colours[2], label='Unknown')
-    ], loc='upper right', title='Guessed Gender')
-
-    plt.grid(False)
-
-    plt.tight_layout()
-    plt.savefig(f'{plot_output_folder}/bar_plots/top_ten_{file_name}.png', dpi=300, bbox_inches='tight')
-    plt.close()
+    plt.grid(True)
+    return {'figure': figure, 'axes': plt.gca(), 'male_bars': male_bars, 'female_bars': female_bars}
 
 
-def create_histogram_plot_for_one_year(data, min_value, max_value, numeric_col, category_col,
-                                       plot_title, xlab, ylab, file_name, cut_off_factor, bins, 
+@render_cache(lambda arguments: f"{arguments['plot_output_folder']}/histogram_plots/histogram_of_{arguments['file_name']}.png",
+              code_dependencies = [build_histogram_template, figure_templates])
+def create_histogram_plot_for_one_year(bin_edges, female_counts, male_counts,
+                                       plot_title, xlab, ylab, file_name, cut_off_factor,
                                        plot_output_folder):
     '''
-    Create two overlapping histograms of female and male numeric data. Outliers will be cut off to 
-    improve the clarity of the plots.
+    Create two overlapping histograms of female and male numeric data from their bin counts. Outliers 
+    will be cut off to improve the clarity of the plots.
 
     Parameters:
     ------------
-    data : pandas.DataFrame
-        The input DataFrame containing the data.
-    min_value : float
-        The minimum value of the numeric data.
-    max_value : float
-        The maximum value of the numeric data.
-    numeric_col : str
-        The name of the column containing the numeric values to plot.
-    category_col : str
-        The name of the column containing the categorical values to divide the data by.
+    bin_edges : numpy.ndarray
+        The bin edges, from the minimum to the maximum value of the numeric data.
+    female_counts : numpy.ndarray
+        The number of female values in each bin.
+    male_counts : numpy.ndarray
+        The number of male values in each bin.
     plot_title : str
         The title of the plot.
     xlab : str
@@ -177,104 +268,35 @@ def create_histogram_plot_for_one_year(data, min_value, max_value, numeric_col,
         String to include in the file name.
     cut_off_factor : float
         The factor by which to shorten the maximum value on the x-axis. Between 0 and 1.
-    bins : int
-        The number of bins for the histogram.
     plot_output_folder : str
         The folder to save the plot in.
     '''
+    min_value, max_value = bin_edges[0], bin_edges[-1]
 
-    # Define bins
-    bins = np.linspace(min_value, max_value, bins)
-
-    # Separate data by gender
-    female_expenses = data[data[category_col] == "Female"][numeric_col]
-    male_expenses = data[data[category_col] == "Male"][numeric_col]
+    template = get_figure_template(f'histogram_{len(bin_edges)}', lambda: build_histogram_template(len(bin_edges)))
+    ax = template['axes']
 
-    # Create histogram plot
-    plt.figure(figsize=(9, 5))
-    plt.hist(male_expenses, bins, alpha=0.5, label='Male', color="#6495ED")
-    plt.hist(female_expenses, bins, alpha=0.5, label='Female', color="#FF8C00")
-    plt.legend(loc='upper right', title = "Guessed Gender")
+    # Move and resize the bars of the template to this plot's bins and counts, where plt.hist would draw them
+    bin_widths = np.diff(bin_edges)
+    bar_lefts = (bin_edges[:-1] + 0.5 * bin_widths) - bin_widths / 2
+    for bars, counts in [(template['male_bars'], male_counts), (template['female_bars'], female_counts)]:
+        for bar, left, width, count in zip(bars, bar_lefts, bin_widths, np.asarray(counts, dtype=float)):
+            bar.set_x(left)
+            bar.set_width(width)
+            bar.set_height(count)
 
     # Set labels and title
-    plt.xlabel(xlab, fontdict={'size':14})
-    plt.ylabel(ylab, fontdict={'size':14})
-    plt.title(plot_title, fontdict={'size':16})
-    plt.xlim(min_value,max_value*cut_off_factor)
-
-    # Hide the top and right spines
-    plt.gca().spines['top'].set_visible(False)
-    plt.gca().spines['right'].set_visible(False)
-
-    plt.grid(True)
-    plt.savefig(f'{plot_output_folder}/histogram_plots/histogram_of_{file_name}.png', dpi=300, bbox_inches='tight')
-    plt.close()
+    ax.set_xlabel(xlab, fontdict={'size':14})
+    ax.set_ylabel(ylab, fontdict={'size':14})
+    ax.set_title(plot_title, fontdict={'size':16})
+    ax.set_xlim(min_value,max_value*cut_off_factor)
+    ax.relim()
+    ax.autoscale_view()
 
-
-def create_summary_table(data, numeric_col1, numeric_col2):
-    '''
-    This function calculates summary statistics (mean, median, minimum, and maximum) for two 
-    specified numeric columns in the DataFrame. Additionally, it extracts the minimum and maximum 
-    values of each column.
-
-    Parameters:
-    -----------
-    data : pandas.DataFrame
-        DataFrame containing the data.
-    numeric_col1 : str
-        The name of the first numeric column.
-    numeric_col2 : str
-        The name of the second numeric column.
-
-    Returns:
-    --------
-    data_summary : pandas.DataFrame
-        Summary table containing mean, median, minimum, and maximum values of the 
-        specified numeric columns.
-    min_col1 : float
-        Minimum value of numeric_col1.
-    max_col1 : float
-        Maximum value of numeric_col1.
-    min_col2 : float
-        Minimum value of numeric_col2.
-    max_col2 : float
-        Maximum value of numeric_col2.
-
-    Example:
-    --------
-    data:
-    | First_Name | Last_Name | Age | Income |
-    |------------|-----------|-----|--------|
-    | John       | Smith     | 35  | 60000  |
-    | Emily      | Johnson   | 40  | 55000  |
-    | Jessica    | Brown     | 30  | 48000  |
-
-    create_summary_table(data, "Age", "Income")
-
-    Returns:
-    |           | Age              | Income            |
-    |-----------|------------------|-------------------|
-    | mean      | 35.00            | 54333.33           |
-    | median    | 35.00            | 55000.00          |
-    | min       | 30.00            | 48000.00          |
-    | max       | 40.00            | 60000.00          |
-
-    '''
-    ## create summary data table and store min/max values
-    data_summary = data[[numeric_col1,numeric_col2]].apply(
-    {
-        numeric_col1:["mean","median","min","max"],
-        numeric_col2:["mean","median","min","max"]
-    }
-    ).map(lambda x: round(x, 2))
-
-    max_col2 = data_summary.loc['max',numeric_col2]
-    min_col2 = data_summary.loc['min',numeric_col2]
-    max_col1 = data_summary.loc['max',numeric_col1]
-    min_col1 = data_summary.loc['min',numeric_col1]
-    return data_summary, min_col1, max_col1, min_col2, max_col2
+    template['figure'].savefig(f'{plot_output_folder}/histogram_plots/histogram_of_{file_name}.png', dpi=300, bbox_inches='tight')
 
 
+@render_cache(lambda arguments: f"{arguments['plot_output_folder']}/box_plots/boxplot_of_{arguments['file_name']}.png")
 def create_box_plots(data, numeric_col, categorical_col, xlab, ylab, title, file_name,plot_output_folder):
     '''
     Creates box plots to visualize the distribution of numeric data across different categories.
@@ -315,6 +337,8 @@ def create_box_plots(data, numeric_col, categorical_col, xlab, ylab, title, file
     plt.close()
 
 
+@render_cache(lambda arguments: f"{arguments['plot_output_folder']}/line_plots/lineplot_of_{arguments['file_name']}.png",
+              hash_index = True)
 def create_line_plot(data, male_colour, female_colour, min_x, max_x, max_y, min_y,
                      title, xlab, ylab, file_name, plot_output_folder):
     '''
@@ -440,29 +464,82 @@ def find_change_over_years(data, numeric_col, numeric_str):
 
 
     '''
-    # looking at percentaage salary raises/decreases
+    return find_changes_over_years(data, {numeric_col: numeric_str})
 
-    # Drop names that appear in the male and female datasets - since cannot determine the difference between the two
-    sub_data = data.drop_duplicates(subset=['First_Name','Last_Name','Year'], keep = False)
 
-    # Merge DataFrame with itself
-    merged_df = sub_data.merge(sub_data, how='inner', on=['First_Name', 'Last_Name'])
+def find_changes_over_years(data, numeric_cols):
+    '''
+    Find changes in several numeric columns over consecutive years, in one pass.
+
+    The data is sorted once by person (first and last name) and year, so that each person's consecutive
+    years are next to each other, and the change between each row and the row before it is computed for
+    every numeric column. This gives the same rows, order and index as merging the data with itself on 
+    the names and keeping the consecutive years, without building every pair of years of each person.
+
+    Parameters:
+    -----------
+    data : pandas.DataFrame
+        DataFrame containing the data with columns 'First_Name', 'Last_Name', 'Year', 'Guessed_Gender'
+        and the numeric columns of interest.
+    numeric_cols : dict
+        Dictionary of {numeric column: string used in the change column names} (ex: {'Remuneration': 'salary'}).
+
+    Returns:
+    --------
+    result_df : pandas.DataFrame
+        DataFrame containing columns 'First_Name', 'Last_Name', 'Guessed_Gender' (of the earlier year), 
+        'transition_year', and '{numeric}_change_amount' and '{numeric}_change_percent' for every numeric column.
 
-    # Filter rows where years are consecutive
-    merged_df = merged_df[merged_df['Year_y'] == merged_df['Year_x'] + 1]
+    Example:
+    --------
 
-    # Calculate salary change
-    merged_df[f'{numeric_str}_change_amount'] = merged_df[f'{numeric_col}_y'] - merged_df[f'{numeric_col}_x']
+    data:
+    | First_Name | Last_Name | Guessed_Gender | Year | Salary | Expenses |
+    |------------|-----------|----------------|------|--------|----------|
+    | John       | Smith     | Male           | 2019 | 50000  | 1000     |
+    | John       | Smith     | Male           | 2020 | 52000  | 1500     |
 
-    merged_df[f'{numeric_str}_change_percent'] = round(100*(merged_df[f'{numeric_col}_y'] - merged_df[f'{numeric_col}_x'])/merged_df[f'{numeric_col}_x'],2)
+    find_changes_over_years(data, {'Salary': 'salary', 'Expenses': 'expenses'})
 
-    merged_df['transition_year'] = merged_df['Year_y']
+    result_df:
+    | First_Name | Last_Name | Guessed_Gender | transition_year | salary_change_amount | salary_change_percent | expenses_change_amount | expenses_change_percent |
+    |------------|-----------|----------------|-----------------|----------------------|-----------------------|------------------------|-------------------------|
+    | John       | Smith     | Male           | 2020            | 2000                 | 4.0                   | 500                    | 50.0                    |
+    '''
+    # Drop names that appear in the male and female datasets - since cannot determine the difference between the two
+    sub_data = data.drop_duplicates(subset=['First_Name','Last_Name','Year'], keep = False)
 
-    # Select columns of interest
-    result_df = merged_df[['First_Name', 'Last_Name', 'Guessed_Gender_x','transition_year', f'{numeric_str}_change_amount',f'{numeric_str}_change_percent']].rename(columns = {'Guessed_Gender_x':'Guessed_Gender'})
-    
+    # number each person, and each row within its person (in row order)
+    people = sub_data.groupby(['First_Name', 'Last_Name'], sort = False, dropna = False)
+    person = people.ngroup().to_numpy()
+    person_size = people['Year'].transform('size').to_numpy()
+    person_rank = people.cumcount().to_numpy()
+    year = sub_data['Year'].to_numpy()
+
+    # sort once by person and year, and pair each row with the row before it when the years are consecutive
+    order = np.lexsort((year, person))
+    previous, current = order[:-1], order[1:]
+    consecutive = (person[previous] == person[current]) & (year[current] == year[previous] + 1)
+    previous, current = previous[consecutive], current[consecutive]
+
+    # keep the order (and index) rows would have after merging the data with itself: by earlier-year row,
+    # where each row is followed by one merged row for every row of the same person
+    by_previous_row = np.argsort(previous, kind = 'stable')
+    previous, current = previous[by_previous_row], current[by_previous_row]
+    merged_index = (np.cumsum(person_size) - person_size)[previous] + person_rank[current]
+
+    earlier = sub_data.iloc[previous].reset_index(drop = True)
+    later = sub_data.iloc[current].reset_index(drop = True)
+    result_df = earlier[['First_Name', 'Last_Name', 'Guessed_Gender']].copy()
+    result_df['transition_year'] = later['Year']
+    for numeric_col, numeric_str in numeric_cols.items():
+        # Calculate change
+        result_df[f'{numeric_str}_change_amount'] = later[numeric_col] - earlier[numeric_col]
+        result_df[f'{numeric_str}_change_percent'] = round(100*(later[numeric_col] - earlier[numeric_col])/earlier[numeric_col],2)
+    result_df.index = merged_index
     return result_df
 
+
 def find_median_data(data, year_col, numeric_col):
     '''
     Compute median values of a numeric variable grouped by year and gender.
@@ -512,85 +589,273 @@ def find_median_data(data, year_col, numeric_col):
     min_median: 5000
 
     '''
-    median_data = data.groupby([year_col, 'Guessed_Gender'])[numeric_col].median().unstack()
+    return find_median_data_from_chunks([data], year_col, numeric_col)
+
+
+def find_median_data_from_chunks(chunks, year_col, numeric_col, max_exact_size=1_000_000):
+    '''
+    Compute median values of a numeric variable grouped by year and gender, one chunk of the data at a time.
+
+    Each chunk is summarized by a mergeable quantile state per (year, gender) and the states are merged, 
+    so the data never has to be loaded at once (ex: chunks from pd.read_csv(..., chunksize=100_000), or
+    partitions summarized in parallel). Medians are exact (and the same as 'find_median_data') for groups 
+    with at most max_exact_size values, and come from a quantile sketch for larger groups.
+
+    Parameters:
+    -----------
+    chunks : iterable of pandas.DataFrame
+        The chunks of the data.
+    year_col : str
+        The name of the column containing the years.
+    numeric_col : str
+        The name of the column containing the numeric variable.
+    max_exact_size : int
+        Largest number of values in a group for its median to be exact.
+
+    Returns:
+    --------
+    median_data : pandas.DataFrame
+        DataFrame containing median values of the numeric variable grouped by year and gender.
+    max_median : float
+        Maximum median value across all genders and years.
+    min_median : float
+        Minimum median value across all genders and years.
+    '''
+    states = merge_grouped_quantile_states(
+        grouped_quantile_states(chunk, [year_col, 'Guessed_Gender'], numeric_col, max_exact_size) for chunk in chunks)
+    return medians_from_quantile_states(states, year_col, numeric_col)
+
+
+def medians_from_quantile_states(states, year_col, numeric_col):
+    '''
+    Find the median values of a numeric variable by year and gender from its grouped quantile states.
+
+    Parameters:
+    -----------
+    states : dict
+        Dictionary of {(year, gender): quantile state}, from 'grouped_quantile_states'.
+    year_col : str
+        The name of the column containing the years.
+    numeric_col : str
+        The name of the column containing the numeric variable.
+
+    Returns:
+    --------
+    median_data : pandas.DataFrame
+        DataFrame containing median values of the numeric variable grouped by year and gender.
+    max_median : float
+        Maximum median value across all genders and years.
+    min_median : float
+        Minimum median value across all genders and years.
+    '''
+    median_data = grouped_quantiles(states, [year_col, 'Guessed_Gender'], 0.5).rename(numeric_col).unstack()
     max_median = max(max(median_data["Male"]),max(median_data["Female"]))
     min_median = min([min(median_data["Male"]),min(median_data["Female"]),0])
     return median_data, max_median, min_median
 
 
-@click.command
-@click.option("--predictions_input_file",type=str)
-@click.option("--plot_output_folder",type=str)
-def main(predictions_input_file, plot_output_folder):
-    '''create bar plots, histograms, line plots, and box-plots to visualize the salary data 
-    across genders'''
-    
-    ## read in data
-    data = pd.read_csv(predictions_input_file)
-  
+# plots created for every year, in the order they are rendered
+YEAR_PLOTS = ['top_ten_salaries', 'top_ten_expenses', 'salary_histogram', 'expenses_histogram',
+              'salary_box_plot', 'expenses_box_plot']
 
-    ## for each year create a bar plot of the top ten salaries and box plots of salaries and expenses
-    years = data["Year"].unique().tolist()
-    for year in years:
-        processed_data = prepare_data_for_plot(data, year, 'Remuneration', 
-                                            'First_Name',"Last_Name","Name")
+# number of histogram bin edges of each numeric column
+HISTOGRAM_BINS = {'Remuneration': 100, 'Expenses': 200}
+
+# numeric columns of the line plots, and the string used in the names of their change columns
+LINE_PLOT_CHANGES = {'Remuneration': 'salary', 'Expenses': 'expenses'}
+
+
+def aggregate_plot_data(plot_data):
+    '''
+    Compute the per-year statistics used by YEAR_PLOTS, in one grouped pass over every year.
+
+    Parameters:
+    -----------
+    plot_data : pandas.DataFrame
+        Data for every year, prepared by 'prepare_data_for_plot' (with year None).
+
+    Returns:
+    --------
+    aggregates : dict
+        Aggregates returned by 'aggregate_by_year_and_gender'.
+    '''
+    return aggregate_by_year_and_gender(plot_data, ['Remuneration', 'Expenses'], HISTOGRAM_BINS, top_k = 10)
 
-        year = str(int(year))
 
-        data_summary_year, min_remuneration, max_remuneration, min_expenses, max_expenses = create_summary_table(processed_data, "Remuneration", "Expenses")
+def create_year_plot(processed_data, year_aggregates, year, plot, plot_output_folder):
+    '''
+    Create one of the plots in YEAR_PLOTS for a single year.
 
+    Parameters:
+    -----------
+    processed_data : pandas.DataFrame
+        Data for the year, prepared by 'prepare_data_for_plot' (used by the box plots).
+    year_aggregates : dict
+        Top rows and histograms of the year, selected by 'select_year' from the aggregates.
+    year : str
+        The year, used in titles and file names.
+    plot : str
+        The plot to create (one of YEAR_PLOTS).
+    plot_output_folder : str
+        The folder to save the plot in.
+    '''
+    load_plotting_libraries()
+    if plot == 'top_ten_salaries':
         # create top ten bar plots for salaries
-        create_top_ten_bar_plot(processed_data, 'Remuneration', 'Name', 'Guessed_Gender', 'Female',
+        create_top_ten_bar_plot(year_aggregates['top_rows']['Remuneration'], 'Remuneration', 'Name', 'Guessed_Gender', 'Female',
                                 'Male', f'salaries_{year}', f'Top Ten Salaries in {year}', 
                                 'Name', 'Salary (CAD, in thousands)', plot_output_folder)
-        
+    elif plot == 'top_ten_expenses':
         # create top ten bar plots for expenses
-        create_top_ten_bar_plot(processed_data, 'Expenses', 'Name', 'Guessed_Gender', 'Female',
+        create_top_ten_bar_plot(year_aggregates['top_rows']['Expenses'], 'Expenses', 'Name', 'Guessed_Gender', 'Female',
                                 'Male', f'expenses_{year}', f'Top Ten Expenses in {year}', 
                                 'Name', 'Expenses (CAD)', plot_output_folder)
-        
+    elif plot == 'salary_histogram':
         # create histogram for salaries split by gender
-        create_histogram_plot_for_one_year(processed_data, min_remuneration, max_remuneration, 
-                                           'Remuneration', 'Guessed_Gender', 
+        histogram = year_aggregates['histograms']['Remuneration']
+        create_histogram_plot_for_one_year(histogram['edges'], histogram['Female'], histogram['Male'],
                                            f'Distribution of Salary by Gender {year}', 
                                            'Salary (CAD, in thousands)', 'Frequency', 
-                                           f'salaries_by_gender_{year}',0.5,100,plot_output_folder)
-        
+                                           f'salaries_by_gender_{year}',0.5,plot_output_folder)
+    elif plot == 'expenses_histogram':
         # create histogram for expenses split by gender
-        create_histogram_plot_for_one_year(processed_data, min_expenses, max_expenses, 
-                                           'Expenses', 'Guessed_Gender', 
+        histogram = year_aggregates['histograms']['Expenses']
+        create_histogram_plot_for_one_year(histogram['edges'], histogram['Female'], histogram['Male'],
                                            f'Distribution of Expenses by Gender {year}', 
                                            'Expenses (CAD)', 'Frequency', 
-                                           f'expenses_by_gender_{year}',0.2,200,plot_output_folder)
-        
+                                           f'expenses_by_gender_{year}',0.2,plot_output_folder)
+    elif plot == 'salary_box_plot':
         # create box plots for salary split by gender
         create_box_plots(processed_data, 'Remuneration', 'Guessed_Gender', "\nSalary (CAD, in thousands)", 
                          "Guessed Gender", f"Salary Distribution by Gender in {year} \n", 
                          f'salary_by_gender_{year}',plot_output_folder)
-        
+    elif plot == 'expenses_box_plot':
         # create box plots for expenses split by gender
         create_box_plots(processed_data, 'Expenses', 'Guessed_Gender', "\nExpenses (CAD)", 
                          "Guessed Gender", f"Expenses Distribution by Gender in {year} \n", 
                          f'expenses_by_gender_{year}',plot_output_folder)
-    
-    # find the earliest and most recent year in the data
-    min_year = min(data["Year"])
-    max_year = max(data["Year"])
-    
-    # find the median values for each gender over the years (remuneration and expenses)
-    median_salary, max_median_salary, min_median_salary = find_median_data(data, "Year", "Remuneration")
-    median_expenses, max_median_expenses, min_median_expenses = find_median_data(data, "Year", "Expenses")
+    else:
+        raise ValueError(f"unknown plot '{plot}', expected one of {YEAR_PLOTS}")
+
+
+def find_line_plot_states(data, change_data, max_exact_size=1_000_000):
+    '''
+    Summarize the values the line plots need as mergeable quantile states, so that the line plots can be made
+    from the states of separate years (see scripts/pipeline_api.py) as well as from every year at once.
+
+    Parameters:
+    -----------
+    data : pandas.DataFrame
+        The gender predictions of one or more years.
+    change_data : pandas.DataFrame
+        Changes over consecutive years of the data, found by 'find_changes_over_years' with LINE_PLOT_CHANGES.
+    max_exact_size : int
+        Largest number of values in a group for its median to be exact.
 
-    # find the percentage and amount changes for salary over the years for each gender
-    salary_change_data = find_change_over_years(data,"Remuneration","salary")
-    median_salary_percent_change, max_median_salary_percent_change, min_median_salary_percent_change = find_median_data(salary_change_data, "transition_year", "salary_change_percent")
-    median_salary_amount_change, max_median_salary_amount_change, min_median_salary_amount_change = find_median_data(salary_change_data, "transition_year", "salary_change_amount")
+    Returns:
+    --------
+    states : dict
+        Dictionary of {plotted column: grouped quantile states}, grouped by year and gender for 'Remuneration'
+        and 'Expenses', and by transition year and gender for the change columns (ex: 'salary_change_percent').
+        The states of different years are merged with 'merge_line_plot_states'.
+    '''
+    states = {column: grouped_quantile_states(data, ['Year', 'Guessed_Gender'], column, max_exact_size)
+              for column in LINE_PLOT_CHANGES}
+    for numeric_str in LINE_PLOT_CHANGES.values():
+        for change in ['percent', 'amount']:
+            column = f'{numeric_str}_change_{change}'
+            states[column] = grouped_quantile_states(change_data, ['transition_year', 'Guessed_Gender'], column,
+                                                     max_exact_size)
+    return states
+
+
+def merge_line_plot_states(line_plot_states):
+    '''
+    Merge the line plot states (from 'find_line_plot_states') of several partitions of the data.
+
+    Parameters:
+    -----------
+    line_plot_states : iterable of dict
+        The line plot states of each partition.
+
+    Returns:
+    --------
+    states : dict
+        The line plot states of every partition.
+    '''
+    merged = {}
+    for states in line_plot_states:
+        for column, column_states in states.items():
+            merged[column] = merge_grouped_quantile_states([merged.get(column, {}), column_states])
+    return merged
+
+
+def create_year_plots(plot_data, aggregates, plot_output_folder):
+    '''
+    Create every plot in YEAR_PLOTS for each year of the data, in this process.
+
+    Parameters:
+    -----------
+    plot_data : pandas.DataFrame
+        Data for one or more years, prepared by 'prepare_data_for_plot' (with year None).
+    aggregates : dict
+        Per-year statistics of the data, computed by 'aggregate_plot_data'.
+    plot_output_folder : str
+        The folder to save the plots in.
+    '''
+    for year, processed_data in plot_data.groupby("Year", sort = False):
+        for plot in YEAR_PLOTS:
+            create_year_plot(processed_data, select_year(aggregates, year), str(int(year)), plot, plot_output_folder)
+
+
+def create_line_plots(data, plot_output_folder):
+    '''
+    Create the line plots of median salaries, expenses and their yearly changes over time, split by gender.
+
+    Parameters:
+    -----------
+    data : pandas.DataFrame
+        The gender predictions for every year.
+    plot_output_folder : str
+        The folder to save the plots in.
+    '''
+    # find the percentage and amount changes for salary and expenses over the years (in one pass)
+    change_data = find_changes_over_years(data, LINE_PLOT_CHANGES)
+    salary_change_data = change_data.drop(columns = ["expenses_change_amount", "expenses_change_percent"])
     salary_change_data.to_csv("data/test_salary_change.xlsx")
 
-    # find the percentage and amount changes for expenses over the years for each gender
-    expenses_change_data = find_change_over_years(data,"Expenses","expenses")
-    median_expenses_percent_change, max_median_expenses_percent_change, min_median_expenses_percent_change = find_median_data(expenses_change_data, "transition_year", "expenses_change_percent")
-    median_expenses_amount_change, max_median_expenses_amount_change, min_median_expenses_amount_change = find_median_data(expenses_change_data, "transition_year", "expenses_change_amount")
+    # find the earliest and most recent year in the data, and plot the median values over the years
+    create_line_plots_from_states(find_line_plot_states(data, change_data), min(data["Year"]), max(data["Year"]),
+                                  plot_output_folder)
+
+
+def create_line_plots_from_states(states, min_year, max_year, plot_output_folder):
+    '''
+    Create the line plots of median salaries, expenses and their yearly changes over time, split by gender,
+    from the quantile states of the plotted values.
+
+    Parameters:
+    -----------
+    states : dict
+        Line plot states, from 'find_line_plot_states' (or merged by 'merge_line_plot_states').
+    min_year : int
+        The earliest year in the data.
+    max_year : int
+        The most recent year in the data.
+    plot_output_folder : str
+        The folder to save the plots in.
+    '''
+    load_plotting_libraries()
+
+    # find the median values for each gender over the years (remuneration and expenses)
+    median_salary, max_median_salary, min_median_salary = medians_from_quantile_states(states["Remuneration"], "Year", "Remuneration")
+    median_expenses, max_median_expenses, min_median_expenses = medians_from_quantile_states(states["Expenses"], "Year", "Expenses")
+
+    # find the median percentage and amount changes for salary and expenses over the years for each gender
+    median_salary_percent_change, max_median_salary_percent_change, min_median_salary_percent_change = medians_from_quantile_states(states["salary_change_percent"], "transition_year", "salary_change_percent")
+    median_salary_amount_change, max_median_salary_amount_change, min_median_salary_amount_change = medians_from_quantile_states(states["salary_change_amount"], "transition_year", "salary_change_amount")
+    median_expenses_percent_change, max_median_expenses_percent_change, min_median_expenses_percent_change = medians_from_quantile_states(states["expenses_change_percent"], "transition_year", "expenses_change_percent")
+    median_expenses_amount_change, max_median_expenses_amount_change, min_median_expenses_amount_change = medians_from_quantile_states(states["expenses_change_amount"], "transition_year", "expenses_change_amount")
 
 
     # create line plot for median salary over time split by gender
@@ -628,7 +893,221 @@ def main(predictions_input_file, plot_output_folder):
                      plot_output_folder)
 
 
+def write_columnar_store(data, store_folder):
+    '''
+    Save each column of a DataFrame as its own .npy file, so that worker processes can memory-map
+    the rows they need instead of receiving a pickled copy of the whole DataFrame.
+
+    Text columns are saved as fixed-width strings, with a separate array marking missing values.
+
+    Parameters:
+    -----------
+    data : pandas.DataFrame
+        The data to save.
+    store_folder : str
+        Existing folder to save the column files in.
+
+    Returns:
+    --------
+    store : dict
+        Dictionary with the keys 'folder', 'columns' (column names in order) and 'text_columns'
+        (names of the columns saved as strings), used by 'read_columnar_rows'.
+    '''
+    text_columns = []
+    for column_number, column in enumerate(data.columns):
+        values = data[column]
+        if values.dtype == object:
+            text_columns.append(column)
+            np.save(f'{store_folder}/column_{column_number}_missing.npy', values.isnull().to_numpy())
+            values = values.fillna('').astype(str)
+        np.save(f'{store_folder}/column_{column_number}.npy', values.to_numpy(dtype = str if column in text_columns else None))
+    return {'folder': store_folder, 'columns': list(data.columns), 'text_columns': text_columns}
+
+
+def read_columnar_rows(store, start, stop):
+    '''
+    Read rows start to stop (exclusive) of a DataFrame saved by 'write_columnar_store', memory-mapping every column.
+
+    Parameters:
+    -----------
+    store : dict
+        Store returned by 'write_columnar_store'.
+    start : int
+        First row to read.
+    stop : int
+        Row after the last row to read.
+
+    Returns:
+    --------
+    data : pandas.DataFrame
+        The rows, with the same columns, values and missing values as the saved DataFrame.
+    '''
+    columns = {}
+    for column_number, column in enumerate(store['columns']):
+        values = np.load(f"{store['folder']}/column_{column_number}.npy", mmap_mode = 'r')[start:stop]
+        if column in store['text_columns']:
+            missing = np.load(f"{store['folder']}/column_{column_number}_missing.npy", mmap_mode = 'r')[start:stop]
+            values = np.where(missing, np.nan, values.astype(object))
+        columns[column] = np.array(values)
+    return pd.DataFrame(columns)
+
+
+def run_plot_job(store, start, stop, year, plots, plot_output_folder, plot_cache_folder=None, year_aggregates=None):
+    '''
+    Create plots in a worker process from rows of the columnar store.
+
+    Parameters:
+    -----------
+    store : dict
+        Store returned by 'write_columnar_store'.
+    start : int
+        First row of the data needed by the job.
+    stop : int
+        Row after the last row of the data needed by the job.
+    year : int or None
+        The year to create YEAR_PLOTS for, or None to create the line plots (from every row).
+    plots : list of str
+        The plots in YEAR_PLOTS to create for the year.
+    plot_output_folder : str
+        The folder to save the plots in.
+    plot_cache_folder : str, optional
+        Folder of the render cache (None renders every plot).
+    year_aggregates : dict, optional
+        Top rows and histograms of the year (from 'select_year'), needed when year is not None.
+
+    Returns:
+    --------
+    render_log : list of dict
+        The render cache log of the job's plots.
+    '''
+    load_plotting_libraries()
+    configure_render_cache(plot_cache_folder)
+    data = read_columnar_rows(store, start, stop)
+    # start every job from the style settings the plots have when they are created one after another
+    # (the bar plots set the font, and the line plots change other settings)
+    with plt.rc_context({'font.size': 14, 'font.family': 'sans-serif'}):
+        if year is None:
+            create_line_plots(data, plot_output_folder)
+        else:
+            processed_data = prepare_data_for_plot(data, year, 'Remuneration', 'First_Name', "Last_Name", "Name")
+            for plot in plots:
+                create_year_plot(processed_data, year_aggregates, str(int(year)), plot, plot_output_folder)
+    return RENDER_CACHE['log']
+
+
+def _init_plot_worker():
+    '''Use the non-interactive Agg backend in plot worker processes.'''
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def create_plots_in_parallel(data, aggregates, plot_output_folder, jobs, plot_cache_folder=None):
+    '''
+    Create every plot with a pool of worker processes, one job per (year, plot) plus one job for the line plots.
+
+    The data is sorted by year (keeping the original row order within each year) and saved to a temporary
+    columnar store, and each job memory-maps only the rows of its year.
+
+    Parameters:
+    -----------
+    data : pandas.DataFrame
+        The gender predictions for every year.
+    aggregates : dict
+        Per-year statistics of the data, computed by 'aggregate_plot_data'.
+    plot_output_folder : str
+        The folder to save the plots in.
+    jobs : int
+        Number of worker processes.
+    plot_cache_folder : str, optional
+        Folder of the render cache (None renders every plot).
+
+    Returns:
+    --------
+    render_log : list of dict
+        The render cache log of every plot.
+    '''
+    years = data["Year"].unique().tolist()
+    data = data.sort_values("Year", kind = 'stable').reset_index(drop = True)
+    year_starts = data["Year"].searchsorted(years, side = 'left')
+    year_stops = data["Year"].searchsorted(years, side = 'right')
+
+    with tempfile.TemporaryDirectory() as store_folder:
+        store = write_columnar_store(data, store_folder)
+        with ProcessPoolExecutor(max_workers = jobs, mp_context = multiprocessing.get_context('spawn'),
+                                 initializer = _init_plot_worker) as pool:
+            # the line plots need every row, so they are one job that starts first
+            futures = [pool.submit(run_plot_job, store, 0, len(data), None, [], plot_output_folder, plot_cache_folder)]
+            for year, start, stop in zip(years, year_starts, year_stops):
+                year_aggregates = select_year(aggregates, year)
+                for plot in YEAR_PLOTS:
+                    futures.append(pool.submit(run_plot_job, store, start, stop, year, [plot], plot_output_folder,
+                                               plot_cache_folder, year_aggregates))
+            return [entry for future in futures for entry in future.result()]
+
+
+def create_all_plots(data, plot_output_folder, jobs=1, plot_cache_folder=None):
+    '''
+    Create every plot of the gender predictions, and save the summary statistics by year and gender,
+    the histogram cube and the render manifest to the plot output folder.
+
+    Parameters:
+    -----------
+    data : pandas.DataFrame
+        The gender predictions for every year (with the column types of all_clean_gender_predictions.csv).
+    plot_output_folder : str
+        The folder to save the plots in.
+    jobs : int
+        Number of worker processes (1 creates the plots in this process).
+    plot_cache_folder : str, optional
+        Folder of the render cache (None renders every plot).
+    '''
+    ## compute the statistics of every year and gender in one pass
+    with profile_phase('aggregate'):
+        plot_data = prepare_data_for_plot(data, None, 'Remuneration', 'First_Name', "Last_Name", "Name")
+        aggregates = aggregate_plot_data(plot_data)
+    with profile_phase('export'):
+        write_summary_by_year_and_gender(aggregates, f'{plot_output_folder}/summary_by_year_and_gender.csv')
+        save_histogram_cube(aggregates['histograms'], f'{plot_output_folder}/histogram_cube.npz')
+
+    # with worker processes, the render phase is the only one timed (the workers are not profiled)
+    with profile_phase('render'):
+        if jobs > 1:
+            render_log = create_plots_in_parallel(data, aggregates, plot_output_folder, jobs, plot_cache_folder)
+        else:
+            configure_render_cache(plot_cache_folder)
+
+            ## for each year create a bar plot of the top ten salaries and box plots of salaries and expenses
+            with profile_phase('year_plots'):
+                create_year_plots(plot_data, aggregates, plot_output_folder)
+
+            ## create line plots of the median values over time
+            with profile_phase('line_plots'):
+                create_line_plots(data, plot_output_folder)
+            render_log = RENDER_CACHE['log']
+
+    write_render_manifest(f'{plot_output_folder}/render_manifest.json', render_log)
+
+
+@click.command
+@click.option("--predictions_input_file",type=str)
+@click.option("--plot_output_folder",type=str)
+@click.option("--jobs",type=int,default=1)
+@click.option("--plot_cache_folder",type=str,default=None)
+@profile_options
+def main(predictions_input_file, plot_output_folder, jobs, plot_cache_folder):
+    '''create bar plots, histograms, line plots, and box-plots to visualize the salary data 
+    across genders. With jobs > 1, the plots are created by a pool of worker processes.
+    With a plot cache folder, plots whose inputs did not change since an earlier run are copied from the cache.
+    A manifest of every plot (cache hit or miss, and render time) is saved to render_manifest.json
+    in the plot output folder, the summary statistics by year and gender to summary_by_year_and_gender.csv,
+    and the histogram bin counts of every year and gender to histogram_cube.npz.'''
+    
+    ## read in data
+    with profile_phase('read_data'):
+        data = pd.read_csv(predictions_input_file)
 
+    ## create every plot, the summary statistics and the histogram cube
+    create_all_plots(data, plot_output_folder, jobs, plot_cache_folder)
 
 if __name__ == "__main__":
     main()
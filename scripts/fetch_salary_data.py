@@ -8,13 +8,10 @@
 # Usage: python scripts/fetch_salary_data.py --raw_salary_data_file=data/salary_data/raw_salary_data.pickle
 
 
-from bs4 import BeautifulSoup
-import requests
-from pypdf import PdfReader
 import pickle
 import click
-import regex as re
 import io
+from stage_profiler import profile_options, profile_phase
 
 
 def find_yearly_links(webpage):
@@ -47,6 +44,11 @@ def find_yearly_links(webpage):
     >>> end_header = 'Task Force on Climate-Related Disclosures Report'
     >>> links = find_yearly_links(webpage, start_header, end_header)
     '''
+    # the web and pdf libraries are imported when they are used, so that --help starts quickly
+    import regex as re
+    import requests
+    from bs4 import BeautifulSoup
+
     # create an empty dictionary to hold financial report links for each year availible
     links = {}
     # go to financial report webpage
@@ -87,6 +89,9 @@ def fetch_salary_data(pdf_link):
     >>> salary_text_data = fetch_salary_data(pdf_link)
     '''
 
+    import requests
+    from pypdf import PdfReader
+
     # access the content of the pdf link
     r = requests.get(pdf_link)
     f = io.BytesIO(r.content)
@@ -102,6 +107,7 @@ def fetch_salary_data(pdf_link):
 
 @click.command()
 @click.option('--raw_salary_data_file', type=str)
+@profile_options
 def main(raw_salary_data_file):
     ''' This function fetches links to all available Financial Act reports from the University of British Columbia (UBC) 
     website and collects any new salary data from those reports. It saves the raw salary data in a dictionary.
@@ -113,7 +119,8 @@ def main(raw_salary_data_file):
     '''
     
     # Fetch links to all available Financial Act reports
-    links = find_yearly_links('https://finance.ubc.ca/reporting-planning-analysis/financial-reports')
+    with profile_phase('find_links'):
+        links = find_yearly_links('https://finance.ubc.ca/reporting-planning-analysis/financial-reports')
     
     # Create an empty dictionary to store the raw salary text data
     raw_salary_dictionary = {}
@@ -126,7 +133,8 @@ def main(raw_salary_data_file):
     for year, link in links.items(): # for each year that UBC has data for
         if year not in raw_salary_dictionary.keys(): # if the salary data for this year hasn't been collected yet,
             print("collecting salary data for fiscal year " + year)
-            salary_text_data = fetch_salary_data(link) # retrieve the text from the year's pdf
+            with profile_phase('download'):
+                salary_text_data = fetch_salary_data(link) # retrieve the text from the year's pdf
             raw_salary_dictionary[year] = salary_text_data # add the text to the raw data dictionary
 
     # Save the raw data dictionary
@@ -0,0 +1,66 @@
+# author: Jade Bouchard
+# date: 2026-10-19
+#
+# This module keeps one template figure per plot family (ex: the top ten bar plots), so that plots made for
+# every year reuse the same figure, axes, spines and legend and only update their data before being saved.
+# A template is built again when the matplotlib style settings changed since it was built, since a new
+# figure would then look different.
+# matplotlib is only imported when a template is used, so importing this module does not load it.
+#
+# Used by: scripts/exploratory_analysis.py
+
+
+# template figures by name
+FIGURE_TEMPLATES = {}
+
+SUBPLOT_PARAMETERS = ['left', 'right', 'bottom', 'top', 'wspace', 'hspace']
+
+
+def get_figure_template(name, build_template):
+    '''Return the template called name, building it first if it does not exist or the style settings changed.
+
+    Parameters:
+    ----------
+    name : str
+        Name of the template (ex: 'histogram_100').
+    build_template : callable
+        Function with no arguments that creates the template figure and returns a dictionary with
+        (at least) the keys 'figure' and 'axes', plus any artists the plots update.
+
+    Returns:
+    -------
+    template : dict
+        The template, with the keys returned by build_template and 'rc' (the style settings it was built with).
+
+    Example
+    -------
+    template = get_figure_template('histogram_100', lambda: build_histogram_template(100))
+    template['axes'].set_title('Distribution of Salary by Gender 2024')
+    '''
+    import matplotlib.pyplot as plt
+
+    rc = dict(plt.rcParams)
+    template = FIGURE_TEMPLATES.get(name)
+    if template is None or template['rc'] != rc:
+        if template is not None:
+            plt.close(template['figure'])
+        template = build_template()
+        template['rc'] = rc
+        template['subplot_parameters'] = {parameter: getattr(template['figure'].subplotpars, parameter)
+                                          for parameter in SUBPLOT_PARAMETERS}
+        FIGURE_TEMPLATES[name] = template
+    return template
+
+
+def reset_subplot_layout(template):
+    '''Put the axes of a template back where they were when it was built (ex: before running tight_layout again).'''
+    template['figure'].subplots_adjust(**template['subplot_parameters'])
+
+
+def close_figure_templates():
+    '''Close every template figure.'''
+    import matplotlib.pyplot as plt
+
+    for template in FIGURE_TEMPLATES.values():
+        plt.close(template['figure'])
+    FIGURE_TEMPLATES.clear()
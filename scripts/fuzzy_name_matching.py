@@ -0,0 +1,300 @@
+# author: Jade Bouchard
+# date: 2026-10-18
+#
+# This module matches names that are not found exactly in the babyname corpus to corpus names
+# that are within a small edit distance (ex: PDF-extraction artifacts or spelling variants like "Jenifer").
+# It uses a SymSpell-style deletion dictionary, so each lookup only inspects names that share a
+# deletion variant with the query instead of comparing the query against every name in the corpus.
+#
+# Used by: scripts/corpus_gender_prediction.py, scripts/gender_inference_server.py
+
+
+import pandas as pd
+
+
+def generate_deletes(word, max_distance):
+    '''Generate every string that can be made by deleting up to max_distance characters from a word.
+
+    Parameters:
+    ----------
+    word : str
+        The word to generate deletion variants for.
+    max_distance : int
+        The maximum number of characters that can be deleted.
+
+    Returns:
+    -------
+    deletes : set
+        All deletion variants of the word, including the word itself.
+
+    Example:
+    -------
+    >>> generate_deletes("ann", 1)
+    >>> {'ann', 'nn', 'an'}
+    '''
+    deletes = {word}
+    current_level = {word}
+    for _ in range(max_distance):
+        next_level = set()
+        for variant in current_level:
+            for i in range(len(variant)):
+                next_level.add(variant[:i] + variant[i + 1:])
+        deletes |= next_level
+        current_level = next_level
+    return deletes
+
+
+def edit_distance(word1, word2, max_distance):
+    '''Compute the optimal string alignment distance (insertions, deletions, substitutions
+    and transpositions of adjacent characters) between two words.
+    Stops early and returns max_distance + 1 once the distance is known to be larger than max_distance.
+
+    Parameters:
+    ----------
+    word1 : str
+        First word.
+    word2 : str
+        Second word.
+    max_distance : int
+        The largest distance we care about.
+
+    Returns:
+    -------
+    distance : int
+        The edit distance between the two words, or max_distance + 1 if it is larger than max_distance.
+
+    Examples:
+    -------
+    >>> edit_distance("jenifer", "jennifer", 2)
+    >>> 1
+    >>> edit_distance("mraia", "maria", 2)
+    >>> 1
+    '''
+    if abs(len(word1) - len(word2)) > max_distance:
+        return max_distance + 1
+
+    previous_previous_row = None
+    previous_row = list(range(len(word2) + 1))
+    for i in range(1, len(word1) + 1):
+        current_row = [i] + [0] * len(word2)
+        for j in range(1, len(word2) + 1):
+            cost = 0 if word1[i - 1] == word2[j - 1] else 1
+            current_row[j] = min(previous_row[j] + 1,         # deletion
+                                 current_row[j - 1] + 1,      # insertion
+                                 previous_row[j - 1] + cost)  # substitution
+            if (i > 1 and j > 1 and word1[i - 1] == word2[j - 2] and word1[i - 2] == word2[j - 1]):
+                current_row[j] = min(current_row[j], previous_previous_row[j - 2] + 1)  # transposition
+        if min(current_row) > max_distance:
+            return max_distance + 1
+        previous_previous_row, previous_row = previous_row, current_row
+
+    return min(previous_row[-1], max_distance + 1)
+
+
+def build_deletion_index(names, max_distance):
+    '''Build a deletion dictionary that maps every deletion variant of every name to the names it came from.
+
+    Parameters:
+    ----------
+    names : iterable of str
+        Names to index. Names are lowercased before indexing.
+    max_distance : int
+        The largest edit distance that lookups will support.
+
+    Returns:
+    -------
+    index : dict
+        Dictionary with keys 'max_distance' (int) and 'deletes' (dict mapping a deletion
+        variant to the list of lowercased names that produce it).
+
+    Example:
+    -------
+    >>> index = build_deletion_index(["Ann", "Anne"], 1)
+    >>> index['deletes']['ann']
+    >>> ['ann', 'anne']
+    '''
+    deletes = {}
+    for name in dict.fromkeys(str(name).lower() for name in names):
+        for variant in generate_deletes(name, max_distance):
+            deletes.setdefault(variant, []).append(name)
+    return {'max_distance': max_distance, 'deletes': deletes}
+
+
+def lookup_name(index, name, max_distance=None):
+    '''Find the indexed names that are closest to a given name, as long as they are within max_distance edits.
+
+    Parameters:
+    ----------
+    index : dict
+        Deletion index created by build_deletion_index.
+    name : str
+        Name to look up.
+    max_distance : int, optional
+        The largest edit distance to accept. Cannot be larger than the index's max_distance.
+        Defaults to the index's max_distance.
+
+    Returns:
+    -------
+    matches : list of str
+        Lowercased indexed names at the smallest edit distance found (empty if there are none).
+    distance : int or None
+        The edit distance of the matches, or None if there are no matches.
+
+    Example:
+    -------
+    >>> index = build_deletion_index(["Jennifer", "Jenna"], 2)
+    >>> lookup_name(index, "Jenifer")
+    >>> (['jennifer'], 1)
+    '''
+    if max_distance is None:
+        max_distance = index['max_distance']
+    if max_distance > index['max_distance']:
+        raise ValueError(f"max_distance={max_distance} is larger than the index max_distance={index['max_distance']}")
+
+    name = str(name).lower()
+    candidates = set()
+    for variant in generate_deletes(name, max_distance):
+        candidates.update(index['deletes'].get(variant, []))
+
+    best_distance, matches = max_distance + 1, []
+    for candidate in candidates:
+        distance = edit_distance(name, candidate, max_distance)
+        if distance < best_distance:
+            best_distance, matches = distance, [candidate]
+        elif distance == best_distance:
+            matches.append(candidate)
+
+    if best_distance > max_distance:
+        return [], None
+    return sorted(matches), best_distance
+
+
+def build_fuzzy_corpus(name_corpus, max_distance=1):
+    '''Prepare a name corpus for fuzzy lookups: index it by lowercased name and build its deletion index.
+
+    Parameters:
+    -----------
+    name_corpus : pandas.DataFrame
+        DataFrame containing the columns 'First_Name', 'Sex_at_birth' and 'Confidence_Score'.
+    max_distance : int
+        The largest edit distance that lookups will support.
+
+    Returns:
+    --------
+    fuzzy_corpus : dict
+        Dictionary with the keys 'corpus' (the name corpus indexed by lowercased name) and
+        'index' (the deletion index created by build_deletion_index).
+    '''
+    corpus = name_corpus.assign(lower_name = name_corpus['First_Name'].astype(str).str.lower())
+    corpus = corpus.drop_duplicates(subset = 'lower_name').set_index('lower_name')
+    return {'corpus': corpus, 'index': build_deletion_index(corpus.index, max_distance)}
+
+
+def fuzzy_match_names(fuzzy_corpus, names, max_distance=1, distance_discount=0.9, min_name_length=4):
+    '''Match names to the closest corpus names and return the gender and discounted confidence of each match.
+
+    Parameters:
+    -----------
+    fuzzy_corpus : dict
+        Corpus prepared by build_fuzzy_corpus.
+    names : iterable of str
+        Names to match. Each distinct name is only looked up once.
+    max_distance : int
+        The largest edit distance between a name and a corpus name that counts as a match.
+    distance_discount : float
+        Factor applied to the corpus confidence score for every edit. Between 0 and 1.
+    min_name_length : int
+        Names shorter than this are not fuzzy matched, since short names are too easy to confuse.
+
+    Returns:
+    --------
+    matched_names : pandas.DataFrame
+        Columns 'First_Name', 'Fuzzy_Gender' and 'Fuzzy_Confidence', with one row per name that was matched.
+    '''
+    corpus = fuzzy_corpus['corpus']
+    matched_names = []
+    for name in pd.Series(list(names), dtype = object).dropna().astype(str).unique():
+        if len(name) < min_name_length:
+            continue
+        matches, distance = lookup_name(fuzzy_corpus['index'], name, max_distance)
+        if not matches:
+            continue
+        candidates = corpus.loc[matches]
+        # skip names where the closest corpus names disagree on gender
+        if candidates['Sex_at_birth'].nunique() != 1:
+            continue
+        confidence = round(candidates['Confidence_Score'].max() * distance_discount**distance, 2)
+        matched_names.append((name, candidates['Sex_at_birth'].iloc[0], confidence))
+
+    return pd.DataFrame(matched_names, columns = ['First_Name', 'Fuzzy_Gender', 'Fuzzy_Confidence'])
+
+
+def make_gender_predictions_using_fuzzy_match(needs_predictions, name_corpus, max_distance=1,
+                                              distance_discount=0.9, min_name_length=4, fuzzy_corpus=None):
+    '''Make gender predictions for individuals whose first name had no exact match in the name corpus,
+    by matching their first name to corpus names within a small edit distance.
+
+    The confidence score of a fuzzy match is the corpus confidence score multiplied by
+    distance_discount once for every edit. If the closest corpus names disagree on gender,
+    the name is left for the NLTK classifier.
+
+    Parameters:
+    -----------
+    needs_predictions : pandas.DataFrame
+        DataFrame with at least a 'First_Name' column, containing individuals with no exact corpus match.
+    name_corpus : pandas.DataFrame
+        DataFrame containing the columns 'First_Name', 'Sex_at_birth' and 'Confidence_Score'.
+    max_distance : int
+        The largest edit distance between a salary name and a corpus name that counts as a match.
+    distance_discount : float
+        Factor applied to the corpus confidence score for every edit. Between 0 and 1.
+    min_name_length : int
+        Names shorter than this are not fuzzy matched, since short names are too easy to confuse.
+    fuzzy_corpus : dict, optional
+        The name corpus prepared by build_fuzzy_corpus with max_distance, to reuse it across calls
+        (ex: one call per year). It is built from name_corpus if None.
+
+    Returns:
+    --------
+    fuzzy_predictions : pandas.DataFrame
+        Individuals that were matched, with 'Guessed_Gender' and 'Confidence_Score' filled in.
+    still_needs_predictions : pandas.DataFrame
+        Individuals that were not matched and still need a gender prediction.
+
+    Example
+    -------
+    needs_predictions:
+    | First_Name | Salary |
+    |------------|--------|
+    | Jenifer    | 50000  |
+    | Tor        | 60000  |
+
+    name_corpus:
+    | First_Name | Sex_at_birth | Confidence_Score |
+    |------------|--------------|------------------|
+    | Jennifer   | Female       | 1.0              |
+
+    Returns:
+    fuzzy_predictions:
+    | First_Name | Salary | Guessed_Gender | Confidence_Score |
+    |------------|--------|----------------|------------------|
+    | Jenifer    | 50000  | Female         | 0.9              |
+
+    still_needs_predictions:
+    | First_Name | Salary |
+    |------------|--------|
+    | Tor        | 60000  |
+    '''
+    # look corpus names up by their lowercased spelling, and only look up each distinct first name once
+    if fuzzy_corpus is None:
+        fuzzy_corpus = build_fuzzy_corpus(name_corpus, max_distance)
+    matched_names = fuzzy_match_names(fuzzy_corpus, needs_predictions['First_Name'], max_distance,
+                                      distance_discount, min_name_length)
+    predicted = pd.merge(needs_predictions, matched_names, on = 'First_Name', how = 'left')
+    predicted['Guessed_Gender'] = predicted['Fuzzy_Gender']
+    predicted['Confidence_Score'] = predicted['Fuzzy_Confidence']
+    predicted = predicted.drop(columns = ['Fuzzy_Gender', 'Fuzzy_Confidence'])
+
+    fuzzy_predictions = predicted[predicted['Guessed_Gender'].notnull()]
+    still_needs_predictions = predicted[~predicted['Guessed_Gender'].notnull()]
+    return fuzzy_predictions, still_needs_predictions
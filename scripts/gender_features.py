@@ -0,0 +1,164 @@
+# author: Jade Bouchard
+# date: 2026-10-19
+#
+# This module engineers the name features (the lowercased name and its last 1-5 letters) used by the
+# nltk gender classifier. It only needs pandas, so the scripts that make predictions, evaluate or update the model
+# can engineer features without importing nltk or the training script.
+#
+# Used by: scripts/nltk_train_gender_classifier.py, scripts/nltk_make_predictions.py, scripts/evaluate_gender_models.py,
+# scripts/update_gender_classifier.py, scripts/benchmark_feature_engineering.py
+
+
+import pandas as pd
+
+
+# Return features of a name to be fed into our model
+def gender_features(word):
+    ''' Engineer features for a given name
+
+    This function takes a word as input and generates a dictionary of features for gender classification. 
+    The features include:
+    - 'last_5_letters': Last 5 letters of the word
+    - 'last_two_letters': Last 2 letters of the word
+    - 'last_letter': Last letter of the word
+    - 'last_3_letters': Last 3 letters of the word
+    - 'last_4_letters': Last 4 letters of the word
+    - 'name': The word itself
+
+    Parameters:
+    -----------
+    word : str
+        Input word for which features are to be engineered.
+
+    Returns:
+    --------
+    word_feats : dict
+        A dictionary containing the engineered features of the input word.
+
+    Example
+    -------
+    gender_features('Emily')
+    Output: {'last_5_letters': 'emily', 'last_two_letters': 'ly', 'last_letter': 'y',
+             'last_3_letters': 'ily', 'last_4_letters': 'mily', 'name': 'emily'}
+    '''
+
+    word = word.lower()
+    word_feats = {'last_5_letters': word[-5:], 'last_two_letters': word[-2:],
+            'last_letter': word[-1:], 'last_3_letters': word[-3:], 'last_4_letters': word[-4:], 'name': word}
+
+    return word_feats
+
+
+# Feature names in the same order as the dictionaries returned by gender_features,
+# with the number of trailing letters each one keeps (None keeps the whole name)
+FEATURE_SUFFIX_LENGTHS = {'last_5_letters': 5, 'last_two_letters': 2, 'last_letter': 1,
+                          'last_3_letters': 3, 'last_4_letters': 4, 'name': None}
+
+
+def vectorized_gender_features(names, feature_names=None):
+    '''Engineer features for a whole column of names at once
+
+    This is the column-wise version of 'gender_features'. Instead of building one dictionary per name,
+    it lowercases the names and takes their 1-5 letter suffixes as whole columns using pandas string methods.
+    Row i contains exactly the values of gender_features(names[i]).
+
+    Parameters:
+    -----------
+    names : pandas.Series
+        Series of names. Values are converted to strings before features are engineered.
+    feature_names : list of str, optional
+        Subset of the features in FEATURE_SUFFIX_LENGTHS to engineer. Defaults to all of them.
+
+    Returns:
+    --------
+    features : pandas.DataFrame
+        DataFrame with one column per feature (in the same order as the keys of 'gender_features')
+        and one row per name.
+
+    Example
+    -------
+    vectorized_gender_features(pd.Series(['Emily', 'Odiya']))
+    Output:
+    | last_5_letters | last_two_letters | last_letter | last_3_letters | last_4_letters | name  |
+    |----------------|------------------|-------------|----------------|----------------|-------|
+    | emily          | ly               | y           | ily            | mily           | emily |
+    | odiya          | ya               | a           | iya            | diya           | odiya |
+    '''
+
+    if feature_names is None:
+        feature_names = list(FEATURE_SUFFIX_LENGTHS)
+    lower_names = names.astype(str).str.lower()
+    features = pd.DataFrame({feature: lower_names if FEATURE_SUFFIX_LENGTHS[feature] is None
+                             else lower_names.str[-FEATURE_SUFFIX_LENGTHS[feature]:]
+                             for feature in feature_names})
+    return features
+
+
+def iter_featuresets(features, labels=None):
+    '''Lazily turn a feature DataFrame into nltk featuresets, one row at a time
+
+    Parameters:
+    -----------
+    features : pandas.DataFrame
+        Feature columns created by 'vectorized_gender_features'.
+    labels : iterable, optional
+        Labels to pair with each featureset. If not given, only the featuresets are yielded.
+
+    Yields:
+    -------
+    featureset : dict or tuple
+        A feature dictionary, or a (feature dictionary, label) tuple if labels are given.
+    '''
+
+    columns = list(features.columns)
+    rows = zip(*(features[column].tolist() for column in columns))
+    if labels is None:
+        for row in rows:
+            yield dict(zip(columns, row))
+    else:
+        for row, label in zip(rows, labels):
+            yield (dict(zip(columns, row)), label)
+
+
+def feature_engineering(data, name_col, gender_col):
+    '''Perform feature engineering on a dataset
+
+    This function takes a dataset containing names and associated genders and performs feature engineering. 
+    It generates feature sets by applying the 'gender_features' function to each row in the dataset.
+
+    Parameters:
+    -----------
+    data : pandas.DataFrame
+        DataFrame containing the dataset with names and associated genders.
+    name_col : str
+        Name of the column in the DataFrame containing the names.
+    gender_col : str
+        Name of the column in the DataFrame containing the genders.
+
+    Returns:
+    --------
+    featuresets : list of tuples
+        A list of tuples where each tuple contains a dictionary of engineered features 
+        and the corresponding gender label.
+
+    Example
+    -------
+    data:
+    | name      | gender |
+    |-----------|--------|
+    | Aaradhya  | f      |
+    | Odiya     | f      |
+
+    feature_engineering(data, 'name', 'gender')
+    Output: [({'last_5_letters': 'adhya', 'last_two_letters': 'ya', 'last_letter': 'a',
+               'last_3_letters': 'hya', 'last_4_letters': 'dhya', 'name': 'aaradhya'}, 'f'),
+             ({'last_5_letters': 'odiya', 'last_two_letters': 'ya', 'last_letter': 'a',
+               'last_3_letters': 'iya', 'last_4_letters': 'diya', 'name': 'odiya'}, 'f')]
+    '''
+
+    # make sure name column is of type string
+    data.loc[:,name_col] = data[name_col].astype(str) 
+    # engineer features for the whole name column at once
+    features = vectorized_gender_features(data[name_col])
+    featuresets = list(iter_featuresets(features, data[gender_col].tolist()))
+    return featuresets
@@ -0,0 +1,63 @@
+# author: Jade Bouchard
+# date: 2026-10-19
+#
+# This is a thin client for the local gender inference server (scripts/gender_inference_server.py).
+# It only uses the standard library, so it starts quickly and can be imported by other tools.
+#
+# Usage: python scripts/gender_inference_client.py --url=http://127.0.0.1:8765 Emily Jordan Odiya
+
+
+import json
+import urllib.request
+import click
+
+
+def predict_genders(names, url='http://127.0.0.1:8765', timeout=60):
+    '''Ask the inference server for the gender of each name.
+
+    Parameters:
+    ----------
+    names : list of str
+        First names to classify.
+    url : str
+        Address of the inference server.
+    timeout : float
+        Number of seconds to wait for a response.
+
+    Returns:
+    -------
+    predictions : list of dict
+        One dictionary per name, with the keys 'name', 'gender', 'confidence' and 'source'
+        ('corpus', 'fuzzy' or 'model').
+
+    Example:
+    -------
+    >>> predict_genders(['Emily'])
+    >>> [{'name': 'Emily', 'gender': 'Female', 'confidence': 0.99, 'source': 'corpus'}]
+    '''
+    request = urllib.request.Request(f'{url}/predict', data = json.dumps({'names': list(names)}).encode(),
+                                     headers = {'Content-Type': 'application/json'}, method = 'POST')
+    with urllib.request.urlopen(request, timeout = timeout) as response:
+        return json.loads(response.read())['predictions']
+
+
+def server_is_ready(url='http://127.0.0.1:8765', timeout=1):
+    '''Return True if the inference server at url is up and answering requests.'''
+    try:
+        with urllib.request.urlopen(f'{url}/health', timeout = timeout) as response:
+            return json.loads(response.read()).get('status') == 'ok'
+    except OSError:
+        return False
+
+
+@click.command
+@click.option('--url', type=str, default='http://127.0.0.1:8765')
+@click.argument('names', nargs=-1)
+def main(url, names):
+    '''Print the guessed gender, confidence score and source of each name given on the command line.'''
+    for prediction in predict_genders(names, url):
+        print(f"{prediction['name']}\t{prediction['gender']}\t{prediction['confidence']}\t{prediction['source']}")
+
+
+if __name__ == "__main__":
+    main()
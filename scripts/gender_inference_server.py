@@ -0,0 +1,285 @@
+# author: Jade Bouchard
+# date: 2026-10-19
+#
+# This script runs a long-lived local gender inference server, so that tools that need gender predictions
+# do not pay for interpreter startup, imports and model loading on every call.
+# The babyname corpus, its fuzzy-matching index and the gender model are loaded once.
+# Names are classified the same way as the pipeline: by exact corpus match, then fuzzy corpus match,
+# then the gender model. Every prediction says which of these it came from ('corpus', 'fuzzy' or 'model').
+# Concurrent requests are coalesced into micro-batches, so many small requests are classified in a few batched passes.
+#
+# The server listens on localhost only:
+#   POST /predict with {"names": ["Emily", ...]} returns
+#        {"predictions": [{"name": "Emily", "gender": "Female", "confidence": 0.99, "source": "corpus"}, ...]}
+#   GET /health returns {"status": "ok"}
+# See scripts/gender_inference_client.py for a client.
+#
+# Usage: python scripts/gender_inference_server.py \
+# --name_data_path=data/gender_corpus/clean_name_corpus.csv \
+# --model_path=models/gender_classifier \
+# --model_metrics_path=models/gender_classifier_metrics.json \
+# --nltk_test_data=data/gender_predictions/nltk_test_data.pickle \
+# --fuzzy_max_distance=1 --port=8765
+
+
+import json
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import click
+import numpy as np
+import pandas as pd
+from fuzzy_name_matching import build_fuzzy_corpus, fuzzy_match_names
+from nltk_make_predictions import load_model, model_test_accuracy, predict_unique_names
+from prediction_cache import normalize_names
+
+
+def load_gender_service(name_data_path, model_path, nltk_test_data=None, model_metrics_path=None, fuzzy_max_distance=1):
+    '''Load everything needed to classify names: the name corpus, its fuzzy-matching index and the gender model.
+
+    Parameters:
+    ----------
+    name_data_path : str
+        Path to the clean babyname corpus.
+    model_path : str
+        Path to the gender model folder (or pickled nltk classifier).
+    nltk_test_data : str, optional
+        Path to the pickled test set, used to score the model if its accuracy is not in the metrics file.
+    model_metrics_path : str, optional
+        Path to the model metrics file.
+    fuzzy_max_distance : int
+        Names with no exact corpus match are matched to corpus names within this many edits. 0 turns fuzzy matching off.
+
+    Returns:
+    -------
+    service : dict
+        Dictionary with the keys 'corpus', 'fuzzy_corpus', 'fuzzy_max_distance', 'model' and 'accuracy'.
+    '''
+    name_corpus = pd.read_csv(name_data_path)
+    model = load_model(model_path)
+    return {'corpus': name_corpus.drop_duplicates(subset = 'First_Name').set_index('First_Name'),
+            'fuzzy_corpus': build_fuzzy_corpus(name_corpus, fuzzy_max_distance) if fuzzy_max_distance > 0 else None,
+            'fuzzy_max_distance': fuzzy_max_distance,
+            'model': model,
+            'accuracy': model_test_accuracy(model, model_path, nltk_test_data, model_metrics_path)}
+
+
+def classify_names(service, names):
+    '''Guess the gender of each name, using the corpus first, then fuzzy corpus matches, then the gender model.
+
+    Confidence scores are computed like in the pipeline: the corpus confidence score for corpus matches,
+    the discounted corpus confidence score for fuzzy matches, and the model probability times the
+    model's test set accuracy for model predictions.
+
+    Parameters:
+    ----------
+    service : dict
+        Service loaded by 'load_gender_service'.
+    names : list of str
+        First names to classify.
+
+    Returns:
+    -------
+    predictions : pandas.DataFrame
+        Columns 'name', 'gender', 'confidence' and 'source', with one row per name (in the same order).
+
+    Example:
+    -------
+    classify_names(service, ['Emily', 'Jenifer', 'Odiyana'])
+    Output:
+    | name    | gender | confidence | source |
+    |---------|--------|------------|--------|
+    | Emily   | Female | 0.99       | corpus |
+    | Jenifer | Female | 0.89       | fuzzy  |
+    | Odiyana | Female | 0.71       | model  |
+    '''
+    names = pd.Series(list(names), dtype = object).astype(str)
+    unique_names = pd.Index(names.unique())
+    predictions = pd.DataFrame({'gender': None, 'confidence': np.nan, 'source': None}, index = unique_names)
+
+    # exact corpus matches
+    corpus = service['corpus']
+    in_corpus = unique_names.isin(corpus.index)
+    predictions.loc[in_corpus, 'gender'] = corpus.loc[unique_names[in_corpus], 'Sex_at_birth'].to_numpy()
+    predictions.loc[in_corpus, 'confidence'] = corpus.loc[unique_names[in_corpus], 'Confidence_Score'].to_numpy()
+    predictions.loc[in_corpus, 'source'] = 'corpus'
+
+    # fuzzy corpus matches
+    if service['fuzzy_corpus'] is not None:
+        matched_names = fuzzy_match_names(service['fuzzy_corpus'], unique_names[predictions['source'].isnull()],
+                                          service['fuzzy_max_distance']).set_index('First_Name')
+        predictions.loc[matched_names.index, 'gender'] = matched_names['Fuzzy_Gender']
+        predictions.loc[matched_names.index, 'confidence'] = matched_names['Fuzzy_Confidence']
+        predictions.loc[matched_names.index, 'source'] = 'fuzzy'
+
+    # gender model, with each normalized name classified once
+    needs_model = unique_names[predictions['source'].isnull()]
+    if len(needs_model):
+        normalized_names = normalize_names(pd.Series(needs_model, index = needs_model, dtype = object))
+        model_predictions = predict_unique_names(service['model'], normalized_names.unique()).set_index('name')
+        probabilities = normalized_names.map(model_predictions['probability'])
+        predictions.loc[needs_model, 'gender'] = normalized_names.map(model_predictions['gender'])
+        predictions.loc[needs_model, 'confidence'] = [round(probability*service['accuracy'],2) for probability in probabilities]
+        predictions.loc[needs_model, 'source'] = 'model'
+
+    return predictions.loc[names].rename_axis('name').reset_index()
+
+
+def start_micro_batcher(classify, max_batch_size=10_000, max_wait_seconds=0.002):
+    '''Start a background thread that classifies names from concurrent requests in micro-batches.
+
+    The first waiting request starts a batch. Requests that arrive within max_wait_seconds (until the batch
+    holds max_batch_size names) are added to it, and the whole batch is classified in a single call.
+
+    Parameters:
+    ----------
+    classify : callable
+        Function that takes a list of names and returns a DataFrame of predictions with one row per name.
+    max_batch_size : int
+        Largest number of names classified in one batch (a single larger request is still classified in one batch).
+    max_wait_seconds : float
+        Longest time the first request of a batch waits for other requests to join it.
+
+    Returns:
+    -------
+    submit : callable
+        Function that takes a list of names, waits for their batch to be classified and returns their predictions
+        (a list of dictionaries).
+    '''
+    waiting_requests = queue.Queue()
+
+    def run_batches():
+        while True:
+            batch = [waiting_requests.get()]
+            batch_size = len(batch[0]['names'])
+            deadline = time.perf_counter() + max_wait_seconds
+            while batch_size < max_batch_size:
+                try:
+                    request = waiting_requests.get(timeout = max(deadline - time.perf_counter(), 0))
+                except queue.Empty:
+                    break
+                batch.append(request)
+                batch_size += len(request['names'])
+
+            try:
+                predictions = classify([name for request in batch for name in request['names']]).to_dict('records')
+            except Exception as error:
+                for request in batch:
+                    request['error'] = error
+                    request['done'].set()
+                continue
+            # hand each request its own slice of the batch's predictions
+            start = 0
+            for request in batch:
+                request['predictions'] = predictions[start:start + len(request['names'])]
+                start += len(request['names'])
+                request['done'].set()
+
+    threading.Thread(target = run_batches, daemon = True).start()
+
+    def submit(names):
+        request = {'names': names, 'done': threading.Event()}
+        waiting_requests.put(request)
+        request['done'].wait()
+        if 'error' in request:
+            raise request['error']
+        return request['predictions']
+
+    return submit
+
+
+class GenderRequestHandler(BaseHTTPRequestHandler):
+    '''HTTP request handler for the inference server. The server must have a 'submit' attribute
+    (the function returned by 'start_micro_batcher').'''
+
+    def send_json(self, status, body):
+        content = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self.send_json(200, {'status': 'ok'})
+        else:
+            self.send_json(404, {'error': f'unknown path {self.path}'})
+
+    def do_POST(self):
+        if self.path != '/predict':
+            self.send_json(404, {'error': f'unknown path {self.path}'})
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            names = request['names']
+            if not isinstance(names, list):
+                raise ValueError("'names' must be a list")
+        except (ValueError, KeyError, TypeError) as error:
+            self.send_json(400, {'error': f'invalid request: {error}'})
+            return
+        try:
+            predictions = self.server.submit([str(name) for name in names]) if names else []
+        except Exception as error:
+            self.send_json(500, {'error': f'classification failed: {error!r}'})
+            return
+        self.send_json(200, {'predictions': predictions})
+
+    def log_message(self, format, *args):
+        # do not log every request
+        pass
+
+
+@click.command
+@click.option('--name_data_path', type=str)
+@click.option('--model_path', type=str)
+@click.option('--model_metrics_path', type=str, default=None)
+@click.option('--nltk_test_data', type=str, default=None)
+@click.option('--fuzzy_max_distance', type=int, default=1)
+@click.option('--port', type=int, default=8765)
+@click.option('--max_batch_size', type=int, default=10_000)
+@click.option('--max_wait_ms', type=float, default=2.0)
+def main(name_data_path, model_path, model_metrics_path, nltk_test_data, fuzzy_max_distance, port,
+         max_batch_size, max_wait_ms):
+    '''Load the name corpus and gender model once and serve gender predictions on localhost.
+
+    Parameters:
+    -----------
+    name_data_path : str
+        Path to the clean babyname corpus.
+    model_path : str
+        Path to the gender model folder (or pickled nltk classifier).
+    model_metrics_path : str
+        Optional path to the model metrics file (for the model's test set accuracy).
+    nltk_test_data : str
+        Optional path to the pickled test set, used if the accuracy is not in the metrics file.
+    fuzzy_max_distance : int
+        Largest edit distance for fuzzy corpus matches. 0 turns fuzzy matching off.
+    port : int
+        Port to listen on (on 127.0.0.1).
+    max_batch_size : int
+        Largest number of names classified in one micro-batch.
+    max_wait_ms : float
+        Longest time (in milliseconds) a request waits for other requests to join its micro-batch.
+    '''
+    start = time.perf_counter()
+    service = load_gender_service(name_data_path, model_path, nltk_test_data, model_metrics_path, fuzzy_max_distance)
+    print(f"Loaded the name corpus and gender model in {time.perf_counter() - start:.2f} seconds")
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), GenderRequestHandler, bind_and_activate = False)
+    # the default listen backlog (5) makes bursts of concurrent clients wait for connection retries
+    server.request_queue_size = 1024
+    server.daemon_threads = True
+    server.server_bind()
+    server.server_activate()
+    server.submit = start_micro_batcher(lambda names: classify_names(service, names), max_batch_size, max_wait_ms / 1000)
+    print(f"Serving gender predictions on http://127.0.0.1:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
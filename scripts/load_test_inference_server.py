@@ -0,0 +1,75 @@
+# author: Jade Bouchard
+# date: 2026-10-19
+#
+# This script load-tests a running gender inference server (scripts/gender_inference_server.py).
+# Several client threads send requests of a few names each at the same time, and the script reports
+# the p50/p99 request latency and the number of names classified per second.
+#
+# Usage: python scripts/load_test_inference_server.py \
+# --url=http://127.0.0.1:8765 \
+# --names_path=data/gender_predictions/needs_gender_predictions.csv \
+# --concurrency=16 --requests=2000 --names_per_request=8
+
+
+import csv
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+import click
+from gender_inference_client import predict_genders, server_is_ready
+
+
+def percentile(values, fraction):
+    '''Return the value at the given fraction (between 0 and 1) of the sorted values (nearest rank).'''
+    values = sorted(values)
+    return values[min(int(fraction * len(values)), len(values) - 1)]
+
+
+@click.command
+@click.option('--url', type=str, default='http://127.0.0.1:8765')
+@click.option('--names_path', type=str)
+@click.option('--concurrency', type=int, default=16)
+@click.option('--requests', type=int, default=2000)
+@click.option('--names_per_request', type=int, default=8)
+def main(url, names_path, concurrency, requests, names_per_request):
+    '''Send many concurrent requests to the inference server and report latency and throughput.
+
+    Parameters:
+    -----------
+    url : str
+        Address of the inference server.
+    names_path : str
+        Path to a csv file with a 'First_Name' column to draw request names from.
+    concurrency : int
+        Number of client threads sending requests at the same time.
+    requests : int
+        Total number of requests to send.
+    names_per_request : int
+        Number of names in each request.
+    '''
+    if not server_is_ready(url):
+        raise click.ClickException(f"no inference server is answering at {url}")
+
+    with open(names_path, newline = '') as names_file:
+        names = [row['First_Name'] for row in csv.DictReader(names_file) if row['First_Name']]
+    random.seed(123)
+    request_names = [random.sample(names, names_per_request) for _ in range(requests)]
+
+    def timed_request(batch):
+        start = time.perf_counter()
+        predict_genders(batch, url)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers = concurrency) as pool:
+        latencies = list(pool.map(timed_request, request_names))
+    elapsed = time.perf_counter() - start
+
+    print(f"{requests} requests of {names_per_request} names with {concurrency} concurrent clients")
+    print(f"p50 latency: {percentile(latencies, 0.50) * 1000:.1f} ms")
+    print(f"p99 latency: {percentile(latencies, 0.99) * 1000:.1f} ms")
+    print(f"throughput: {requests * names_per_request / elapsed:,.0f} names/sec")
+
+
+if __name__ == "__main__":
+    main()
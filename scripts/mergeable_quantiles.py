@@ -0,0 +1,222 @@
+# author: Jade Bouchard
+# date: 2026-10-19
+#
+# This module computes medians (and other quantiles) from mergeable partial states, so that grouped medians can be
+# found one chunk or partition of the data at a time (ex: streaming a csv file, or in parallel) instead of from one
+# fully loaded DataFrame.
+# A state keeps the values of its group while there are at most max_exact_size of them, and its quantiles are exact
+# (found with np.partition). Larger groups are summarized by a KLL-style quantile sketch of about k values per level,
+# whose quantiles have a rank error within about 2/k. Merging states gives the same exact result in any order, and the
+# sketch error stays bounded however many states are merged.
+#
+# Used by: scripts/exploratory_analysis.py
+
+
+import numpy as np
+import pandas as pd
+
+
+def make_quantile_state(values, max_exact_size=1_000_000, k=200):
+    '''Create the quantile state of some values (missing values are ignored).
+
+    Parameters:
+    ----------
+    values : array-like
+        Numeric values.
+    max_exact_size : int
+        Largest number of values kept exactly. Larger states are turned into a sketch.
+    k : int
+        Size of the sketch's top level (larger k means smaller errors and larger sketches).
+
+    Returns:
+    -------
+    state : dict
+        Dictionary with the keys 'count' (number of values), 'values' (the values, or None for a sketch),
+        'levels' (the sketch's levels, where each value of level h stands for 2**h values, or None),
+        'compactions', 'max_exact_size' and 'k'.
+
+    Example:
+    -------
+    state = merge_quantile_states(make_quantile_state([1, 5]), make_quantile_state([3]))
+    state_quantile(state, 0.5)
+    Output: 3.0
+    '''
+    values = np.asarray(values, dtype = float)
+    values = values[~np.isnan(values)]
+    state = {'count': len(values), 'values': values, 'levels': None, 'compactions': [],
+             'max_exact_size': max_exact_size, 'k': k}
+    return _limit_state_size(state)
+
+
+def merge_quantile_states(left, right):
+    '''Merge two quantile states into the state of all their values. Merging is associative and commutative
+    (exactly for exact states, and within the sketch's error bound for sketches).
+
+    Parameters:
+    ----------
+    left : dict
+        Quantile state.
+    right : dict
+        Quantile state (with the same max_exact_size and k).
+
+    Returns:
+    -------
+    state : dict
+        Quantile state of the values of both states.
+    '''
+    if left['max_exact_size'] != right['max_exact_size'] or left['k'] != right['k']:
+        raise ValueError("quantile states with different 'max_exact_size' or 'k' can not be merged")
+    state = {'count': left['count'] + right['count'], 'values': None, 'levels': None, 'compactions': [],
+             'max_exact_size': left['max_exact_size'], 'k': left['k']}
+    if left['levels'] is None and right['levels'] is None:
+        state['values'] = np.concatenate([left['values'], right['values']])
+    else:
+        left_levels, right_levels = _state_levels(left), _state_levels(right)
+        n_levels = max(len(left_levels), len(right_levels))
+        state['levels'] = [np.concatenate([levels[h] for levels in (left_levels, right_levels) if h < len(levels)])
+                           for h in range(n_levels)]
+        state['compactions'] = [sum(compactions[h] for compactions in (left['compactions'], right['compactions'])
+                                    if h < len(compactions))
+                                for h in range(n_levels)]
+    return _limit_state_size(state)
+
+
+def state_quantile(state, q):
+    '''Find the q quantile of the values of a state (NaN for a state with no values).
+
+    Exact states give the same result as pandas' 'median' for q = 0.5 (the mean of the two middle values
+    when there is an even number of values), and the value at position floor((count - 1) * q) of the sorted values
+    for other quantiles.
+    Sketches give the value whose (weighted) rank is closest to q.
+
+    Parameters:
+    ----------
+    state : dict
+        Quantile state.
+    q : float
+        Quantile, between 0 and 1.
+
+    Returns:
+    -------
+    quantile : float
+        The q quantile.
+    '''
+    if state['count'] == 0:
+        return np.nan
+    if state['levels'] is None:
+        values = state['values']
+        middle = (len(values) - 1) * q
+        lower, upper = int(np.floor(middle)), int(np.ceil(middle))
+        if q == 0.5 and lower != upper:
+            partitioned = np.partition(values, [lower, upper])
+            return (partitioned[lower] + partitioned[upper]) / 2
+        return np.partition(values, lower)[lower]
+
+    values = np.concatenate(state['levels'])
+    weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(state['levels'])])
+    order = np.argsort(values, kind = 'stable')
+    cumulative_weights = np.cumsum(weights[order])
+    position = min(np.searchsorted(cumulative_weights, q * cumulative_weights[-1], side = 'left'), len(values) - 1)
+    return values[order][position]
+
+
+def grouped_quantile_states(data, group_columns, value_column, max_exact_size=1_000_000, k=200):
+    '''Create the quantile state of a value column for every group of a DataFrame (ex: one chunk of a file).
+    Rows with a missing group value are dropped, like in 'DataFrame.groupby'.
+
+    Parameters:
+    ----------
+    data : pandas.DataFrame
+        The data (or one chunk of it).
+    group_columns : list of str
+        Columns to group by.
+    value_column : str
+        Column to find quantiles of.
+    max_exact_size : int
+        Largest number of values kept exactly in a group's state.
+    k : int
+        Size of the sketches' top level.
+
+    Returns:
+    -------
+    states : dict
+        Dictionary of {group key (tuple): quantile state}.
+    '''
+    return {key: make_quantile_state(values.to_numpy(dtype = float), max_exact_size, k)
+            for key, values in data.groupby(group_columns, sort = False)[value_column]}
+
+
+def merge_grouped_quantile_states(grouped_states):
+    '''Merge the grouped quantile states of several chunks (from 'grouped_quantile_states').
+
+    Parameters:
+    ----------
+    grouped_states : iterable of dict
+        Dictionaries of {group key: quantile state}.
+
+    Returns:
+    -------
+    states : dict
+        Dictionary of {group key: quantile state of the group in every chunk}.
+    '''
+    merged = {}
+    for states in grouped_states:
+        for key, state in states.items():
+            merged[key] = merge_quantile_states(merged[key], state) if key in merged else state
+    return merged
+
+
+def grouped_quantiles(states, group_columns, q=0.5):
+    '''Find the q quantile of every group's state.
+
+    Parameters:
+    ----------
+    states : dict
+        Dictionary of {group key (tuple): quantile state}.
+    group_columns : list of str
+        Names of the group columns (the levels of the returned index).
+    q : float
+        Quantile, between 0 and 1.
+
+    Returns:
+    -------
+    quantiles : pandas.Series
+        The quantile of each group, indexed by the group columns and sorted by them.
+    '''
+    index = pd.MultiIndex.from_tuples(list(states), names = group_columns)
+    return pd.Series([state_quantile(state, q) for state in states.values()], index = index, dtype = float).sort_index()
+
+
+def _state_levels(state):
+    '''Return the sketch levels of a state (an exact state is a single level of weight 1).'''
+    return state['levels'] if state['levels'] is not None else [state['values']]
+
+
+def _limit_state_size(state):
+    '''Turn an exact state with too many values into a sketch, and compact a sketch's levels that are over capacity.'''
+    if state['levels'] is None:
+        if len(state['values']) <= state['max_exact_size']:
+            return state
+        state['levels'], state['values'] = [state['values']], None
+
+    levels, compactions, k = state['levels'], state['compactions'], state['k']
+    compactions.extend([0] * (len(levels) - len(compactions)))
+    compacted = True
+    while compacted:
+        compacted = False
+        for h in range(len(levels)):
+            # lower levels hold fewer values (about k * (2/3)**depth), like in a KLL sketch
+            capacity = max(int(k * (2 / 3) ** (len(levels) - 1 - h)), 2)
+            if len(levels[h]) <= capacity:
+                continue
+            items = np.sort(levels[h])
+            # keep one value at this level when there is an odd number, so that the total weight does not change
+            levels[h], items = items[:len(items) % 2], items[len(items) % 2:]
+            if h + 1 == len(levels):
+                levels.append(np.empty(0))
+                compactions.append(0)
+            # promote every other value (alternating which ones between compactions) with twice the weight
+            levels[h + 1] = np.concatenate([levels[h + 1], items[compactions[h] % 2::2]])
+            compactions[h] += 1
+            compacted = True
+    return state
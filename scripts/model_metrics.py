@@ -0,0 +1,59 @@
+# author: Jade Bouchard
+# date: 2026-10-19
+#
+# This module stores evaluation metrics of the gender model (ex: test set accuracy) next to the model,
+# together with the model's fingerprint. The prediction stage reads the accuracy from here instead of
+# re-scoring the test set, and falls back to re-scoring if the metrics belong to a different model.
+#
+# Used by: scripts/nltk_train_gender_classifier.py, scripts/nltk_make_predictions.py, scripts/evaluate_gender_models.py
+
+
+import json
+import os
+from prediction_cache import model_fingerprint
+
+
+def write_model_metrics(metrics_path, model_path, metrics):
+    '''Save metrics for a model, together with the model's fingerprint.
+    Metrics already stored for the same model are kept unless they are overwritten.
+
+    Parameters:
+    ----------
+    metrics_path : str
+        Path to the JSON metrics file.
+    model_path : str
+        Path to the model file or folder the metrics belong to.
+    metrics : dict
+        Metrics to store (ex: {'test_accuracy': 0.78}).
+    '''
+    fingerprint = model_fingerprint(model_path)
+    stored_metrics = read_model_metrics(metrics_path, model_path, fingerprint) or {}
+    stored_metrics.update(metrics)
+    with open(metrics_path, 'w') as metrics_file:
+        json.dump({'model_fingerprint': fingerprint, 'metrics': stored_metrics}, metrics_file, indent = 2)
+
+
+def read_model_metrics(metrics_path, model_path, fingerprint=None):
+    '''Read the metrics stored for a model.
+
+    Parameters:
+    ----------
+    metrics_path : str
+        Path to the JSON metrics file.
+    model_path : str
+        Path to the model file or folder.
+    fingerprint : str, optional
+        Fingerprint of the model, if it has already been computed.
+
+    Returns:
+    -------
+    metrics : dict or None
+        The stored metrics, or None if there is no metrics file or it belongs to a different model.
+    '''
+    if not metrics_path or not os.path.isfile(metrics_path):
+        return None
+    with open(metrics_path) as metrics_file:
+        stored = json.load(metrics_file)
+    if stored.get('model_fingerprint') != (fingerprint or model_fingerprint(model_path)):
+        return None
+    return stored['metrics']
@@ -0,0 +1,485 @@
+# author: Jade Bouchard
+# date: 2026-10-19
+#
+# This module compiles a trained nltk NaiveBayesClassifier into dense NumPy log-probability tables,
+# so that gender predictions for a whole column of names can be made in a single batched array pass
+# instead of nltk's per-name, per-feature dictionary lookups.
+# Probabilities match nltk's prob_classify to within floating point tolerance.
+# The count tables can be saved as a compact, non-pickle model folder (JSON metadata plus .npy arrays)
+# that loads in milliseconds and can be memory-mapped.
+# Count tables can also be built directly from a feature DataFrame and merged (added or subtracted),
+# so a model can be updated with a delta corpus without retraining from scratch.
+#
+# Used by: scripts/nltk_train_gender_classifier.py, scripts/nltk_make_predictions.py, scripts/update_gender_classifier.py,
+# reports/UBC_salary_report.qmd
+
+
+import json
+import os
+import pickle
+import numpy as np
+import pandas as pd
+
+
+# version of the model folder layout written by save_naive_bayes_counts
+MODEL_FORMAT_VERSION = 1
+
+
+def naive_bayes_counts(classifier):
+    '''Extract the label and feature-value count tables from a trained nltk NaiveBayesClassifier.
+
+    The classifier must use Lidstone-style probability estimates (ELEProbDist, the nltk default,
+    LaplaceProbDist or LidstoneProbDist), which are fully described by counts, a gamma value and a number of bins.
+
+    Parameters:
+    -----------
+    classifier : nltk.NaiveBayesClassifier
+        A trained classifier.
+
+    Returns:
+    --------
+    counts : dict
+        Dictionary with the keys:
+        - 'labels': sorted list of labels
+        - 'label_counts': numpy array with the number of training examples for each label
+        - 'label_gamma', 'label_bins': smoothing parameters of the label distribution
+        - 'features': dictionary mapping each feature name to a dictionary with the keys
+          'values' (numpy array of feature values), 'counts' (numpy array of shape [values, labels]),
+          'totals' (numpy array with the total count for each label), 'present' (boolean numpy array,
+          False for labels that never saw the feature), 'gamma' and 'bins'.
+    '''
+    label_probdist = classifier._label_probdist
+    labels = sorted(classifier.labels())
+    label_freqdist = label_probdist.freqdist()
+
+    # group the (label, feature name) distributions by feature name
+    feature_probdists = {}
+    for (label, fname), probdist in classifier._feature_probdist.items():
+        feature_probdists.setdefault(fname, {})[label] = probdist
+
+    features = {}
+    for fname, probdists_by_label in feature_probdists.items():
+        values = list(dict.fromkeys(value for probdist in probdists_by_label.values()
+                                    for value in probdist.freqdist()))
+        value_codes = {value: code for code, value in enumerate(values)}
+        counts = np.zeros((len(values), len(labels)), dtype = np.int64)
+        totals = np.zeros(len(labels), dtype = np.int64)
+        present = np.zeros(len(labels), dtype = bool)
+        for label_code, label in enumerate(labels):
+            if label not in probdists_by_label:
+                continue
+            freqdist = probdists_by_label[label].freqdist()
+            for value, count in freqdist.items():
+                counts[value_codes[value], label_code] = count
+            totals[label_code] = freqdist.N()
+            present[label_code] = True
+        # every (label, feature name) distribution of a classifier shares the same gamma and bins
+        probdist = next(iter(probdists_by_label.values()))
+        features[fname] = {'values': np.array(values, dtype = object), 'counts': counts, 'totals': totals,
+                           'present': present, 'gamma': probdist._gamma, 'bins': probdist._bins}
+
+    counts = {'labels': labels,
+              'label_counts': np.array([label_freqdist[label] for label in labels], dtype = np.int64),
+              'label_gamma': label_probdist._gamma,
+              'label_bins': label_probdist._bins,
+              'features': features}
+    return counts
+
+
+def count_naive_bayes(features, labels, gamma=0.5):
+    '''Count label and feature-value occurrences directly from a feature DataFrame, without nltk.
+
+    The result is the same as naive_bayes_counts(nltk.NaiveBayesClassifier.train(featuresets)) for featuresets
+    built from the same rows (with nltk's default ELEProbDist, gamma=0.5), up to the order of feature values.
+
+    Parameters:
+    -----------
+    features : pandas.DataFrame
+        One column per feature and one row per training example (ex: created by 'vectorized_gender_features').
+        Every row must have a value for every feature.
+    labels : iterable
+        Label of each row.
+    gamma : float
+        Smoothing value of the probability estimates (0.5 for nltk's ELEProbDist).
+
+    Returns:
+    --------
+    counts : dict
+        Count tables in the same format as 'naive_bayes_counts'.
+    '''
+    labels, label_codes = np.unique(np.asarray(list(labels), dtype = object), return_inverse = True)
+    label_counts = np.bincount(label_codes, minlength = len(labels)).astype(np.int64)
+
+    features_counts = {}
+    for fname in features.columns:
+        value_codes, values = pd.factorize(features[fname])
+        counts = np.bincount(value_codes * len(labels) + label_codes,
+                             minlength = len(values) * len(labels)).reshape(len(values), len(labels))
+        features_counts[fname] = {'values': np.asarray(values, dtype = object), 'counts': counts.astype(np.int64),
+                                  'totals': label_counts.copy(), 'present': label_counts > 0,
+                                  'gamma': gamma, 'bins': len(values)}
+
+    counts = {'labels': labels.tolist(),
+              'label_counts': label_counts,
+              'label_gamma': gamma,
+              'label_bins': len(labels),
+              'features': features_counts}
+    return counts
+
+
+def merge_naive_bayes_counts(counts, delta_counts, subtract=False):
+    '''Add (or subtract) the count tables of a delta corpus to the count tables of a trained model.
+
+    Naive bayes only depends on counts, so merging the counts of two corpora gives exactly the model
+    that would be trained on both corpora at once, and subtracting gives the model trained without the
+    delta's examples. The work is proportional to the number of labels and feature values, not to the
+    number of training examples.
+
+    Parameters:
+    -----------
+    counts : dict
+        Count tables of the current model (from 'naive_bayes_counts' or 'load_naive_bayes_counts').
+    delta_counts : dict
+        Count tables of the examples to add or remove (ex: from 'count_naive_bayes').
+    subtract : bool
+        If True, the delta's examples are removed from the model instead of added.
+
+    Returns:
+    --------
+    merged_counts : dict
+        Count tables in the same format as 'naive_bayes_counts'. Labels and feature values whose count
+        drops to 0 are removed, like they would be in a model trained from scratch.
+
+    Example
+    -------
+    delta = count_naive_bayes(vectorized_gender_features(new_names['First_Name']), new_names['Sex_at_birth'])
+    merged = merge_naive_bayes_counts(load_naive_bayes_counts('models/gender_classifier'), delta)
+    '''
+    if counts['label_gamma'] != delta_counts['label_gamma']:
+        raise ValueError(f"cannot merge models with different label gamma values "
+                         f"({counts['label_gamma']} and {delta_counts['label_gamma']})")
+    sign = -1 if subtract else 1
+    labels = sorted(set(counts['labels']) | set(delta_counts['labels']))
+
+    def align_labels(table_labels, array):
+        # put the columns (or items) of array in the order of the merged labels, with zeros for missing labels
+        aligned = np.zeros((len(array), len(labels)) if array.ndim == 2 else len(labels), dtype = np.int64)
+        positions = [labels.index(label) for label in table_labels]
+        aligned[..., positions] = array
+        return aligned
+
+    label_counts = (align_labels(counts['labels'], np.asarray(counts['label_counts']))
+                    + sign * align_labels(delta_counts['labels'], np.asarray(delta_counts['label_counts'])))
+    if (label_counts < 0).any():
+        raise ValueError("cannot remove more examples of a label than the model was trained on")
+    kept_labels = label_counts > 0
+
+    features = {}
+    for fname in dict.fromkeys(list(counts['features']) + list(delta_counts['features'])):
+        table = counts['features'].get(fname)
+        delta_table = delta_counts['features'].get(fname)
+        gamma = (table or delta_table)['gamma']
+        if table is not None and delta_table is not None and table['gamma'] != delta_table['gamma']:
+            raise ValueError(f"cannot merge feature '{fname}' with different gamma values")
+
+        # merged feature values: the model's values, followed by the delta's new values
+        values = pd.Index([] if table is None else np.asarray(table['values'], dtype = object), dtype = object)
+        merged_counts = np.zeros((len(values), len(labels)), dtype = np.int64)
+        if table is not None:
+            merged_counts += align_labels(counts['labels'], np.asarray(table['counts'], dtype = np.int64))
+        if delta_table is not None:
+            delta_values = pd.Index(np.asarray(delta_table['values'], dtype = object), dtype = object)
+            new_values = delta_values[~delta_values.isin(values)]
+            values = values.append(new_values)
+            merged_counts = np.vstack([merged_counts, np.zeros((len(new_values), len(labels)), dtype = np.int64)])
+            delta_rows = values.get_indexer(delta_values)
+            merged_counts[delta_rows] += sign * align_labels(delta_counts['labels'],
+                                                             np.asarray(delta_table['counts'], dtype = np.int64))
+        if (merged_counts < 0).any():
+            raise ValueError(f"cannot remove values of feature '{fname}' that the model was not trained on")
+
+        kept_values = merged_counts.sum(axis = 1) > 0
+        merged_counts = merged_counts[kept_values][:, kept_labels]
+        if len(merged_counts) == 0:
+            continue
+        totals = merged_counts.sum(axis = 0)
+        features[fname] = {'values': np.asarray(values[kept_values], dtype = object), 'counts': merged_counts,
+                           'totals': totals, 'present': totals > 0, 'gamma': gamma, 'bins': len(merged_counts)}
+
+    merged_counts = {'labels': [label for label, kept in zip(labels, kept_labels) if kept],
+                     'label_counts': label_counts[kept_labels],
+                     'label_gamma': counts['label_gamma'],
+                     'label_bins': int(kept_labels.sum()),
+                     'features': features}
+    return merged_counts
+
+
+def lidstone_log_probabilities(counts, totals, gamma, bins):
+    '''Compute base-2 log probabilities the way nltk's LidstoneProbDist does: log2((count + gamma) / (N + bins * gamma)).
+
+    Parameters:
+    -----------
+    counts : numpy.ndarray
+        Counts of each value, with one column per label (or a 1D array of counts).
+    totals : numpy.ndarray or int
+        Total count (N) for each label.
+    gamma : float
+        Smoothing value added to every count.
+    bins : int
+        Number of possible values.
+
+    Returns:
+    --------
+    log_probabilities : numpy.ndarray
+        Base-2 log probabilities with the same shape as counts.
+    '''
+    divisor = totals + bins * gamma
+    # nltk forces the probability to 0 when there is nothing to divide by
+    gamma = np.where(divisor == 0, 0.0, gamma)
+    divisor = np.where(divisor == 0, 1.0, divisor)
+    with np.errstate(divide = 'ignore'):
+        return np.log2((counts + gamma) / divisor)
+
+
+def compile_naive_bayes(counts):
+    '''Compile count tables into log-probability tables that can be indexed by feature-value codes.
+
+    Parameters:
+    -----------
+    counts : dict
+        Count tables created by 'naive_bayes_counts'.
+
+    Returns:
+    --------
+    model : dict
+        Dictionary with the keys 'backend' ('nltk'), 'labels' (numpy array), 'log_prior' (base-2 log probability of each label)
+        and 'features', which maps each feature name to a dictionary with 'index' (a pandas.Index of the
+        feature's values) and 'log_probs' (numpy array of shape [values + 1, labels], where the last row
+        holds the log probabilities of a value that was never seen in training).
+    '''
+    labels = np.array(counts['labels'], dtype = object)
+    log_prior = lidstone_log_probabilities(counts['label_counts'], counts['label_counts'].sum(),
+                                           counts['label_gamma'], counts['label_bins'])
+
+    features = {}
+    for fname, table in counts['features'].items():
+        # add a row of zero counts for feature values that were never seen in training
+        value_counts = np.vstack([table['counts'], np.zeros((1, len(labels)), dtype = np.int64)])
+        log_probs = lidstone_log_probabilities(value_counts, table['totals'], table['gamma'], table['bins'])
+        # labels that never saw this feature name get a probability of 0 (like nltk)
+        log_probs[:, ~table['present']] = -np.inf
+        features[fname] = {'index': pd.Index(table['values']), 'log_probs': log_probs}
+
+    return {'backend': 'nltk', 'labels': labels, 'log_prior': log_prior, 'features': features}
+
+
+def compile_classifier(classifier):
+    '''Compile a trained nltk NaiveBayesClassifier into NumPy log-probability tables.
+
+    Parameters:
+    -----------
+    classifier : nltk.NaiveBayesClassifier
+        A trained classifier.
+
+    Returns:
+    --------
+    model : dict
+        Compiled model (see 'compile_naive_bayes').
+    '''
+    return compile_naive_bayes(naive_bayes_counts(classifier))
+
+
+def predict_naive_bayes(model, features):
+    '''Predict labels and label probabilities for every row of a feature DataFrame in one batched pass.
+
+    Feature columns that the model has never seen are ignored, like nltk does.
+
+    Parameters:
+    -----------
+    model : dict
+        Compiled model created by 'compile_naive_bayes'.
+    features : pandas.DataFrame
+        One column per feature and one row per item to classify
+        (ex: created by 'vectorized_gender_features').
+
+    Returns:
+    --------
+    predicted_labels : numpy.ndarray
+        The most probable label for each row (ties go to the label that sorts last, like nltk).
+    probabilities : pandas.DataFrame
+        The probability of each label (columns) for each row.
+
+    Example
+    -------
+    model = compile_classifier(classifier)
+    predicted_labels, probabilities = predict_naive_bayes(model, vectorized_gender_features(names))
+    '''
+    log_probs = np.tile(model['log_prior'], (len(features), 1))
+    for fname, table in model['features'].items():
+        if fname not in features.columns:
+            continue
+        codes = table['index'].get_indexer(features[fname])
+        codes[codes == -1] = len(table['index'])  # the last row is for unseen values
+        log_probs += table['log_probs'][codes]
+
+    # normalize so that the probabilities of each row sum to 1 (uniform if every label is impossible)
+    log_totals = np.logaddexp2.reduce(log_probs, axis = 1, keepdims = True)
+    with np.errstate(invalid = 'ignore'):
+        probabilities = np.where(np.isneginf(log_totals), 1 / len(model['labels']), np.exp2(log_probs - log_totals))
+
+    # labels are sorted, so searching the reversed columns breaks ties in favour of the last label
+    n_labels = len(model['labels'])
+    predicted_labels = model['labels'][n_labels - 1 - np.argmax(probabilities[:, ::-1], axis = 1)]
+
+    return predicted_labels, pd.DataFrame(probabilities, columns = model['labels'], index = features.index)
+
+
+def save_naive_bayes_counts(counts, model_folder, min_count=0):
+    '''Save count tables as a compact model folder that can be loaded without unpickling.
+
+    The folder contains a 'model.json' metadata file and one .npy array per table.
+    Feature values that occur fewer than min_count times (summed over labels) can be pruned.
+    Pruned values are predicted like values that were never seen in training, while the
+    probabilities of the values that are kept do not change.
+
+    Parameters:
+    -----------
+    counts : dict
+        Count tables created by 'naive_bayes_counts'.
+    model_folder : str
+        Path to the folder to save the model in. It is created if it does not exist.
+    min_count : int
+        Feature values with a total count smaller than this are dropped. 0 keeps every value.
+
+    Example
+    -------
+    save_naive_bayes_counts(naive_bayes_counts(classifier), 'models/gender_classifier', min_count=2)
+    '''
+    os.makedirs(model_folder, exist_ok = True)
+
+    metadata = {'format_version': MODEL_FORMAT_VERSION,
+                'labels': list(counts['labels']),
+                'label_gamma': counts['label_gamma'],
+                'label_bins': int(counts['label_bins']),
+                'pruned_min_count': min_count,
+                'features': {}}
+    np.save(f'{model_folder}/label_counts.npy', counts['label_counts'])
+
+    for feature_number, (fname, table) in enumerate(counts['features'].items()):
+        if any(value is None for value in table['values']):
+            raise ValueError(f"feature '{fname}' has missing values, which cannot be saved in a model folder")
+        keep = table['counts'].sum(axis = 1) >= min_count
+        prefix = f'feature_{feature_number}'
+        np.save(f'{model_folder}/{prefix}_values.npy', np.array(table['values'][keep], dtype = str))
+        # store counts with the smallest unsigned integer type that fits them
+        kept_counts = table['counts'][keep]
+        np.save(f'{model_folder}/{prefix}_counts.npy',
+                kept_counts.astype(np.min_scalar_type(kept_counts.max(initial = 0))))
+        np.save(f'{model_folder}/{prefix}_totals.npy', table['totals'])
+        np.save(f'{model_folder}/{prefix}_present.npy', table['present'])
+        metadata['features'][fname] = {'file_prefix': prefix, 'gamma': table['gamma'], 'bins': int(table['bins'])}
+
+    with open(f'{model_folder}/model.json', 'w') as metadata_file:
+        json.dump(metadata, metadata_file, indent = 2)
+
+
+def load_naive_bayes_counts(model_folder, mmap=True):
+    '''Load count tables from a model folder created by 'save_naive_bayes_counts'.
+
+    Arrays are loaded with allow_pickle=False, so loading a model folder never runs arbitrary code.
+
+    Parameters:
+    -----------
+    model_folder : str
+        Path to the model folder.
+    mmap : bool
+        If True, the arrays are memory-mapped (read only) instead of read into memory.
+
+    Returns:
+    --------
+    counts : dict
+        Count tables in the same format as 'naive_bayes_counts'.
+    '''
+    with open(f'{model_folder}/model.json') as metadata_file:
+        metadata = json.load(metadata_file)
+    if metadata['format_version'] != MODEL_FORMAT_VERSION:
+        raise ValueError(f"unsupported model format version {metadata['format_version']} in {model_folder}")
+
+    mmap_mode = 'r' if mmap else None
+    def load_array(file_name):
+        return np.load(f'{model_folder}/{file_name}.npy', mmap_mode = mmap_mode, allow_pickle = False)
+
+    features = {}
+    for fname, feature_metadata in metadata['features'].items():
+        prefix = feature_metadata['file_prefix']
+        features[fname] = {'values': load_array(f'{prefix}_values'),
+                           'counts': load_array(f'{prefix}_counts'),
+                           'totals': load_array(f'{prefix}_totals'),
+                           'present': load_array(f'{prefix}_present'),
+                           'gamma': feature_metadata['gamma'],
+                           'bins': feature_metadata['bins']}
+
+    counts = {'labels': metadata['labels'],
+              'label_counts': load_array('label_counts'),
+              'label_gamma': metadata['label_gamma'],
+              'label_bins': metadata['label_bins'],
+              'features': features}
+    return counts
+
+
+def load_gender_model(model_path):
+    '''Load and compile a gender model from either a model folder or a pickled nltk NaiveBayesClassifier.
+
+    Parameters:
+    -----------
+    model_path : str
+        Path to a model folder created by 'save_naive_bayes_counts', or to a pickled classifier.
+
+    Returns:
+    --------
+    model : dict
+        Compiled model (see 'compile_naive_bayes').
+    '''
+    if os.path.isdir(model_path):
+        return compile_naive_bayes(load_naive_bayes_counts(model_path))
+    with open(model_path, "rb") as model_file:
+        classifier = pickle.load(model_file)
+    return compile_classifier(classifier)
+
+
+def show_most_informative_features(counts, n=10):
+    '''Print the most informative features of a model, in the same format as nltk's
+    NaiveBayesClassifier.show_most_informative_features.
+
+    A feature value's informativeness is the largest ratio between its probabilities under two labels.
+    Like in nltk, only values that were seen with more than one label are shown.
+
+    Parameters:
+    -----------
+    counts : dict
+        Count tables created by 'naive_bayes_counts' or loaded by 'load_naive_bayes_counts'.
+    n : int
+        Number of features to show.
+    '''
+    labels = counts['labels']
+    informative_features = []
+    for fname, table in counts['features'].items():
+        table_counts = np.asarray(table['counts'])
+        divisor = table['totals'] + table['bins'] * table['gamma']
+        probs = (table_counts + table['gamma']) / np.where(divisor == 0, 1, divisor)
+        seen = (table_counts > 0) & table['present']
+        min_probs = np.where(seen, probs, np.inf).min(axis = 1)
+        max_probs = np.where(seen, probs, 0).max(axis = 1)
+        for value_code in np.flatnonzero(seen.sum(axis = 1) > 1):
+            value = str(table['values'][value_code])
+            sort_key = (min_probs[value_code] / max_probs[value_code], fname, False, value.lower())
+            informative_features.append((sort_key, fname, value, probs[value_code], seen[value_code]))
+
+    print("Most Informative Features")
+    for _, fname, value, value_probs, value_seen in sorted(informative_features)[:n]:
+        seen_labels = sorted((label_code for label_code in range(len(labels)) if value_seen[label_code]),
+                             key = lambda label_code: value_probs[label_code])
+        low_label, high_label = seen_labels[0], seen_labels[-1]
+        ratio = "%8.1f" % (value_probs[high_label] / value_probs[low_label])
+        print("%24s = %-14r %6s : %-6s = %s : 1.0"
+              % (fname, value, str(labels[high_label])[:6], str(labels[low_label])[:6], ratio))
@@ -0,0 +1,57 @@
+# author: Jade Bouchard
+# date: 2026-10-19
+#
+# This module holds the name cleaning helper shared by the salary data and babyname data cleaning.
+# It has no dependencies, so scripts can clean names without importing scripts/clean_salary_data.py.
+#
+# Used by: scripts/clean_salary_data.py, scripts/corpus_gender_prediction.py
+
+
+def shorten_name(name):
+    '''remove initials from names, and if two names just keep the first one
+    
+    Parameters:
+    ----------
+    name : str
+        name of a person
+        
+    Returns:
+    -------
+    name : str
+        shortened name
+    
+    Examples:
+    _______
+    >>> name = "A Bobby"
+    >>> shortened_name = shorten_name(name)
+    >>> print(shortened_name)
+    >>> Bobby
+
+    >>> name = "Anne Michele"
+    >>> shortened_name = shorten_name(name)
+    >>> print(shortened_name)
+    >>> Anne
+
+    >>> name = "Kristen"
+    >>> shortened_name = shorten_name(name)
+    >>> print(shortened_name)
+    >>> Kristen
+
+    >>> name = "Anne -Michelle"
+    >>> shortened_name = shorten_name(name)
+    >>> print(shortened_name)
+    >>> Anne-Michelle
+
+    '''
+    name = str(name)
+    name = name.strip() # remove white space
+    name = name.replace(" -","-").replace("- ","-") # make sure names that should be connected are connected
+    if len(name.split(" ")) <= 1: # if only one word, return word
+        shortened_name = name
+    else:
+        words = name.split(" ")
+        for word in words: # remove one-letter initials if they exist
+            if len(word) == 1:
+                words.remove(word)
+        shortened_name = words[0]  # save first word
+    return shortened_name
@@ -2,18 +2,201 @@
 # date: 2024-04-30
 #
 # This script uses a naive bayes natural language processing classifier to classify people's genders
+# (or the scikit-learn character n-gram classifier, if that is the model found at --model_path)
 #
 # Usage: python scripts/nltk_make_predictions.py \
-	# --model_path=models/gender_classifier.pickle \
+	# --model_path=models/gender_classifier \
 	# --nltk_test_data=data/gender_predictions/nltk_test_data.pickle \
+	# --model_metrics_path=models/gender_classifier_metrics.json \
 	# --needs_predictions_file_path=data/gender_predictions/needs_gender_predictions.csv \
-	# --nltk_predictions_output_path=data/gender_predictions/nltk_gender_predictions.csv
+	# --nltk_predictions_output_path=data/gender_predictions/nltk_gender_predictions.csv \
+	# --cache_path=cache/prediction_cache.sqlite
 
 import click
 import pickle
 import pandas as pd
-from nltk_train_gender_classifier import feature_engineering
-import nltk
+from gender_features import vectorized_gender_features
+from naive_bayes_engine import load_gender_model, predict_naive_bayes
+from sklearn_gender_classifier import is_sklearn_model_folder, load_sklearn_gender_model, predict_sklearn_gender
+from prediction_cache import (model_fingerprint, normalize_names, open_prediction_cache,
+                              get_cached_predictions, store_predictions)
+from model_metrics import read_model_metrics
+from stage_profiler import profile_options, profile_phase
+
+
+def load_model(model_path):
+    '''Load a gender model saved by either backend.
+
+    Parameters:
+    -----------
+    model_path : str
+        Path to a model folder (nltk count tables or sklearn), or to a pickled nltk classifier.
+
+    Returns:
+    --------
+    model : dict
+        Model that can be passed to 'predict_names'. model['backend'] is 'nltk' or 'sklearn'.
+    '''
+    if is_sklearn_model_folder(model_path):
+        return load_sklearn_gender_model(model_path)
+    # compile the nltk classifier into numpy lookup tables so that predictions are made in one batched pass
+    return load_gender_model(model_path)
+
+
+def predict_names(model, names):
+    '''Predict the gender of each name and the probability of each gender, with either backend.
+
+    Parameters:
+    -----------
+    model : dict
+        Model returned by 'load_model'.
+    names : pandas.Series
+        First names to classify.
+
+    Returns:
+    --------
+    predicted_labels : numpy.ndarray
+        The most probable gender of each name.
+    max_probabilities : numpy.ndarray
+        The probability of the predicted gender of each name.
+    '''
+    if model['backend'] == 'sklearn':
+        predicted_labels, probabilities = predict_sklearn_gender(model, names)
+        return predicted_labels, probabilities.max(axis = 1)
+    predicted_labels, probabilities = predict_naive_bayes(model, vectorized_gender_features(names))
+    return predicted_labels, probabilities.max(axis = 1).to_numpy()
+
+
+def predict_unique_names(model, names):
+    '''Predict the gender of each name and the probability of that gender.
+
+    Parameters:
+    -----------
+    model : dict
+        Model returned by 'load_model'.
+    names : iterable of str
+        Unique, normalized first names.
+
+    Returns:
+    --------
+    predictions : pandas.DataFrame
+        Columns 'name', 'gender' and 'probability' (the probability of the predicted gender).
+
+    Example
+    -------
+    predict_unique_names(model, ['bobby', 'emily'])
+    Output:
+    | name  | gender | probability |
+    |-------|--------|-------------|
+    | bobby | Male   | 0.91        |
+    | emily | Female | 0.97        |
+    '''
+    names = pd.Series(list(names), dtype = object)
+    predicted_labels, max_probabilities = predict_names(model, names)
+    predictions = pd.DataFrame({'name': names, 'gender': predicted_labels, 'probability': max_probabilities})
+    return predictions
+
+
+def model_test_accuracy(model, model_path, nltk_test_data, model_metrics_path=None):
+    '''Find the accuracy of the model on the test set, rounded to 2 decimals.
+
+    The accuracy stored in the model metrics file is used if it belongs to this model.
+    Otherwise the test set is re-scored.
+
+    Parameters:
+    -----------
+    model : dict
+        Model returned by 'load_model'.
+    model_path : str
+        Path the model was loaded from.
+    nltk_test_data : str or list
+        Path to the pickled test set (or the test set itself).
+    model_metrics_path : str, optional
+        Path to the metrics file written when the model was trained.
+
+    Returns:
+    --------
+    accuracy : float
+        Test set accuracy of the model.
+    '''
+    model_metrics = read_model_metrics(model_metrics_path, model_path)
+    if model_metrics and 'test_accuracy' in model_metrics:
+        return round(model_metrics['test_accuracy'],2)
+    # the metrics belong to a different model (or are missing), so re-score the test set
+    if isinstance(nltk_test_data, str):
+        with open(nltk_test_data, "rb") as test_data_file:
+            test_set = pickle.load(test_data_file)
+    else:
+        test_set = nltk_test_data
+    test_predictions, _ = predict_names(model, pd.Series([features['name'] for (features, label) in test_set], dtype = object))
+    correct = [predicted == label for (predicted, (features, label)) in zip(test_predictions, test_set)]
+    return round(sum(correct)/len(correct),2)
+
+
+def predict_genders_using_model(model, model_path, needs_predictions_df, accuracy, cache_path=None):
+    '''Predict the gender of everyone in the data, with a confidence score that accounts for the model's accuracy.
+
+    Each distinct first name is only classified once. If a cache path is given, predictions for
+    names classified by the same model in an earlier run are read from the cache instead.
+
+    Parameters:
+    -----------
+    model : dict
+        Model returned by 'load_model'.
+    model_path : str
+        Path the model was loaded from (identifies the model in the cache).
+    needs_predictions_df : pandas.DataFrame
+        Data that still needs gender predictions, with a 'First_Name' column.
+    accuracy : float
+        Test set accuracy of the model.
+    cache_path : str, optional
+        Path to a SQLite file that stores predictions across runs.
+
+    Returns:
+    --------
+    needs_predictions_df : pandas.DataFrame
+        The data with the columns 'Guessed_Gender' and 'Confidence_Score' (the probability of the
+        predicted gender multiplied by the accuracy).
+    '''
+    ######### find the distinct names in our UBC data that still need a sex assigned ########
+
+    # names are lowercased before features are engineered, so names that only differ in case get the same prediction
+    with profile_phase('normalize_names'):
+        normalized_names = normalize_names(needs_predictions_df['First_Name'])
+        unique_names = normalized_names.unique()
+
+    ################ make predictions and assign accuracy ################
+
+    if cache_path:
+        # reuse the predictions this model made in earlier runs, and only classify new names
+        with profile_phase('read_prediction_cache'):
+            fingerprint = model_fingerprint(model_path)
+            cache = open_prediction_cache(cache_path, fingerprint)
+            cached_predictions = get_cached_predictions(cache, fingerprint, unique_names)
+            new_names = pd.Index(unique_names).difference(cached_predictions['name'], sort = False)
+        with profile_phase('classify'):
+            new_predictions = predict_unique_names(model, new_names)
+        with profile_phase('store_prediction_cache'):
+            store_predictions(cache, fingerprint, new_predictions)
+            cache.close()
+        name_predictions = pd.concat([predictions for predictions in (cached_predictions, new_predictions)
+                                      if len(predictions)] or [new_predictions])
+    else:
+        with profile_phase('classify'):
+            name_predictions = predict_unique_names(model, unique_names)
+
+    # Map the prediction for each distinct name back to every person with that name
+    with profile_phase('map_predictions'):
+        name_predictions = name_predictions.set_index('name')
+        needs_predictions_df['Guessed_Gender'] = normalized_names.map(name_predictions['gender'])
+
+        # For the accuracy column, I am using the predict proba score given by the classifier
+        # multiplied by the accuracy score on the test set
+        # The predict proba score represents the uncertainty of the model between the two sexes
+        needs_predictions_df.loc[:,'Confidence_Score'] = [round(probability*accuracy,2) for probability in normalized_names.map(name_predictions['probability'])]
+
+    return needs_predictions_df
+
 
 @click.command
 @click.option('--model_path',type=str)
@@ -21,51 +204,59 @@ import nltk
 @click.option('--needs_predictions_file_path',type=str)
 @click.option('--nltk_predictions_output_path',type=str)
 @click.option('--accuracy_output_path',type=str)
+@click.option('--cache_path',type=str,default=None)
+@click.option('--model_metrics_path',type=str,default=None)
+@profile_options
 def main(model_path,nltk_test_data,needs_predictions_file_path,nltk_predictions_output_path, 
-         accuracy_output_path):
+         accuracy_output_path, cache_path, model_metrics_path):
+    '''Predict genders for the names that were not found in the babyname corpus.
+
+    Each distinct first name is only classified once. If a cache path is given, predictions for
+    names classified by the same model in an earlier run are read from the cache instead.
+
+    Parameters:
+    -----------
+    model_path : str
+        Path to the model folder (nltk or sklearn backend) or pickled nltk classifier.
+    nltk_test_data : str
+        Path to the pickled test set used to calculate the accuracy of the model
+        (only read if the accuracy is not found in the model metrics file).
+    needs_predictions_file_path : str
+        Path to the data that still needs gender predictions.
+    nltk_predictions_output_path : str
+        Path to save the predictions to.
+    accuracy_output_path : str
+        Path to save the accuracy of the model on the test set to.
+    cache_path : str
+        Optional path to a SQLite file that stores predictions across runs.
+    model_metrics_path : str
+        Optional path to the metrics file written when the model was trained. If it belongs to
+        this model, its test set accuracy is used instead of re-scoring the test set.
+    '''
 
     ################ read in the model and the data ################
 
-    # reading in the classifier
-    with open(model_path, "rb") as model_file:
-        classifier = pickle.load(model_file)
+    # reading in the classifier (a compact model folder or a pickled nltk classifier)
+    with profile_phase('load_model'):
+        model = load_model(model_path)
 
     # reading in the data that needs predictions
-    needs_predictions_df = pd.read_csv(needs_predictions_file_path)
+    with profile_phase('read_data'):
+        needs_predictions_df = pd.read_csv(needs_predictions_file_path)
 
-    # reading in the test data for the model
-    with open(nltk_test_data, "rb") as test_data_file:
-        test_set = pickle.load(test_data_file)
-
-    # calculating the accuracy of the model on the test set
-    accuracy = round(nltk.classify.accuracy(classifier, test_set),2)
+    # reading the accuracy of the model on the test set, stored when the model was trained
+    with profile_phase('test_accuracy'):
+        accuracy = model_test_accuracy(model, model_path, nltk_test_data, model_metrics_path)
     with open(accuracy_output_path, 'w') as file:
         file.write(str(accuracy))
 
-    ######### collect features for each name in our UBC data that still needs a sex assigned ########
-
-    # create a list of tuples with the first item in the tuple being a featureset
-    # and the second item in the tuble being an empty string for the unknown sex 
-    ### ex: [({name: 'bobby', last_3_letters: 'bby'},'')]
-    list_of_features = feature_engineering(needs_predictions_df, 'First_Name', 'Guessed_Gender')
-
-    # Retrieve only the featuresets from the list tuples
-    list_of_features = [i[0] for i in list_of_features]
-
     ################ make predictions and assign accuracy ################
-
-    # Make sex column of type string, then make sex predictions 
-    needs_predictions_df['Guessed_Gender'] = ""
-    needs_predictions_df.loc[:,'Guessed_Gender'] = classifier.classify_many(list_of_features)
-
-    # For the accuracy column, I am using the predict proba score given by the classifier
-    # multiplied by the accuracy score on the test set
-    # The predict proba score represents the uncertainty of the model between the two sexes
-    needs_predictions_df.loc[:,'Confidence_Score'] = [round(max(i.prob('Male'),i.prob('Female'))*accuracy,2) for i in classifier.prob_classify_many(list_of_features)]
+    needs_predictions_df = predict_genders_using_model(model, model_path, needs_predictions_df, accuracy, cache_path)
 
     ################ save the predictions ################
     # saving the nltk predictions
-    needs_predictions_df.to_csv(nltk_predictions_output_path, index = False)
+    with profile_phase('export'):
+        needs_predictions_df.to_csv(nltk_predictions_output_path, index = False)
 
 
 if __name__ == "__main__":
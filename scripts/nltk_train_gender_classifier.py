@@ -5,108 +5,120 @@
 # This script trains a naive bayes natural language processing classifier 
 # to predict someone's gender based off their first name
 # The script then saves the training data, test data, and classifier 
+# (both as a pickle and as a compact model folder that can be loaded without unpickling),
+# and stores the classifier's test set accuracy together with the model's fingerprint
 #
-# Usage: python scripts/nltk_train_gender_classifier.py --name_data_path=data/gender_corpus/clean_name_corpus.csv --model_output_folder=models --data_output_folder=data/gender_predictions
+# With --backend=sklearn, a scikit-learn model on hashed character n-grams is trained instead
+#
+# Usage: python scripts/nltk_train_gender_classifier.py --name_data_path=data/gender_corpus/clean_name_corpus.csv --model_output_folder=models --data_output_folder=data/gender_predictions --backend=nltk
 
 
 import pandas as pd
 import click
-import nltk
 import pickle
+import shutil
+from gender_features import feature_engineering, vectorized_gender_features
+from naive_bayes_engine import (naive_bayes_counts, save_naive_bayes_counts, load_naive_bayes_counts,
+                                compile_naive_bayes, predict_naive_bayes)
+from sklearn_gender_classifier import train_sklearn_gender_classifier, save_sklearn_gender_model, predict_sklearn_gender
+from model_metrics import write_model_metrics
+from stage_profiler import profile_options, profile_phase
 
 
-# Return features of a name to be fed into our model
-def gender_features(word):
-    ''' Engineer features for a given name
-
-    This function takes a word as input and generates a dictionary of features for gender classification. 
-    The features include:
-    - 'last_5_letters': Last 5 letters of the word
-    - 'last_two_letters': Last 2 letters of the word
-    - 'last_letter': Last letter of the word
-    - 'last_3_letters': Last 3 letters of the word
-    - 'last_4_letters': Last 4 letters of the word
-    - 'name': The word itself
+def train_gender_classifier(name_corpus, model_output_folder, prune_min_count=0, backend='nltk',
+                            sklearn_estimator='multinomial_nb'):
+    '''Train a gender classifier on the name corpus and save it, with its test set accuracy, to the model folder.
 
     Parameters:
     -----------
-    word : str
-        Input word for which features are to be engineered.
+    name_corpus : pandas.DataFrame
+        Name corpus with the columns 'First_Name' and 'Sex_at_birth'.
+    model_output_folder : str
+        Path to the folder where the trained model will be saved.
+    prune_min_count : int
+        Feature values seen fewer than this many times are left out of the compact model folder.
+    backend : str
+        'nltk' (naive bayes on suffix features) or 'sklearn' (hashed character n-grams).
+    sklearn_estimator : str
+        Estimator used by the sklearn backend: 'multinomial_nb' or 'logistic_regression'.
 
     Returns:
     --------
-    word_feats : dict
-        A dictionary containing the engineered features of the input word.
-
-    Example
-    -------
-    gender_features('Emily')
-    Output: {'last_5_letters': 'emily', 'last_two_letters': 'ly', 'last_letter': 'y',
-             'last_3_letters': 'ily', 'last_4_letters': 'mily', 'name': 'emily'}
+    train_set : list of tuple
+        Featuresets (features, label) the nltk model was trained on.
+    test_set : list of tuple
+        Featuresets (features, label) the model was scored on.
     '''
+    # shuffle our data
+    name_corpus = name_corpus.sample(frac=1,random_state=123)
 
-    word = word.lower()
-    word_feats = {'last_5_letters': word[-5:], 'last_two_letters': word[-2:],
-            'last_letter': word[-1:], 'last_3_letters': word[-3:], 'last_4_letters': word[-4:], 'name': word}
-
-    return word_feats
-
-
-def feature_engineering(data, name_col, gender_col):
-    '''Perform feature engineering on a dataset
-
-    This function takes a dataset containing names and associated genders and performs feature engineering. 
-    It generates feature sets by applying the 'gender_features' function to each row in the dataset.
-
-    Parameters:
-    -----------
-    data : pandas.DataFrame
-        DataFrame containing the dataset with names and associated genders.
-    name_col : str
-        Name of the column in the DataFrame containing the names.
-    gender_col : str
-        Name of the column in the DataFrame containing the genders.
+    # collect features for each name in our data
+    with profile_phase('feature_engineering'):
+        featuresets = feature_engineering(name_corpus, 'First_Name', 'Sex_at_birth')
 
-    Returns:
-    --------
-    featuresets : list of tuples
-        A list of tuples where each tuple contains a dictionary of engineered features 
-        and the corresponding gender label.
-
-    Example
-    -------
-    data:
-    | name      | gender |
-    |-----------|--------|
-    | Aaradhya  | f      |
-    | Odiya     | f      |
-
-    feature_engineering(data, 'name', 'gender')
-    Output: [({'last_5_letters': 'adhya', 'last_two_letters': 'ya', 'last_letter': 'a',
-               'last_3_letters': 'hya', 'last_4_letters': 'dhya', 'name': 'aaradhya'}, 'f'),
-             ({'last_5_letters': 'odiya', 'last_two_letters': 'ya', 'last_letter': 'a',
-               'last_3_letters': 'iya', 'last_4_letters': 'diya', 'name': 'odiya'}, 'f')]
-    '''
+    # split the shuffled data into train and test sets
+    train_set, test_set = featuresets[3157:], featuresets[:3157]
 
-    # make sure name column is of type string
-    data.loc[:,name_col] = data[name_col].astype(str) 
-    # engineer features for a given name column
-    featuresets = [(gender_features(row[name_col]), row[gender_col]) for (index, row) in data.iterrows()]
-    return featuresets
+    # start from an empty model folder so that files from another backend are not left behind
+    model_folder = f'{model_output_folder}/gender_classifier'
+    shutil.rmtree(model_folder, ignore_errors = True)
+
+    test_names = name_corpus['First_Name'].iloc[:3157]
+    test_labels = name_corpus['Sex_at_birth'].iloc[:3157]
+
+    if backend == 'sklearn':
+        # train on the names themselves, using the same shuffled train/test split as the nltk model
+        train_names = name_corpus['First_Name'].iloc[3157:]
+        train_labels = name_corpus['Sex_at_birth'].iloc[3157:]
+        with profile_phase('train'):
+            model = train_sklearn_gender_classifier(train_names, train_labels, estimator_type = sklearn_estimator)
+        with profile_phase('save_model'):
+            save_sklearn_gender_model(model, model_folder)
+        with profile_phase('score'):
+            test_predictions, _ = predict_sklearn_gender(model, test_names)
+    else:
+        # nltk is only imported to train, since it is slow to import
+        import nltk
+
+        # train our classifier with the train set
+        with profile_phase('train'):
+            classifier = nltk.NaiveBayesClassifier.train(train_set)
+
+        with profile_phase('save_model'):
+            pickle.dump(classifier, open(f'{model_output_folder}/gender_classifier.pickle', 'wb'))
+            save_naive_bayes_counts(naive_bayes_counts(classifier), model_folder, min_count = prune_min_count)
+        # score the saved (possibly pruned) model, since that is the one used for predictions
+        with profile_phase('score'):
+            saved_model = compile_naive_bayes(load_naive_bayes_counts(model_folder))
+            test_predictions, _ = predict_naive_bayes(saved_model, vectorized_gender_features(test_names))
+
+    # store the test set accuracy with the model's fingerprint so the prediction stage does not need to re-score it
+    correct = [predicted == label for (predicted, label) in zip(test_predictions, test_labels)]
+    write_model_metrics(f'{model_output_folder}/gender_classifier_metrics.json', model_folder,
+                        {'test_accuracy': sum(correct)/len(correct), 'test_size': len(correct)})
+
+    return train_set, test_set
 
 
 @click.command
 @click.option('--name_data_path',type=str)
 @click.option('--data_output_folder',type=str)
 @click.option('--model_output_folder',type=str)
-def main(name_data_path,model_output_folder,data_output_folder):
+@click.option('--prune_min_count',type=int,default=0)
+@click.option('--backend',type=click.Choice(['nltk', 'sklearn']),default='nltk')
+@click.option('--sklearn_estimator',type=click.Choice(['multinomial_nb', 'logistic_regression']),default='multinomial_nb')
+@profile_options
+def main(name_data_path,model_output_folder,data_output_folder,prune_min_count,backend,sklearn_estimator):
     '''Train a gender classifier model using baby name data and save the trained model and data.
 
     This function serves as the entry point for training a gender classifier model using baby name data. 
     It reads in the baby name data from the specified path, shuffles the data, 
     engineers features for each name, splits the data into train and test sets, 
     trains a Naive Bayes classifier using the train set, and saves the trained model 
-    and data to the specified output folders.
+    and data to the specified output folders. The model is saved both as a pickled nltk classifier
+    and as a compact model folder (gender_classifier/) of count tables.
+    With the sklearn backend, only the model folder is saved.
+    The model's test set accuracy is saved to gender_classifier_metrics.json.
 
     Parameters:
     -----------
@@ -116,26 +128,26 @@ def main(name_data_path,model_output_folder,data_output_folder):
         Path to the folder where the trained model will be saved.
     data_output_folder : str
         Path to the folder where the training and test data will be saved.
+    prune_min_count : int
+        Feature values seen fewer than this many times are left out of the compact model folder.
+        0 (the default) keeps every value so that predictions match the pickled classifier exactly.
+        Pruned model folders cannot be updated with scripts/update_gender_classifier.py.
+    backend : str
+        'nltk' (naive bayes on suffix features) or 'sklearn' (hashed character n-grams).
+    sklearn_estimator : str
+        Estimator used by the sklearn backend: 'multinomial_nb' or 'logistic_regression'.
     '''
 
     # read in babyname data cleaned in the corpus gender prediction script
-    name_corpus = pd.read_csv(name_data_path)
-
-    # shuffle our data
-    name_corpus = name_corpus.sample(frac=1,random_state=123)
-
-    # collect features for each name in our data
-    featuresets = feature_engineering(name_corpus, 'First_Name', 'Sex_at_birth')
-
-    # split the shuffled data into train and test sets
-    train_set, test_set = featuresets[3157:], featuresets[:3157]
+    with profile_phase('read_name_corpus'):
+        name_corpus = pd.read_csv(name_data_path)
 
-    # train our classifier with the train set
-    classifier = nltk.NaiveBayesClassifier.train(train_set)
+    # train the model and save it (with its test set accuracy) to the model folder
+    train_set, test_set = train_gender_classifier(name_corpus, model_output_folder, prune_min_count, backend, sklearn_estimator)
 
-    pickle.dump(classifier, open(f'{model_output_folder}/gender_classifier.pickle', 'wb'))
-    pickle.dump(train_set, open(f'{data_output_folder}/nltk_training_data.pickle', 'wb'))
-    pickle.dump(test_set, open(f'{data_output_folder}/nltk_test_data.pickle', 'wb'))
+    with profile_phase('export'):
+        pickle.dump(train_set, open(f'{data_output_folder}/nltk_training_data.pickle', 'wb'))
+        pickle.dump(test_set, open(f'{data_output_folder}/nltk_test_data.pickle', 'wb'))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,472 @@
+# author: Jade Bouchard
+# date: 2026-10-19
+#
+# This module runs the analysis (every stage after fetching the salary data) in one process, passing the data
+# from stage to stage as DataFrames instead of writing and re-reading csv files.
+# Each stage calls the same function as its script (ex: 'predict_genders_using_corpus' in
+# scripts/corpus_gender_prediction.py), and the data handed to the next stage is given the column types
+# pandas would infer reading the stage's csv file back, so the results are the same as running the scripts.
+# The csv and pickle files the scripts write are optional exports, and the gender model is still saved
+# to (and loaded from) the model folder.
+# With --profile, each stage is a phase of the profile report (with the phases of the stage's functions inside it).
+# With --partition_by_year, each fiscal year goes through cleaning, the corpus and model predictions, combining and
+# the per-year plots on its own, and only small per-year aggregates (and the previous year's predictions, for the
+# yearly changes) are kept between years, so the peak memory depends on the largest year instead of every year.
+# With --store_path, the clean salary data and predictions are also written to the SQLite salary store.
+#
+# Usage: python scripts/pipeline_api.py \
+# --raw_salary_data_file=data/salary_data/raw_salary_data.pickle \
+# --babyname_data_folder=data/gender_corpus \
+# --gender_overrides_input=data/gender_overrides.csv \
+# --model_output_folder=models \
+# --plot_output_folder=plots \
+# --prediction_output_folder=data/gender_predictions
+
+import os
+import pickle
+import click
+import numpy as np
+import pandas as pd
+from clean_salary_data import clean_all_salary_data, clean_year_salary_data
+from corpus_gender_prediction import build_name_corpus, predict_genders_using_corpus
+from fuzzy_name_matching import build_fuzzy_corpus
+from nltk_train_gender_classifier import train_gender_classifier
+from nltk_make_predictions import load_model, model_test_accuracy, predict_genders_using_model
+from combine_and_clean_predictions import (clean_prediction_frames, combine_and_clean_prediction_frames,
+                                           load_gender_overrides)
+from exploratory_analysis import (LINE_PLOT_CHANGES, aggregate_plot_data, create_all_plots,
+                                  create_line_plots_from_states, create_year_plots, find_changes_over_years,
+                                  find_line_plot_states, merge_line_plot_states, prepare_data_for_plot)
+from render_cache import RENDER_CACHE, configure_render_cache, write_render_manifest
+from salary_aggregates import merge_year_aggregates, save_histogram_cube, write_summary_by_year_and_gender
+from salary_store import (append_store_rows, finish_store_table, open_salary_store, start_store_table,
+                          write_store_table)
+from stage_profiler import profile_options, profile_phase
+
+
+# column types of the data passed between stages, as pandas infers them when reading the stages' csv files
+SALARY_COLUMN_TYPES = {'Last_Name': 'object', 'First_Name': 'object', 'Remuneration': 'int64', 'Expenses': 'float64',
+                       'Year': 'int64'}
+NAME_CORPUS_COLUMN_TYPES = {'index': 'float64', 'Sex_at_birth': 'object', 'First_Name': 'object',
+                            'Confidence_Score': 'float64'}
+PREDICTION_COLUMN_TYPES = {**SALARY_COLUMN_TYPES, 'index': 'float64', 'Guessed_Gender': 'object',
+                           'Confidence_Score': 'float64'}
+
+# babyname data files read from the babyname data folder
+BABYNAME_FILES = {'canadian_names': 'canadian_babyname.csv', 'american_names': 'american_babyname.csv',
+                  'f_indian_names': 'Indian-Female-Names.csv', 'm_indian_names': 'Indian-Male-Names.csv'}
+
+
+def apply_column_types(data, column_types):
+    '''Give in-memory data the column types it would have if it was written to a csv file and read back.
+
+    The row index is reset, integer columns with missing values become float columns,
+    and empty strings in text columns become missing values (like 'pd.read_csv' does).
+
+    Parameters:
+    ----------
+    data : pandas.DataFrame
+        Data passed from one stage to the next.
+    column_types : dict
+        Type of each column ('object', 'int64' or 'float64'). Columns that are not in the data are ignored.
+
+    Returns:
+    -------
+    typed_data : pandas.DataFrame
+        Copy of the data with the column types.
+
+    Example:
+    -------
+    data:
+    | First_Name | Remuneration | Year   |
+    |------------|--------------|--------|
+    | Tor        | 193153       | '2023' |
+    | ''         | 107723       | '2023' |
+
+    apply_column_types(data, SALARY_COLUMN_TYPES)
+    Output (Remuneration and Year are int64):
+    | First_Name | Remuneration | Year |
+    |------------|--------------|------|
+    | Tor        | 193153       | 2023 |
+    | NaN        | 107723       | 2023 |
+    '''
+    typed_data = data.reset_index(drop = True)
+    for column, column_type in column_types.items():
+        if column not in typed_data.columns:
+            continue
+        values = typed_data[column]
+        if column_type == 'object':
+            values = values.astype(object)
+            typed_data[column] = values.where(values.notna() & (values != ''), np.nan)
+        else:
+            values = pd.to_numeric(values)
+            if column_type == 'int64' and not values.isna().any():
+                typed_data[column] = values.astype('int64')
+            else:
+                typed_data[column] = values.astype('float64')
+    return typed_data
+
+
+def export_csv(data, folder, file_name, append=False):
+    '''Save data to folder/file_name as a csv file (or add its rows to the end of the file, with append=True),
+    unless folder is None.'''
+    if folder is not None:
+        data.to_csv(f'{folder}/{file_name}', index = False, mode = 'a' if append else 'w', header = not append)
+
+
+def export_pickle(value, folder, file_name):
+    '''Pickle a value to folder/file_name, unless folder is None.'''
+    if folder is not None:
+        with open(f'{folder}/{file_name}', 'wb') as file:
+            pickle.dump(value, file)
+
+
+def run_pipeline_in_process(raw_salary_text_data, babyname_data, overrides, model_output_folder, plot_output_folder=None,
+                            fuzzy_max_distance=1, backend='nltk', prediction_cache_path=None, plot_jobs=1,
+                            plot_cache_folder=None, clean_salary_data_output_folder=None,
+                            clean_babyname_corpus_output_folder=None, prediction_output_folder=None, store_path=None):
+    '''Run every stage of the analysis after fetching the salary data, passing the data between stages in memory.
+
+    Parameters:
+    ----------
+    raw_salary_text_data : dict
+        Raw salary text of every year (the dictionary saved by scripts/fetch_salary_data.py).
+    babyname_data : dict
+        Raw babyname DataFrames with the keys of BABYNAME_FILES.
+    overrides : pandas.DataFrame
+        Manual gender corrections, loaded by 'load_gender_overrides'.
+    model_output_folder : str
+        Folder to save the gender model in.
+    plot_output_folder : str, optional
+        Folder to save the plots in (with the bar_plots, box_plots, histogram_plots and line_plots folders).
+        The plots are not made if it is None.
+    fuzzy_max_distance : int
+        Names with no exact corpus match are matched to corpus names within this many edits (0 turns this off).
+    backend : str
+        Gender classifier backend, 'nltk' or 'sklearn'.
+    prediction_cache_path : str, optional
+        Path to the SQLite file that stores the model's predictions across runs.
+    plot_jobs : int
+        Number of worker processes used to render plots.
+    plot_cache_folder : str, optional
+        Folder of the render cache.
+    clean_salary_data_output_folder : str, optional
+        Folder to export the clean salary data to (as the clean_salary_data.py script does).
+    clean_babyname_corpus_output_folder : str, optional
+        Folder to export the clean name corpus to.
+    prediction_output_folder : str, optional
+        Folder to export the prediction files, the model's accuracy and the nltk train and test sets to.
+    store_path : str, optional
+        Path to the SQLite salary store to write the clean salary data and the clean predictions to
+        (see scripts/salary_store.py).
+
+    Returns:
+    -------
+    results : dict
+        Dictionary of the data made by each stage, with the keys 'salary_data', 'name_corpus', 'corpus_predictions',
+        'needs_predictions', 'nltk_predictions', 'accuracy' and 'predictions' (the combined, clean predictions).
+    '''
+    # clean the salary data
+    with profile_phase('clean_salary_data'):
+        yearly_salary_data, salary_data = clean_all_salary_data(raw_salary_text_data)
+        if clean_salary_data_output_folder is not None:
+            for year, salaries in yearly_salary_data.items():
+                export_csv(salaries, clean_salary_data_output_folder, f'FY{year}_clean_salary_data.csv')
+        export_csv(salary_data, clean_salary_data_output_folder, 'all_clean_salary_data.csv')
+        salary_data = apply_column_types(salary_data, SALARY_COLUMN_TYPES)
+        if store_path is not None:
+            write_store_table(store_path, 'salaries', salary_data)
+
+    # build the name corpus and make predictions with it
+    with profile_phase('build_name_corpus'):
+        name_corpus = build_name_corpus(**babyname_data)
+        export_csv(name_corpus, clean_babyname_corpus_output_folder, 'clean_name_corpus.csv')
+        name_corpus = apply_column_types(name_corpus, NAME_CORPUS_COLUMN_TYPES)
+
+    with profile_phase('corpus_gender_prediction'):
+        corpus_predictions, needs_predictions = predict_genders_using_corpus(salary_data, name_corpus, fuzzy_max_distance)
+        export_csv(corpus_predictions, prediction_output_folder, 'corpus_gender_predictions.csv')
+        export_csv(needs_predictions, prediction_output_folder, 'needs_gender_predictions.csv')
+        corpus_predictions = apply_column_types(corpus_predictions, PREDICTION_COLUMN_TYPES)
+        needs_predictions = apply_column_types(needs_predictions, PREDICTION_COLUMN_TYPES)
+
+    # train the gender model and predict the genders of the remaining names
+    with profile_phase('nltk_train_gender_classifier'):
+        train_set, test_set = train_gender_classifier(name_corpus, model_output_folder, backend = backend)
+        export_pickle(train_set, prediction_output_folder, 'nltk_training_data.pickle')
+        export_pickle(test_set, prediction_output_folder, 'nltk_test_data.pickle')
+
+    with profile_phase('nltk_make_predictions'):
+        model_path = f'{model_output_folder}/gender_classifier'
+        model = load_model(model_path)
+        accuracy = model_test_accuracy(model, model_path, test_set, f'{model_output_folder}/gender_classifier_metrics.json')
+        if prediction_output_folder is not None:
+            with open(f'{prediction_output_folder}/accuracy.txt', 'w') as file:
+                file.write(str(accuracy))
+
+        nltk_predictions = predict_genders_using_model(model, model_path, needs_predictions.copy(), accuracy,
+                                                       prediction_cache_path)
+        export_csv(nltk_predictions, prediction_output_folder, 'nltk_gender_predictions.csv')
+        nltk_predictions = apply_column_types(nltk_predictions, PREDICTION_COLUMN_TYPES)
+
+    # combine and clean the predictions
+    with profile_phase('combine_and_clean_predictions'):
+        predictions = combine_and_clean_prediction_frames([corpus_predictions, nltk_predictions], overrides)
+        export_csv(predictions, prediction_output_folder, 'all_clean_gender_predictions.csv')
+        predictions = apply_column_types(predictions, PREDICTION_COLUMN_TYPES)
+        if store_path is not None:
+            write_store_table(store_path, 'predictions', predictions)
+
+    # make the plots
+    if plot_output_folder is not None:
+        with profile_phase('exploratory_analysis'):
+            create_all_plots(predictions, plot_output_folder, plot_jobs, plot_cache_folder)
+
+    return {'salary_data': salary_data, 'name_corpus': name_corpus, 'corpus_predictions': corpus_predictions,
+            'needs_predictions': needs_predictions, 'nltk_predictions': nltk_predictions, 'accuracy': accuracy,
+            'predictions': predictions}
+
+
+def run_pipeline_by_year(raw_salary_text_data, babyname_data, overrides, model_output_folder, plot_output_folder=None,
+                         fuzzy_max_distance=1, backend='nltk', prediction_cache_path=None, plot_cache_folder=None,
+                         clean_salary_data_output_folder=None, clean_babyname_corpus_output_folder=None,
+                         prediction_output_folder=None, store_path=None):
+    '''Run every stage of the analysis after fetching the salary data one fiscal year at a time.
+
+    The name corpus and gender model do not depend on the salary data, so they are made first. Then each year
+    (from the earliest to the most recent) is cleaned, given corpus and model predictions, combined and cleaned,
+    summarized and plotted on its own. Between years, only the per-year aggregates of the plots, the quantile
+    states of the line plots and the previous year's predictions (to find the changes between consecutive years)
+    are kept, so the peak memory depends on the largest year instead of every year.
+
+    The plots, summary statistics and histogram cube are the same as 'run_pipeline_in_process' makes, except that
+    the years of the histogram cube are in order. The exported files have the same rows, grouped by year
+    (so the corpus and model predictions of each year are next to each other in all_clean_gender_predictions.csv).
+    The plots are rendered in this process.
+
+    Parameters:
+    ----------
+    raw_salary_text_data : dict
+        Raw salary text of every year (the dictionary saved by scripts/fetch_salary_data.py).
+    babyname_data : dict
+        Raw babyname DataFrames with the keys of BABYNAME_FILES.
+    overrides : pandas.DataFrame
+        Manual gender corrections, loaded by 'load_gender_overrides'. Every override must match someone in some year.
+    model_output_folder : str
+        Folder to save the gender model in.
+    plot_output_folder : str, optional
+        Folder to save the plots in (with the bar_plots, box_plots, histogram_plots and line_plots folders).
+        The plots are not made if it is None.
+    fuzzy_max_distance : int
+        Names with no exact corpus match are matched to corpus names within this many edits (0 turns this off).
+    backend : str
+        Gender classifier backend, 'nltk' or 'sklearn'.
+    prediction_cache_path : str, optional
+        Path to the SQLite file that stores the model's predictions across runs.
+    plot_cache_folder : str, optional
+        Folder of the render cache.
+    clean_salary_data_output_folder : str, optional
+        Folder to export the clean salary data to.
+    clean_babyname_corpus_output_folder : str, optional
+        Folder to export the clean name corpus to.
+    prediction_output_folder : str, optional
+        Folder to export the prediction files, the model's accuracy and the nltk train and test sets to.
+    store_path : str, optional
+        Path to the SQLite salary store to write the clean salary data and the clean predictions to, year by year
+        (see scripts/salary_store.py). Its tables are only replaced once every year is written.
+
+    Returns:
+    -------
+    results : dict
+        Dictionary with the keys 'name_corpus', 'accuracy', 'year_sizes' ({year: number of people}),
+        'aggregates' (the per-year statistics of the plots, from 'merge_year_aggregates') and
+        'line_plot_states' (from 'merge_line_plot_states').
+    '''
+    # build the name corpus and train the gender model, which every year uses
+    with profile_phase('build_name_corpus'):
+        name_corpus = build_name_corpus(**babyname_data)
+        export_csv(name_corpus, clean_babyname_corpus_output_folder, 'clean_name_corpus.csv')
+        name_corpus = apply_column_types(name_corpus, NAME_CORPUS_COLUMN_TYPES)
+        fuzzy_corpus = build_fuzzy_corpus(name_corpus, fuzzy_max_distance) if fuzzy_max_distance > 0 else None
+
+    with profile_phase('nltk_train_gender_classifier'):
+        train_set, test_set = train_gender_classifier(name_corpus, model_output_folder, backend = backend)
+        export_pickle(train_set, prediction_output_folder, 'nltk_training_data.pickle')
+        export_pickle(test_set, prediction_output_folder, 'nltk_test_data.pickle')
+
+    with profile_phase('nltk_make_predictions'):
+        model_path = f'{model_output_folder}/gender_classifier'
+        model = load_model(model_path)
+        accuracy = model_test_accuracy(model, model_path, test_set, f'{model_output_folder}/gender_classifier_metrics.json')
+        if prediction_output_folder is not None:
+            with open(f'{prediction_output_folder}/accuracy.txt', 'w') as file:
+                file.write(str(accuracy))
+    del train_set, test_set
+
+    if plot_output_folder is not None:
+        configure_render_cache(plot_cache_folder)
+    store = open_salary_store(store_path) if store_path is not None else None
+    if store is not None:
+        start_store_table(store, 'salaries')
+        start_store_table(store, 'predictions')
+    matched = np.zeros(len(overrides), dtype = bool)
+    year_sizes, year_aggregates, line_plot_states = {}, [], []
+    previous_predictions = None
+    for year_number, year in enumerate(sorted(raw_salary_text_data, key = int)):
+        # the combined files get their header from the first year
+        append = year_number > 0
+
+        with profile_phase('clean_salary_data'):
+            salary_data = clean_year_salary_data(year, raw_salary_text_data[year])
+            export_csv(salary_data, clean_salary_data_output_folder, f'FY{year}_clean_salary_data.csv')
+            export_csv(salary_data, clean_salary_data_output_folder, 'all_clean_salary_data.csv', append)
+            salary_data = apply_column_types(salary_data, SALARY_COLUMN_TYPES)
+            year_sizes[int(year)] = len(salary_data)
+            if store is not None:
+                append_store_rows(store, 'salaries', salary_data)
+
+        with profile_phase('corpus_gender_prediction'):
+            corpus_predictions, needs_predictions = predict_genders_using_corpus(salary_data, name_corpus,
+                                                                                 fuzzy_max_distance, fuzzy_corpus)
+            export_csv(corpus_predictions, prediction_output_folder, 'corpus_gender_predictions.csv', append)
+            export_csv(needs_predictions, prediction_output_folder, 'needs_gender_predictions.csv', append)
+            corpus_predictions = apply_column_types(corpus_predictions, PREDICTION_COLUMN_TYPES)
+            needs_predictions = apply_column_types(needs_predictions, PREDICTION_COLUMN_TYPES)
+        del salary_data
+
+        with profile_phase('nltk_make_predictions'):
+            nltk_predictions = predict_genders_using_model(model, model_path, needs_predictions, accuracy,
+                                                           prediction_cache_path)
+            export_csv(nltk_predictions, prediction_output_folder, 'nltk_gender_predictions.csv', append)
+            nltk_predictions = apply_column_types(nltk_predictions, PREDICTION_COLUMN_TYPES)
+
+        # overrides only have to match someone in one of the years
+        with profile_phase('combine_and_clean_predictions'):
+            predictions, year_matched = clean_prediction_frames([corpus_predictions, nltk_predictions], overrides)
+            matched |= year_matched
+            export_csv(predictions, prediction_output_folder, 'all_clean_gender_predictions.csv', append)
+            predictions = apply_column_types(predictions, PREDICTION_COLUMN_TYPES)
+            if store is not None:
+                append_store_rows(store, 'predictions', predictions)
+        del corpus_predictions, needs_predictions, nltk_predictions
+
+        # summarize the year for the plots, and find the changes from the year before
+        with profile_phase('aggregate'):
+            plot_data = prepare_data_for_plot(predictions, None, 'Remuneration', 'First_Name', "Last_Name", "Name")
+            aggregates = aggregate_plot_data(plot_data)
+            year_aggregates.append(aggregates)
+            change_data = find_changes_over_years(pd.concat([previous_predictions, predictions], ignore_index = True)
+                                                  if previous_predictions is not None else predictions, LINE_PLOT_CHANGES)
+            line_plot_states.append(find_line_plot_states(predictions, change_data))
+
+        if plot_output_folder is not None:
+            with profile_phase('year_plots'):
+                create_year_plots(plot_data, aggregates, plot_output_folder)
+
+        previous_predictions = predictions[['First_Name', 'Last_Name', 'Guessed_Gender', 'Year', *LINE_PLOT_CHANGES]]
+        del plot_data, change_data, predictions
+
+    if not matched.all():
+        raise ValueError(f"these gender overrides did not match anyone:\n{overrides[~matched]}")
+    if store is not None:
+        finish_store_table(store, 'salaries')
+        finish_store_table(store, 'predictions')
+        store.close()
+
+    # merge the per-year summaries, and make the plots of every year
+    aggregates = merge_year_aggregates(year_aggregates)
+    line_plot_states = merge_line_plot_states(line_plot_states)
+    if plot_output_folder is not None:
+        with profile_phase('export'):
+            write_summary_by_year_and_gender(aggregates, f'{plot_output_folder}/summary_by_year_and_gender.csv')
+            save_histogram_cube(aggregates['histograms'], f'{plot_output_folder}/histogram_cube.npz')
+        with profile_phase('line_plots'):
+            create_line_plots_from_states(line_plot_states, min(year_sizes), max(year_sizes), plot_output_folder)
+        write_render_manifest(f'{plot_output_folder}/render_manifest.json', RENDER_CACHE['log'])
+
+    return {'name_corpus': name_corpus, 'accuracy': accuracy, 'year_sizes': year_sizes, 'aggregates': aggregates,
+            'line_plot_states': line_plot_states}
+
+
+@click.command
+@click.option('--raw_salary_data_file', type=str)
+@click.option('--babyname_data_folder', type=str, default='data/gender_corpus')
+@click.option('--gender_overrides_input', type=str, default='data/gender_overrides.csv')
+@click.option('--model_output_folder', type=str, default='models')
+@click.option('--plot_output_folder', type=str, default=None)
+@click.option('--fuzzy_max_distance', type=int, default=1)
+@click.option('--backend', type=click.Choice(['nltk', 'sklearn']), default='nltk')
+@click.option('--cache_path', type=str, default=None)
+@click.option('--plot_jobs', type=int, default=1)
+@click.option('--plot_cache_folder', type=str, default=None)
+@click.option('--clean_salary_data_output_folder', type=str, default=None)
+@click.option('--clean_babyname_corpus_output_folder', type=str, default=None)
+@click.option('--prediction_output_folder', type=str, default=None)
+@click.option('--partition_by_year', is_flag=True, default=False)
+@click.option('--store_path', type=str, default=None)
+@profile_options
+def main(raw_salary_data_file, babyname_data_folder, gender_overrides_input, model_output_folder, plot_output_folder,
+         fuzzy_max_distance, backend, cache_path, plot_jobs, plot_cache_folder, clean_salary_data_output_folder,
+         clean_babyname_corpus_output_folder, prediction_output_folder, partition_by_year, store_path):
+    '''Run the analysis from the raw salary data to the plots in one process.
+
+    Parameters:
+    -----------
+    raw_salary_data_file : str
+        Path to the raw salary dictionary saved by scripts/fetch_salary_data.py.
+    babyname_data_folder : str
+        Folder with the babyname data files (see BABYNAME_FILES).
+    gender_overrides_input : str
+        Path to the csv file of manual gender corrections.
+    model_output_folder : str
+        Folder to save the gender model in.
+    plot_output_folder : str
+        Folder to save the plots in. The plots are not made if it is not given.
+    fuzzy_max_distance : int
+        Names with no exact corpus match are matched to corpus names within this many edits (0 turns this off).
+    backend : str
+        Gender classifier backend (nltk or sklearn).
+    cache_path : str
+        Optional path to a SQLite file that stores the model's predictions across runs.
+    plot_jobs : int
+        Number of worker processes used to render plots.
+    plot_cache_folder : str
+        Optional folder of the render cache.
+    clean_salary_data_output_folder : str
+        Optional folder to export the clean salary data to.
+    clean_babyname_corpus_output_folder : str
+        Optional folder to export the clean name corpus to.
+    prediction_output_folder : str
+        Optional folder to export the prediction files (and the model's accuracy and train and test sets) to.
+    partition_by_year : bool
+        Run the analysis one fiscal year at a time (see 'run_pipeline_by_year'), so that the peak memory depends on
+        the largest year instead of every year. The plots are then rendered in this process (plot_jobs is not used).
+    store_path : str
+        Optional path to the SQLite salary store to write the clean salary data and predictions to.
+    '''
+    with open(raw_salary_data_file, 'rb') as raw_salary_dict:
+        raw_salary_text_data = pickle.load(raw_salary_dict)
+    babyname_data = {name: pd.read_csv(f'{babyname_data_folder}/{file_name}') for name, file_name in BABYNAME_FILES.items()}
+    overrides = load_gender_overrides(gender_overrides_input)
+
+    for folder in [model_output_folder, clean_salary_data_output_folder, clean_babyname_corpus_output_folder,
+                   prediction_output_folder]:
+        if folder is not None:
+            os.makedirs(folder, exist_ok = True)
+    if plot_output_folder is not None:
+        for plot_folder in ['bar_plots', 'box_plots', 'histogram_plots', 'line_plots']:
+            os.makedirs(f'{plot_output_folder}/{plot_folder}', exist_ok = True)
+
+    if partition_by_year:
+        run_pipeline_by_year(raw_salary_text_data, babyname_data, overrides, model_output_folder, plot_output_folder,
+                             fuzzy_max_distance, backend, cache_path, plot_cache_folder, clean_salary_data_output_folder,
+                             clean_babyname_corpus_output_folder, prediction_output_folder, store_path)
+        return
+    run_pipeline_in_process(raw_salary_text_data, babyname_data, overrides, model_output_folder, plot_output_folder,
+                            fuzzy_max_distance, backend, cache_path, plot_jobs, plot_cache_folder,
+                            clean_salary_data_output_folder, clean_babyname_corpus_output_folder,
+                            prediction_output_folder, store_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# author: Jade Bouchard
+# date: 2026-10-19
+#
+# This module stores gender predictions for first names in a local SQLite file, so that names that
+# were already classified in a previous run do not need to be classified again.
+# Predictions are keyed by (model fingerprint, normalized first name). The fingerprint is a hash of the
+# model file(s), so cached predictions from an older model are deleted automatically when the model changes.
+#
+# Used by: scripts/nltk_make_predictions.py
+
+
+import hashlib
+import os
+import sqlite3
+import pandas as pd
+
+
+def model_fingerprint(model_path):
+    '''Compute a fingerprint (SHA-256 hash) of a model file or of every file in a model folder.
+
+    Parameters:
+    ----------
+    model_path : str
+        Path to a model file or model folder.
+
+    Returns:
+    -------
+    fingerprint : str
+        Hexadecimal hash that changes whenever the content of the model changes.
+    '''
+    if os.path.isdir(model_path):
+        file_names = sorted(os.listdir(model_path))
+        file_paths = [os.path.join(model_path, file_name) for file_name in file_names]
+    else:
+        file_names, file_paths = [os.path.basename(model_path)], [model_path]
+
+    fingerprint = hashlib.sha256()
+    for file_name, file_path in zip(file_names, file_paths):
+        fingerprint.update(file_name.encode())
+        with open(file_path, 'rb') as model_file:
+            for block in iter(lambda: model_file.read(1 << 20), b''):
+                fingerprint.update(block)
+    return fingerprint.hexdigest()
+
+
+def normalize_names(names):
+    '''Normalize first names the same way the gender features do, so that names with the
+    same normalized form always get the same prediction.
+
+    Parameters:
+    ----------
+    names : pandas.Series
+        Series of first names.
+
+    Returns:
+    -------
+    normalized_names : pandas.Series
+        Lowercased names as strings.
+
+    Example:
+    -------
+    >>> normalize_names(pd.Series(["Emily", "EMILY", "emily"])).tolist()
+    >>> ['emily', 'emily', 'emily']
+    '''
+    return names.astype(str).str.lower()
+
+
+def open_prediction_cache(cache_path, fingerprint):
+    '''Open (or create) the prediction cache and remove predictions made by any other model.
+
+    Parameters:
+    ----------
+    cache_path : str
+        Path to the SQLite cache file. Its folder is created if it does not exist.
+    fingerprint : str
+        Fingerprint of the model that is currently being used.
+
+    Returns:
+    -------
+    connection : sqlite3.Connection
+        Connection to the cache.
+    '''
+    cache_folder = os.path.dirname(cache_path)
+    if cache_folder:
+        os.makedirs(cache_folder, exist_ok = True)
+    connection = sqlite3.connect(cache_path)
+    connection.execute('''CREATE TABLE IF NOT EXISTS predictions (
+                              model_fingerprint TEXT NOT NULL,
+                              name TEXT NOT NULL,
+                              gender TEXT NOT NULL,
+                              probability REAL NOT NULL,
+                              PRIMARY KEY (model_fingerprint, name))''')
+    # invalidate predictions made by a model that has since changed
+    connection.execute('DELETE FROM predictions WHERE model_fingerprint != ?', (fingerprint,))
+    connection.commit()
+    return connection
+
+
+def get_cached_predictions(connection, fingerprint, names):
+    '''Look up cached predictions for normalized names.
+
+    Parameters:
+    ----------
+    connection : sqlite3.Connection
+        Connection returned by 'open_prediction_cache'.
+    fingerprint : str
+        Fingerprint of the current model.
+    names : iterable of str
+        Normalized names to look up.
+
+    Returns:
+    -------
+    cached : pandas.DataFrame
+        Columns 'name', 'gender' and 'probability' for the names that were found in the cache.
+    '''
+    connection.execute('CREATE TEMP TABLE IF NOT EXISTS lookup_names (name TEXT PRIMARY KEY)')
+    connection.execute('DELETE FROM lookup_names')
+    connection.executemany('INSERT OR IGNORE INTO lookup_names VALUES (?)', ((name,) for name in names))
+    cached = pd.read_sql_query('''SELECT p.name, p.gender, p.probability
+                                  FROM predictions AS p JOIN lookup_names AS l ON p.name = l.name
+                                  WHERE p.model_fingerprint = ?''', connection, params = (fingerprint,))
+    return cached
+
+
+def store_predictions(connection, fingerprint, predictions):
+    '''Add new predictions to the cache.
+
+    Parameters:
+    ----------
+    connection : sqlite3.Connection
+        Connection returned by 'open_prediction_cache'.
+    fingerprint : str
+        Fingerprint of the model that made the predictions.
+    predictions : pandas.DataFrame
+        Columns 'name', 'gender' and 'probability'.
+    '''
+    rows = ((fingerprint, name, gender, float(probability)) for name, gender, probability
+            in predictions[['name', 'gender', 'probability']].itertuples(index = False))
+    connection.executemany('INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?)', rows)
+    connection.commit()
@@ -0,0 +1,194 @@
+# author: Jade Bouchard
+# date: 2026-10-19
+#
+# This module caches rendered plot images, so that figures whose inputs did not change are copied from the
+# cache instead of being drawn again (ex: plots of past fiscal years when only the newest year changed).
+# The cache key of a figure is a hash of the data (DataFrames and arrays) passed to the plotting function, its other parameters,
+# the source code of the plotting function (and of the helper functions and modules it uses to shape the figure), the installed matplotlib and seaborn versions and the matplotlib
+# style settings in effect.
+# Every call is logged (hit, miss or rendered without a cache, and how long it took) so that a manifest
+# can be written at the end of a run.
+# matplotlib is only imported when a plot is made, so importing this module does not load it.
+#
+# Used by: scripts/exploratory_analysis.py
+
+
+import functools
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import time
+import numpy as np
+import pandas as pd
+
+
+# the cache folder (None turns caching off) and the calls logged since the log was last cleared
+RENDER_CACHE = {'folder': None, 'log': []}
+
+# parameters that only decide where a figure is saved, not what it looks like
+OUTPUT_PARAMETERS = {'plot_output_folder'}
+
+# style settings that do not change how a saved figure looks
+IGNORED_RC_PARAMETERS = {'backend', 'backend_fallback', 'interactive'}
+
+
+def configure_render_cache(cache_folder):
+    '''Turn the render cache on (with the given folder) or off (with None), and clear the call log.
+
+    Parameters:
+    ----------
+    cache_folder : str or None
+        Folder to keep cached images in. It is created if it does not exist.
+    '''
+    if cache_folder:
+        os.makedirs(cache_folder, exist_ok = True)
+    RENDER_CACHE['folder'] = cache_folder
+    RENDER_CACHE['log'] = []
+
+
+def hash_plot_inputs(function_name, code_version, arguments, hash_index):
+    '''Compute the cache key of a figure from everything that decides what it looks like.
+
+    Parameters:
+    ----------
+    function_name : str
+        Name of the plotting function.
+    code_version : str
+        Hash of the source code of the plotting function and its code dependencies.
+    arguments : dict
+        Arguments of the call, by parameter name.
+    hash_index : bool
+        Whether the row index of DataFrame arguments is used by the plot (and so is part of the key).
+
+    Returns:
+    -------
+    key : str
+        Hexadecimal SHA-256 hash.
+    '''
+    import matplotlib
+    import seaborn
+
+    key = hashlib.sha256()
+    key.update(f'{function_name}\n{code_version}\n'.encode())
+    # a new version of the plotting libraries can draw the same figure differently
+    key.update(f'matplotlib {matplotlib.__version__}\nseaborn {seaborn.__version__}\n'.encode())
+    for name, value in arguments.items():
+        if name in OUTPUT_PARAMETERS:
+            continue
+        key.update(f'{name}='.encode())
+        if isinstance(value, pd.DataFrame):
+            key.update(repr(list(zip(value.columns, value.dtypes.astype(str)))).encode())
+            key.update(pd.util.hash_pandas_object(value, index = hash_index).to_numpy().tobytes())
+        elif isinstance(value, np.ndarray):
+            # the repr of an array is rounded and shortened, so hash its bytes
+            key.update(repr((value.dtype.str, value.shape)).encode())
+            key.update(np.ascontiguousarray(value).tobytes())
+        else:
+            key.update(repr(value).encode())
+        key.update(b'\n')
+    key.update(repr(sorted((name, repr(value)) for name, value in matplotlib.rcParams.items()
+                           if name not in IGNORED_RC_PARAMETERS)).encode())
+    return key.hexdigest()
+
+
+def render_cache(output_path, hash_index=False, code_dependencies=()):
+    '''Decorator that caches the image saved by a plotting function.
+
+    On a cache hit the cached image is copied to the output path and the plotting function is not called.
+    On a miss the plotting function is called and the image it saved is added to the cache, together with
+    the matplotlib style settings it changed (which are applied again on later hits).
+
+    Parameters:
+    ----------
+    output_path : callable
+        Function that takes the call's arguments (a dictionary by parameter name) and returns the path of the
+        image the plotting function saves.
+    hash_index : bool
+        Whether the plotting function uses the row index of its DataFrame arguments.
+    code_dependencies : list of functions or modules
+        Code outside the plotting function that shapes its figure (ex: a function that builds a template figure).
+        Their source code is part of the cache key, so editing them renders the figures again.
+
+    Returns:
+    -------
+    decorator : callable
+        Decorator for a plotting function.
+
+    Example
+    -------
+    @render_cache(lambda arguments: f"{arguments['plot_output_folder']}/bar_plots/top_ten_{arguments['file_name']}.png")
+    def create_top_ten_bar_plot(data, ..., file_name, ..., plot_output_folder):
+        ...
+    '''
+    def decorator(plot_function):
+        signature = inspect.signature(plot_function)
+        code_version = hashlib.sha256()
+        for code in [plot_function, *code_dependencies]:
+            code_version.update(inspect.getsource(code).encode())
+        code_version = code_version.hexdigest()
+
+        @functools.wraps(plot_function)
+        def cached_plot_function(*args, **kwargs):
+            start = time.perf_counter()
+            bound_arguments = signature.bind(*args, **kwargs)
+            bound_arguments.apply_defaults()
+            arguments = bound_arguments.arguments
+            image_path = output_path(arguments)
+
+            import matplotlib
+
+            cache_folder = RENDER_CACHE['folder']
+            if cache_folder is None:
+                plot_function(*args, **kwargs)
+                key, status = None, 'rendered'
+            else:
+                key = hash_plot_inputs(plot_function.__name__, code_version, arguments, hash_index)
+                cached_image = f'{cache_folder}/{key}.png'
+                cached_rc_changes = f'{cache_folder}/{key}.json'
+                if os.path.exists(cached_image) and os.path.exists(cached_rc_changes):
+                    shutil.copyfile(cached_image, image_path)
+                    # replay the style changes the plotting function made, since later plots depend on them
+                    with open(cached_rc_changes) as rc_changes_file:
+                        matplotlib.rcParams.update(json.load(rc_changes_file))
+                    status = 'hit'
+                else:
+                    rc_before = dict(matplotlib.rcParams)
+                    plot_function(*args, **kwargs)
+                    rc_changes = {name: value for name, value in matplotlib.rcParams.items()
+                                  if name not in IGNORED_RC_PARAMETERS and rc_before.get(name) != value}
+                    # write then rename, so that other processes never see a partly written cache entry
+                    temporary_suffix = f'{os.getpid()}.tmp'
+                    with open(f'{cached_rc_changes}.{temporary_suffix}', 'w') as rc_changes_file:
+                        json.dump(rc_changes, rc_changes_file)
+                    shutil.copyfile(image_path, f'{cached_image}.{temporary_suffix}')
+                    os.replace(f'{cached_rc_changes}.{temporary_suffix}', cached_rc_changes)
+                    os.replace(f'{cached_image}.{temporary_suffix}', cached_image)
+                    status = 'miss'
+
+            RENDER_CACHE['log'].append({'plot': image_path, 'function': plot_function.__name__, 'key': key,
+                                        'status': status, 'seconds': round(time.perf_counter() - start, 4)})
+
+        return cached_plot_function
+    return decorator
+
+
+def write_render_manifest(manifest_path, log):
+    '''Write the render log of a run, with hit/miss counts and total time, to a JSON manifest.
+
+    Parameters:
+    ----------
+    manifest_path : str
+        Path to the manifest file.
+    log : list of dict
+        Logged calls (RENDER_CACHE['log'], possibly gathered from several processes).
+    '''
+    statuses = [entry['status'] for entry in log]
+    manifest = {'hits': statuses.count('hit'),
+                'misses': statuses.count('miss'),
+                'rendered_without_cache': statuses.count('rendered'),
+                'total_seconds': round(sum(entry['seconds'] for entry in log), 4),
+                'plots': sorted(log, key = lambda entry: entry['plot'])}
+    with open(manifest_path, 'w') as manifest_file:
+        json.dump(manifest, manifest_file, indent = 2)
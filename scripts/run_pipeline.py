@@ -0,0 +1,500 @@
+# author: Jade Bouchard
+# date: 2026-10-19
+#
+# This script runs the analysis pipeline (the scripts also run by the Makefile) as a graph of stages.
+# Each stage declares the files it reads and writes. A stage is skipped when the content of its inputs,
+# its command and its code (the script and the scripts it imports) are the same as when its outputs were made,
+# so touching a file without changing it does not rebuild anything. Stages that do not depend on each other
+# (ex: fetching the salary data and building the babyname corpus) run at the same time.
+# Every run is appended to a run log, with the status (ran, cached, failed or not run) and wall time of each stage.
+# With --profile_folder, every stage that runs writes a profile report (see scripts/stage_profiler.py) to the folder,
+# and the reports of the run are combined into summary.json.
+#
+# Usage: python scripts/run_pipeline.py --jobs=4
+# Usage: python scripts/run_pipeline.py --target=nltk_train_gender_classifier --dry_run
+# Usage: python scripts/run_pipeline.py --skip=fetch_salary_data --force=exploratory_analysis
+# Usage: python scripts/run_pipeline.py --skip=fetch_salary_data --force=all --profile_folder=cache/profiles
+
+
+import datetime
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import click
+from stage_profiler import write_profile_summary
+
+
+PREDICTIONS = 'data/gender_predictions'
+
+# the pipeline's stages: the files each reads and writes, the folders it needs, and the command that runs it
+# ('execution_arguments' only change how a stage runs, not its outputs, so they are left out of its cache key)
+STAGES = [
+    {'name': 'fetch_salary_data',
+     'script': 'scripts/fetch_salary_data.py',
+     'inputs': [],
+     'outputs': ['data/salary_data/raw_salary_data.pickle'],
+     'folders': ['data/salary_data'],
+     'arguments': ['--raw_salary_data_file=data/salary_data/raw_salary_data.pickle']},
+    {'name': 'clean_salary_data',
+     'script': 'scripts/clean_salary_data.py',
+     'inputs': ['data/salary_data/raw_salary_data.pickle'],
+     'outputs': ['data/salary_data/clean_salary_data/all_clean_salary_data.csv'],
+     'folders': ['data/salary_data/clean_salary_data'],
+     'arguments': ['--raw_salary_data_file=data/salary_data/raw_salary_data.pickle',
+                   '--clean_salary_data_output_folder=data/salary_data/clean_salary_data']},
+    {'name': 'build_name_corpus',
+     'script': 'scripts/corpus_gender_prediction.py',
+     'inputs': ['data/gender_corpus/canadian_babyname.csv', 'data/gender_corpus/american_babyname.csv',
+                'data/gender_corpus/Indian-Female-Names.csv', 'data/gender_corpus/Indian-Male-Names.csv'],
+     'outputs': ['data/gender_corpus/clean_name_corpus.csv'],
+     'folders': [],
+     'arguments': ['--canadian_babyname_data_file=data/gender_corpus/canadian_babyname.csv',
+                   '--american_babyname_data_file=data/gender_corpus/american_babyname.csv',
+                   '--indian_f_babyname_data_file=data/gender_corpus/Indian-Female-Names.csv',
+                   '--indian_m_babyname_data_file=data/gender_corpus/Indian-Male-Names.csv',
+                   '--clean_babyname_corpus_output_folder=data/gender_corpus']},
+    {'name': 'corpus_gender_prediction',
+     'script': 'scripts/corpus_gender_prediction.py',
+     'inputs': ['data/salary_data/clean_salary_data/all_clean_salary_data.csv', 'data/gender_corpus/clean_name_corpus.csv'],
+     'outputs': [f'{PREDICTIONS}/corpus_gender_predictions.csv', f'{PREDICTIONS}/needs_gender_predictions.csv'],
+     'folders': [PREDICTIONS],
+     'arguments': ['--clean_salary_data_file=data/salary_data/clean_salary_data/all_clean_salary_data.csv',
+                   '--name_corpus_file=data/gender_corpus/clean_name_corpus.csv',
+                   f'--prediction_ouput_folder={PREDICTIONS}',
+                   '--fuzzy_max_distance=1']},
+    {'name': 'nltk_train_gender_classifier',
+     'script': 'scripts/nltk_train_gender_classifier.py',
+     'inputs': ['data/gender_corpus/clean_name_corpus.csv'],
+     'outputs': ['models/gender_classifier', 'models/gender_classifier_metrics.json',
+                 f'{PREDICTIONS}/nltk_test_data.pickle', f'{PREDICTIONS}/nltk_training_data.pickle'],
+     'folders': ['models', PREDICTIONS],
+     'arguments': ['--name_data_path=data/gender_corpus/clean_name_corpus.csv',
+                   '--model_output_folder=models',
+                   f'--data_output_folder={PREDICTIONS}',
+                   '--backend={backend}']},
+    {'name': 'nltk_make_predictions',
+     'script': 'scripts/nltk_make_predictions.py',
+     'inputs': ['models/gender_classifier', 'models/gender_classifier_metrics.json',
+                f'{PREDICTIONS}/nltk_test_data.pickle', f'{PREDICTIONS}/needs_gender_predictions.csv'],
+     'outputs': [f'{PREDICTIONS}/nltk_gender_predictions.csv', f'{PREDICTIONS}/accuracy.txt'],
+     'folders': [],
+     'arguments': ['--model_path=models/gender_classifier',
+                   f'--nltk_test_data={PREDICTIONS}/nltk_test_data.pickle',
+                   f'--needs_predictions_file_path={PREDICTIONS}/needs_gender_predictions.csv',
+                   f'--nltk_predictions_output_path={PREDICTIONS}/nltk_gender_predictions.csv',
+                   f'--accuracy_output_path={PREDICTIONS}/accuracy.txt',
+                   '--cache_path=cache/prediction_cache.sqlite',
+                   '--model_metrics_path=models/gender_classifier_metrics.json']},
+    {'name': 'combine_and_clean_predictions',
+     'script': 'scripts/combine_and_clean_predictions.py',
+     'inputs': [f'{PREDICTIONS}/nltk_gender_predictions.csv', f'{PREDICTIONS}/corpus_gender_predictions.csv',
+                'data/gender_overrides.csv'],
+     'outputs': [f'{PREDICTIONS}/all_clean_gender_predictions.csv'],
+     'folders': [],
+     'arguments': [f'--nltk_gender_predictions_input={PREDICTIONS}/nltk_gender_predictions.csv',
+                   f'--corpus_gender_predictions_input={PREDICTIONS}/corpus_gender_predictions.csv',
+                   f'--all_gender_predictions_output={PREDICTIONS}/all_clean_gender_predictions.csv',
+                   '--gender_overrides_input=data/gender_overrides.csv']},
+    {'name': 'exploratory_analysis',
+     'script': 'scripts/exploratory_analysis.py',
+     'inputs': [f'{PREDICTIONS}/all_clean_gender_predictions.csv'],
+     'outputs': ['plots'],
+     'folders': ['plots/bar_plots', 'plots/box_plots', 'plots/histogram_plots', 'plots/line_plots'],
+     'arguments': [f'--predictions_input_file={PREDICTIONS}/all_clean_gender_predictions.csv',
+                   '--plot_output_folder=plots',
+                   '--plot_cache_folder=cache/plot_cache'],
+     'execution_arguments': ['--jobs={plot_jobs}']},
+]
+
+
+def stage_dependencies(stages):
+    '''Find the stages each stage depends on (the stages that write its inputs).
+
+    Parameters:
+    ----------
+    stages : list of dict
+        Pipeline stages.
+
+    Returns:
+    -------
+    dependencies : dict
+        Dictionary of {stage name: set of the names of the stages it depends on}.
+    '''
+    writers = {output: stage['name'] for stage in stages for output in stage['outputs']}
+    return {stage['name']: {writers[path] for path in stage['inputs'] if path in writers} for stage in stages}
+
+
+def code_files(script, scripts_folder='scripts'):
+    '''Find a script and every script of the scripts folder it imports (directly or through other scripts).
+
+    Parameters:
+    ----------
+    script : str
+        Path to the script.
+    scripts_folder : str
+        Folder of the pipeline's scripts.
+
+    Returns:
+    -------
+    files : list of str
+        Sorted paths of the script and the scripts it imports.
+    '''
+    files, waiting = set(), [script]
+    while waiting:
+        path = waiting.pop()
+        if path in files:
+            continue
+        files.add(path)
+        with open(path) as code:
+            for module in re.findall(r'^\s*(?:from|import)\s+(\w+)', code.read(), flags = re.MULTILINE):
+                module_path = f'{scripts_folder}/{module}.py'
+                if os.path.exists(module_path):
+                    waiting.append(module_path)
+    return sorted(files)
+
+
+def hash_path(path, file_hashes):
+    '''Hash the content of a file, or of every file in a folder (with their relative paths).
+
+    File hashes are memoized by (size, modification time), so files that did not change are not read again,
+    and files that were touched but not changed get the same hash.
+
+    Parameters:
+    ----------
+    path : str
+        Path to a file or folder.
+    file_hashes : dict
+        Memo of {path: {'size', 'mtime', 'hash'}}, updated in place.
+
+    Returns:
+    -------
+    digest : str or None
+        Hexadecimal SHA-256 hash, or None if the path does not exist.
+    '''
+    if os.path.isdir(path):
+        digest = hashlib.sha256()
+        for folder, subfolders, names in os.walk(path):
+            subfolders.sort()
+            for name in sorted(names):
+                file_path = os.path.join(folder, name)
+                digest.update(f'{os.path.relpath(file_path, path)}\n{hash_path(file_path, file_hashes)}\n'.encode())
+        return digest.hexdigest()
+    if not os.path.exists(path):
+        return None
+    status = os.stat(path)
+    memo = file_hashes.get(path)
+    if memo is None or memo['size'] != status.st_size or memo['mtime'] != status.st_mtime_ns:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for block in iter(lambda: file.read(1 << 20), b''):
+                digest.update(block)
+        memo = {'size': status.st_size, 'mtime': status.st_mtime_ns, 'hash': digest.hexdigest()}
+        file_hashes[path] = memo
+    return memo['hash']
+
+
+def stage_key(stage, command, file_hashes):
+    '''Compute the cache key of a stage from its command, the content of its code and the content of its inputs.
+
+    Parameters:
+    ----------
+    stage : dict
+        Pipeline stage.
+    command : list of str
+        The stage's command.
+    file_hashes : dict
+        Memo of file hashes (see 'hash_path').
+
+    Returns:
+    -------
+    key : str
+        Hexadecimal SHA-256 hash.
+    '''
+    key = hashlib.sha256(json.dumps(command[1:]).encode())
+    for path in code_files(stage['script']) + stage['inputs']:
+        key.update(f'{path}\n{hash_path(path, file_hashes)}\n'.encode())
+    return key.hexdigest()
+
+
+def stage_command(stage, settings):
+    '''Return the command that runs a stage, with the run's settings (ex: the model backend) filled in.'''
+    return [sys.executable, stage['script']] + [argument.format(**settings) for argument in stage['arguments']]
+
+
+def execution_arguments(stage, settings):
+    '''Return the stage's options that only change how it runs (ex: its number of worker processes),
+    with the run's settings filled in.
+
+    They are added to the stage's command after its cache key is computed, so changing them does not make the stage out of date.
+    '''
+    return [argument.format(**settings) for argument in stage.get('execution_arguments', [])]
+
+
+def profile_arguments(name, profile_folder, profile_memory=False, profile_stats=False):
+    '''Return the options that make a stage write its profile report to the profile folder (none if profile_folder is None).
+
+    They are added to the stage's command after its cache key is computed, so profiling a run does not make stages out of date.
+    '''
+    if profile_folder is None:
+        return []
+    arguments = [f'--profile={profile_folder}/{name}.json']
+    if profile_memory:
+        arguments.append('--profile_memory')
+    if profile_stats:
+        arguments.append(f'--profile_stats={profile_folder}/{name}.pstats')
+    return arguments
+
+
+def load_pipeline_state(state_path):
+    '''Read the pipeline state (the key and output hashes of each stage's last successful run, and file hashes).'''
+    if not os.path.exists(state_path):
+        return {'stages': {}, 'file_hashes': {}}
+    with open(state_path) as state_file:
+        return json.load(state_file)
+
+
+def save_pipeline_state(state, state_path):
+    '''Write the pipeline state, replacing the previous one only once it is completely written.'''
+    os.makedirs(os.path.dirname(state_path) or '.', exist_ok = True)
+    with open(f'{state_path}.tmp', 'w') as state_file:
+        json.dump(state, state_file, indent = 2)
+    os.replace(f'{state_path}.tmp', state_path)
+
+
+def stage_is_current(stage, key, state):
+    '''Return True if a stage's last run had the same key and its outputs were not changed or deleted since.'''
+    last_run = state['stages'].get(stage['name'])
+    if last_run is None or last_run['key'] != key:
+        return False
+    return all(hash_path(path, state['file_hashes']) == last_run['outputs'].get(path) for path in stage['outputs'])
+
+
+def run_stage(command, log_path):
+    '''Run a stage's command, writing its output to a log file, and return its exit code and wall time.'''
+    start = time.perf_counter()
+    with open(log_path, 'w') as log_file:
+        exit_code = subprocess.run(command, stdout = log_file, stderr = subprocess.STDOUT).returncode
+    return exit_code, time.perf_counter() - start
+
+
+def run_pipeline(stages, settings, jobs, targets=None, force=(), skip=(), dry_run=False,
+                 state_path='cache/pipeline_state.json', log_folder='cache/pipeline_logs', profile_folder=None,
+                 profile_memory=False, profile_stats=False):
+    '''Run the stages needed for the targets, skipping stages that are current and running independent stages concurrently.
+
+    Parameters:
+    ----------
+    stages : list of dict
+        Pipeline stages (see STAGES).
+    settings : dict
+        Values filled into the stages' arguments (ex: {'backend': 'nltk', 'plot_jobs': 4}).
+    jobs : int
+        Largest number of stages run at the same time.
+    targets : list of str, optional
+        Stages to bring up to date (with the stages they depend on). All stages by default.
+    force : collection of str
+        Stages to run even if they are current ('all' forces every stage).
+    skip : collection of str
+        Stages whose existing outputs are used as they are (ex: to not fetch the salary data again).
+    dry_run : bool
+        Only report which stages would run.
+    state_path : str
+        Path to the pipeline state file.
+    log_folder : str
+        Folder to save each stage's output in.
+    profile_folder : str, optional
+        Folder for the profile report of each stage that runs (<stage>.json). Stages are not profiled if None.
+    profile_memory : bool
+        Also trace the stages' memory allocations (this makes them several times slower).
+    profile_stats : bool
+        Also profile the stages with cProfile (<stage>.pstats).
+
+    Returns:
+    -------
+    results : list of dict
+        One dictionary per stage with the keys 'stage', 'status' ('ran', 'cached', 'skipped', 'would run',
+        'failed' or 'not run') and 'seconds'.
+    '''
+    dependencies = stage_dependencies(stages)
+    by_name = {stage['name']: stage for stage in stages}
+    for name in list(targets or []) + [name for name in list(force) + list(skip) if name != 'all']:
+        if name not in by_name:
+            raise ValueError(f"unknown stage '{name}', expected one of {list(by_name)}")
+
+    # the targets and every stage they depend on, in declaration order
+    needed, waiting = set(), list(targets or by_name)
+    while waiting:
+        name = waiting.pop()
+        if name not in needed:
+            needed.add(name)
+            waiting.extend(dependencies[name])
+    needed = [stage['name'] for stage in stages if stage['name'] in needed]
+
+    state = load_pipeline_state(state_path)
+    os.makedirs(log_folder, exist_ok = True)
+    if profile_folder is not None and not dry_run:
+        os.makedirs(profile_folder, exist_ok = True)
+    results, done, failed, running = {}, set(), False, {}
+
+    def finish(name, status, seconds=0.0):
+        results[name] = {'stage': name, 'status': status, 'seconds': round(seconds, 3)}
+        done.add(name)
+
+    with ThreadPoolExecutor(max_workers = jobs) as pool:
+        while len(done) < len(needed):
+            for name in needed:
+                if name in done or name in running or not dependencies[name] <= done:
+                    continue
+                if any(results[dependency]['status'] in ('failed', 'not run') for dependency in dependencies[name]):
+                    finish(name, 'not run')
+                    continue
+                if failed:
+                    continue
+                stage = by_name[name]
+                command = stage_command(stage, settings)
+                key = stage_key(stage, command, state['file_hashes'])
+                if name in skip:
+                    missing = [path for path in stage['outputs'] if not os.path.exists(path)]
+                    if missing:
+                        print(f"{name} can not be skipped, its outputs {missing} do not exist")
+                        failed = True
+                    finish(name, 'failed' if missing else 'skipped')
+                elif dry_run:
+                    # stages after one that would run would get new inputs, so they would run too
+                    would_run = (name in force or 'all' in force or not stage_is_current(stage, key, state)
+                                 or any(results[dependency]['status'] == 'would run' for dependency in dependencies[name]))
+                    finish(name, 'would run' if would_run else 'cached')
+                elif name not in force and 'all' not in force and stage_is_current(stage, key, state):
+                    finish(name, 'cached')
+                else:
+                    for folder in stage['folders']:
+                        os.makedirs(folder, exist_ok = True)
+                    print(f"running {name}")
+                    command = (command + execution_arguments(stage, settings)
+                               + profile_arguments(name, profile_folder, profile_memory, profile_stats))
+                    running[name] = (pool.submit(run_stage, command, f'{log_folder}/{name}.log'), key)
+
+            if not running:
+                # every remaining stage is waiting on a stage that failed
+                for name in needed:
+                    if name not in done:
+                        finish(name, 'not run')
+                break
+
+            finished, _ = wait([future for future, _ in running.values()], return_when = FIRST_COMPLETED)
+            for name, (future, key) in list(running.items()):
+                if future not in finished:
+                    continue
+                del running[name]
+                exit_code, seconds = future.result()
+                if exit_code == 0:
+                    outputs = {path: hash_path(path, state['file_hashes']) for path in by_name[name]['outputs']}
+                    state['stages'][name] = {'key': key, 'outputs': outputs}
+                    finish(name, 'ran', seconds)
+                else:
+                    state['stages'].pop(name, None)
+                    print(f"{name} failed (exit code {exit_code}), see {log_folder}/{name}.log")
+                    finish(name, 'failed', seconds)
+                    failed = True
+                if not dry_run:
+                    save_pipeline_state(state, state_path)
+
+    return [results[name] for name in needed]
+
+
+def append_run_log(run_log_path, results, total_seconds):
+    '''Append a run (the time it started and each stage's status and wall time) to the run log (one JSON object per line).'''
+    os.makedirs(os.path.dirname(run_log_path) or '.', exist_ok = True)
+    statuses = [result['status'] for result in results]
+    run = {'finished': datetime.datetime.now().isoformat(timespec = 'seconds'),
+           'total_seconds': round(total_seconds, 3),
+           'ran': statuses.count('ran'),
+           'cached': statuses.count('cached'),
+           'failed': statuses.count('failed'),
+           'stages': results}
+    with open(run_log_path, 'a') as run_log:
+        run_log.write(json.dumps(run) + '\n')
+
+
+@click.command
+@click.option('--jobs', type=int, default=2)
+@click.option('--target', type=str, multiple=True)
+@click.option('--force', type=str, multiple=True)
+@click.option('--skip', type=str, multiple=True)
+@click.option('--dry_run', is_flag=True, default=False)
+@click.option('--backend', type=click.Choice(['nltk', 'sklearn']), default='nltk')
+@click.option('--plot_jobs', type=int, default=4)
+@click.option('--state_path', type=str, default='cache/pipeline_state.json')
+@click.option('--run_log_path', type=str, default='cache/pipeline_run_log.jsonl')
+@click.option('--profile_folder', type=str, default=None)
+@click.option('--profile_memory', is_flag=True, default=False)
+@click.option('--profile_stats', is_flag=True, default=False)
+def main(jobs, target, force, skip, dry_run, backend, plot_jobs, state_path, run_log_path, profile_folder,
+         profile_memory, profile_stats):
+    '''Run the pipeline stages that are out of date, with up to jobs stages at a time, and log the run.
+
+    Parameters:
+    -----------
+    jobs : int
+        Largest number of stages run at the same time.
+    target : tuple of str
+        Stages to bring up to date (with the stages they depend on). All stages by default.
+    force : tuple of str
+        Stages to run even if they are current ('all' forces every stage).
+    skip : tuple of str
+        Stages whose existing outputs are used as they are (ex: fetch_salary_data, to not download the data again).
+    dry_run : bool
+        Only print which stages would run.
+    backend : str
+        Gender classifier backend (nltk or sklearn).
+    plot_jobs : int
+        Number of worker processes used to render plots.
+    state_path : str
+        Path to the pipeline state file.
+    run_log_path : str
+        Path to the run log.
+    profile_folder : str
+        Optional folder for the profile report of each stage that runs, and their summary (summary.json).
+        Use --force=all to profile every stage.
+    profile_memory : bool
+        Also list the lines that allocated the most memory in each stage (this makes the stages several times slower).
+    profile_stats : bool
+        Also save a cProfile (pstats) dump of each stage to the profile folder.
+    '''
+    start = time.perf_counter()
+    try:
+        results = run_pipeline(STAGES, {'backend': backend, 'plot_jobs': plot_jobs}, jobs, list(target), force, skip,
+                               dry_run, state_path, profile_folder = profile_folder, profile_memory = profile_memory,
+                               profile_stats = profile_stats)
+    except ValueError as error:
+        raise click.ClickException(str(error))
+    total_seconds = time.perf_counter() - start
+
+    for result in results:
+        print(f"{result['stage']:<32} {result['status']:<10} {result['seconds']:>8.2f} s")
+    print(f"total: {total_seconds:.2f} s")
+    if not dry_run:
+        append_run_log(run_log_path, results, total_seconds)
+
+    # combine the profile reports of the stages that ran
+    if profile_folder is not None and not dry_run:
+        reports = {}
+        for result in results:
+            report_path = f"{profile_folder}/{result['stage']}.json"
+            if result['status'] == 'ran' and os.path.exists(report_path):
+                with open(report_path) as report_file:
+                    reports[result['stage']] = json.load(report_file)
+        if reports:
+            print()
+            write_profile_summary(reports, f'{profile_folder}/summary.json')
+    if any(result['status'] == 'failed' for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
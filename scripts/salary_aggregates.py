@@ -0,0 +1,288 @@
+# author: Jade Bouchard
+# date: 2026-10-19
+#
+# This module computes every per-year statistic used by the exploratory plots in one grouped pass over the data,
+# instead of filtering the full data set again for every year and plot.
+# For each (year, guessed gender) group it finds the mean, median, minimum and maximum of the numeric columns,
+# and for each year the top rows and the histogram bin counts of every gender.
+# The histogram bin counts form a year x gender x bin "cube" for each numeric column, which is saved to a small
+# .npz file so that the report can read the bins without loading the row-level data.
+# Every statistic is computed within a year, so the aggregates of separate years can be merged ('merge_year_aggregates').
+#
+# Used by: scripts/exploratory_analysis.py and scripts/pipeline_api.py
+
+
+import numpy as np
+import pandas as pd
+
+
+GENDERS = ['Female', 'Male']
+
+# genders of the histogram cube (rows with no guessed gender are counted as 'Unknown')
+CUBE_GENDERS = GENDERS + ['Unknown']
+
+
+def aggregate_by_year_and_gender(data, numeric_columns, histogram_bins, top_k=10):
+    '''Compute the per-year statistics of the numeric columns, split by guessed gender.
+
+    The data is grouped by (Year, Guessed_Gender) once. Groups with a missing gender are kept, so that
+    the yearly minimum and maximum (which set the histogram bins) include every row of the year.
+
+    Parameters:
+    ----------
+    data : pandas.DataFrame
+        Data with 'Year' and 'Guessed_Gender' columns and the numeric columns.
+    numeric_columns : list of str
+        Columns to summarize.
+    histogram_bins : dict
+        Number of histogram bin edges for each numeric column (ex: {'Remuneration': 100}).
+        The edges are evenly spaced between the yearly minimum and maximum (rounded to 2 decimals).
+    top_k : int
+        Number of rows with the largest values to keep for each year and numeric column.
+
+    Returns:
+    -------
+    aggregates : dict
+        Dictionary with the keys:
+        'by_gender' : DataFrame indexed by (Year, Guessed_Gender) with a count, mean, median, min and max
+            column for each numeric column (ex: 'Remuneration_median').
+        'year_range' : DataFrame indexed by Year with the min and max of each numeric column, rounded to 2 decimals.
+        'top_rows' : dict of {column: {year: DataFrame}} with the top_k rows of each year, largest first.
+        'histograms' : histogram cube returned by 'build_histogram_cube'.
+
+    Example:
+    -------
+    data:
+    | Year | Guessed_Gender | Remuneration |
+    |------|----------------|--------------|
+    | 2023 | Female         | 80           |
+    | 2023 | Male           | 90           |
+    | 2023 | Male           | 100          |
+
+    aggregate_by_year_and_gender(data, ['Remuneration'], {'Remuneration': 3}, top_k = 2)['by_gender']
+    Output:
+    | Year | Guessed_Gender | Remuneration_count | Remuneration_mean | Remuneration_median | Remuneration_min | Remuneration_max |
+    |------|----------------|--------------------|-------------------|---------------------|------------------|------------------|
+    | 2023 | Female         | 1                  | 80.0              | 80.0                | 80.0             | 80.0             |
+    | 2023 | Male           | 2                  | 95.0              | 95.0                | 90.0             | 100.0            |
+    '''
+    # one grouped pass for every per-(year, gender) statistic
+    grouped = data.groupby(['Year', 'Guessed_Gender'], dropna = False, sort = False)
+    by_gender = grouped[numeric_columns].agg(['count', 'mean', 'median', 'min', 'max'])
+    by_gender.columns = [f'{column}_{statistic}' for column, statistic in by_gender.columns]
+
+    # yearly minimum and maximum over every gender, rounded like the summary table of each year
+    year_groups = by_gender.groupby(level = 'Year', sort = False)
+    year_range = pd.DataFrame({f'{column}_{statistic}': getattr(year_groups[f'{column}_{statistic}'], statistic)()
+                               for column in numeric_columns for statistic in ['min', 'max']})
+    year_range = year_range.map(lambda x: round(x, 2))
+
+    top_rows = {column: find_top_rows(data, column, top_k) for column in numeric_columns}
+
+    histograms = build_histogram_cube(data, year_range, histogram_bins)
+
+    return {'by_gender': by_gender, 'year_range': year_range, 'top_rows': top_rows, 'histograms': histograms}
+
+
+def build_histogram_cube(data, year_range, histogram_bins):
+    '''Count the values of each numeric column in the histogram bins of every (year, gender), in one vectorized pass.
+
+    The bins of a year are evenly spaced between the year's minimum and maximum. Each value's bin is computed
+    from its offset in the year's range, corrected against the actual bin edges, and all (year, gender, bin)
+    counts are found with a single 'np.bincount'. The counts are the same as 'np.histogram' (and 'plt.hist')
+    with the year's edges: every bin includes its left edge, and the last bin also includes the maximum.
+
+    Parameters:
+    ----------
+    data : pandas.DataFrame
+        Data with 'Year' and 'Guessed_Gender' columns and the numeric columns.
+    year_range : pandas.DataFrame
+        DataFrame indexed by Year with '{column}_min' and '{column}_max' columns.
+    histogram_bins : dict
+        Number of bin edges for each numeric column (ex: {'Remuneration': 100}).
+
+    Returns:
+    -------
+    cube : dict
+        Dictionary with the keys 'years' (array), 'genders' (array of CUBE_GENDERS) and one key per numeric
+        column, holding {'edges': array of shape (years, bin edges), 'counts': array of shape (years, genders, bins)}.
+    '''
+    years = year_range.index.to_numpy()
+    year_index = pd.Index(years).get_indexer(data['Year'])
+    gender_index = pd.Index(CUBE_GENDERS).get_indexer(data['Guessed_Gender'].fillna('Unknown'))
+    cube = {'years': years, 'genders': np.array(CUBE_GENDERS)}
+
+    for column, bins in histogram_bins.items():
+        n_bins = bins - 1
+        edges = np.array([np.linspace(year_range.loc[year, f'{column}_min'], year_range.loc[year, f'{column}_max'], bins)
+                          for year in years], dtype = float).reshape(len(years), bins)
+
+        values = data[column].to_numpy(dtype = float)
+        counted = (year_index >= 0) & (gender_index >= 0) & ~np.isnan(values)
+        year_of_value = year_index[counted]
+        values = values[counted]
+        low, high = edges[year_of_value, 0], edges[year_of_value, -1]
+        in_range = (values >= low) & (values <= high)
+        year_of_value, values, low, high = year_of_value[in_range], values[in_range], low[in_range], high[in_range]
+
+        # estimate each value's bin from its offset in the year's range (the last bin when the range is empty)
+        width = high - low
+        with np.errstate(divide = 'ignore', invalid = 'ignore'):
+            bin_index = np.where(width > 0, np.floor((values - low) / width * n_bins), n_bins - 1)
+        bin_index = np.clip(bin_index, 0, n_bins - 1).astype(np.intp)
+        # correct estimates that rounding put next to the right bin
+        bin_index -= values < edges[year_of_value, bin_index]
+        bin_index += (values >= edges[year_of_value, bin_index + 1]) & (bin_index < n_bins - 1)
+
+        cell = (year_of_value * len(CUBE_GENDERS) + gender_index[counted][in_range]) * n_bins + bin_index
+        counts = np.bincount(cell, minlength = len(years) * len(CUBE_GENDERS) * n_bins)
+        cube[column] = {'edges': edges, 'counts': counts.reshape(len(years), len(CUBE_GENDERS), n_bins)}
+
+    return cube
+
+
+def save_histogram_cube(cube, output_path):
+    '''Save a histogram cube (from 'build_histogram_cube') to a compressed .npz file.
+
+    Parameters:
+    ----------
+    cube : dict
+        Histogram cube.
+    output_path : str
+        Path to the .npz file.
+    '''
+    arrays = {'years': cube['years'], 'genders': cube['genders']}
+    for column, histogram in cube.items():
+        if column not in arrays:
+            arrays[f'{column}_edges'] = histogram['edges']
+            arrays[f'{column}_counts'] = histogram['counts']
+    np.savez_compressed(output_path, **arrays)
+
+
+def load_histogram_cube(cube_path):
+    '''Load a histogram cube saved by 'save_histogram_cube'.
+
+    Parameters:
+    ----------
+    cube_path : str
+        Path to the .npz file.
+
+    Returns:
+    -------
+    cube : dict
+        Histogram cube, in the format returned by 'build_histogram_cube'.
+
+    Example:
+    -------
+    cube = load_histogram_cube('plots/histogram_cube.npz')
+    year = list(cube['years']).index(2024)
+    female = list(cube['genders']).index('Female')
+    cube['Remuneration']['counts'][year, female]  # number of female salaries in each 2024 salary bin
+    '''
+    with np.load(cube_path) as arrays:
+        cube = {'years': arrays['years'], 'genders': arrays['genders']}
+        for name in arrays.files:
+            if name.endswith('_counts'):
+                column = name[:-len('_counts')]
+                cube[column] = {'edges': arrays[f'{column}_edges'], 'counts': arrays[name]}
+    return cube
+
+
+def find_top_rows(data, numeric_column, top_k):
+    '''Find the top_k rows with the largest values of a numeric column in each year, with one sort of the data.
+
+    Ties are broken by row order, like 'DataFrame.nlargest' (keep = 'first').
+
+    Parameters:
+    ----------
+    data : pandas.DataFrame
+        Data with a 'Year' column.
+    numeric_column : str
+        Column to rank the rows by.
+    top_k : int
+        Number of rows to keep for each year.
+
+    Returns:
+    -------
+    top_rows : dict
+        Dictionary of {year: DataFrame of the year's top rows, largest first}.
+    '''
+    ranked = data.dropna(subset = [numeric_column]).sort_values(numeric_column, ascending = False, kind = 'stable')
+    top = ranked.groupby('Year', sort = False).head(top_k)
+    top_rows = dict(tuple(top.groupby('Year', sort = False)))
+    # years where the column is always missing have no top rows
+    return {year: top_rows.get(year, top.iloc[:0]) for year in data['Year'].unique()}
+
+
+def merge_year_aggregates(year_aggregates):
+    '''Merge the aggregates of separate years (each from 'aggregate_by_year_and_gender') into the aggregates of every year.
+
+    Every statistic is computed within a year, so the aggregates of separate years are only put side by side.
+    The years are kept in the order they are given.
+
+    Parameters:
+    ----------
+    year_aggregates : list of dict
+        Aggregates of each year (or of separate groups of years), with no year in more than one of them.
+
+    Returns:
+    -------
+    aggregates : dict
+        Aggregates of every year, in the format returned by 'aggregate_by_year_and_gender'.
+    '''
+    cubes = [aggregates['histograms'] for aggregates in year_aggregates]
+    histograms = {'years': np.concatenate([cube['years'] for cube in cubes]), 'genders': cubes[0]['genders']}
+    for column in cubes[0]:
+        if column not in histograms:
+            histograms[column] = {'edges': np.concatenate([cube[column]['edges'] for cube in cubes]),
+                                  'counts': np.concatenate([cube[column]['counts'] for cube in cubes])}
+    return {'by_gender': pd.concat([aggregates['by_gender'] for aggregates in year_aggregates]),
+            'year_range': pd.concat([aggregates['year_range'] for aggregates in year_aggregates]),
+            'top_rows': {column: {year: rows for aggregates in year_aggregates
+                                  for year, rows in aggregates['top_rows'][column].items()}
+                         for column in year_aggregates[0]['top_rows']},
+            'histograms': histograms}
+
+
+def select_year(aggregates, year):
+    '''Select the top rows and histograms of one year from the aggregates.
+
+    Parameters:
+    ----------
+    aggregates : dict
+        Aggregates returned by 'aggregate_by_year_and_gender'.
+    year : int
+        The year to select.
+
+    Returns:
+    -------
+    year_aggregates : dict
+        Dictionary with the keys 'top_rows' ({column: DataFrame}) and 'histograms'
+        ({column: {'edges': array, 'Female': counts, 'Male': counts}}).
+    '''
+    cube = aggregates['histograms']
+    year_position = np.flatnonzero(cube['years'] == year)[0]
+    histograms = {}
+    for column, histogram in cube.items():
+        if column in ('years', 'genders'):
+            continue
+        histograms[column] = {'edges': histogram['edges'][year_position]}
+        for gender in GENDERS:
+            histograms[column][gender] = histogram['counts'][year_position, CUBE_GENDERS.index(gender)]
+    return {'top_rows': {column: rows[year] for column, rows in aggregates['top_rows'].items()},
+            'histograms': histograms}
+
+
+def write_summary_by_year_and_gender(aggregates, output_path):
+    '''Save the per-(year, gender) statistics to a csv file (read by the report), sorted by year and gender.
+
+    Parameters:
+    ----------
+    aggregates : dict
+        Aggregates returned by 'aggregate_by_year_and_gender'.
+    output_path : str
+        Path to the csv file.
+    '''
+    summary = aggregates['by_gender'].reset_index()
+    summary = summary.sort_values(['Year', 'Guessed_Gender'], na_position = 'last')
+    summary.to_csv(output_path, index = False, float_format = '%.2f')
@@ -0,0 +1,308 @@
+# author: Jade Bouchard
+# date: 2026-10-19
+#
+# This module answers targeted questions about the salary store (see scripts/salary_store.py) with SQL queries,
+# so that only the rows of the answer are loaded into pandas instead of all_clean_gender_predictions.csv.
+# The filtering, ranking and grouping happen in SQLite, using its indexes on (Year), (Last_Name, First_Name)
+# and (Guessed_Gender, Year), and window functions for the top rows, medians and year-over-year changes.
+# The results follow the same rules as the plots and summary statistics of scripts/exploratory_analysis.py:
+# - top rows break ties by row order, like 'DataFrame.nlargest'
+# - medians are the middle value (or the mean of the two middle values) of each group
+# - changes are between consecutive years of the same first and last name, and names that appear more than once
+#   in a year are left out. Changes from a value of 0 have no percent change (NULL), where pandas gives inf.
+#
+# Usage: python scripts/salary_queries.py --store_path=data/salary_store.sqlite --query=summary
+# Usage: python scripts/salary_queries.py --store_path=data/salary_store.sqlite --query=top --column=Expenses --year=2023
+# Usage: python scripts/salary_queries.py --store_path=data/salary_store.sqlite --query=person --first_name=Tor --last_name=Aamodt
+
+
+import time
+import click
+import pandas as pd
+from salary_store import STORE_TABLES, open_salary_store
+
+
+# numeric columns that can be ranked, summarized and compared over years
+NUMERIC_COLUMNS = ['Remuneration', 'Expenses']
+
+# columns of the rows returned by the queries
+ROW_COLUMNS = ', '.join(STORE_TABLES['predictions']['columns'])
+
+
+def check_numeric_column(column):
+    '''Raise a ValueError unless the column is one of NUMERIC_COLUMNS (column names are written into the SQL).'''
+    if column not in NUMERIC_COLUMNS:
+        raise ValueError(f"unknown column '{column}', expected one of {NUMERIC_COLUMNS}")
+
+
+def person_history(connection, first_name, last_name):
+    '''Find every year of one person's salary and expenses, with the change from the year before.
+
+    Parameters:
+    ----------
+    connection : sqlite3.Connection
+        Connection returned by 'open_salary_store'.
+    first_name : str
+        First name, as in the clean data (ex: 'Tor').
+    last_name : str
+        Last name, as in the clean data (ex: 'Aamodt').
+
+    Returns:
+    -------
+    history : pandas.DataFrame
+        The person's rows by year, with the columns of the predictions table and 'Remuneration_change' and
+        'Expenses_change' (the change from the previous row, when it is the year before).
+
+    Example:
+    -------
+    person_history(connection, 'Tor', 'Aamodt')
+    Output:
+    | Last_Name | First_Name | Remuneration | ... | Year | ... | Remuneration_change | Expenses_change |
+    |-----------|------------|--------------|-----|------|-----|---------------------|-----------------|
+    | Aamodt    | Tor        | 187012       | ... | 2022 | ... | NaN                 | NaN             |
+    | Aamodt    | Tor        | 193153       | ... | 2023 | ... | 6141.0              | 1236.0          |
+    '''
+    changes = ', '.join(f'''CASE WHEN LAG(Year) OVER by_year = Year - 1
+                                 THEN {column} - LAG({column}) OVER by_year END AS {column}_change'''
+                        for column in NUMERIC_COLUMNS)
+    return pd.read_sql_query(f'''SELECT {ROW_COLUMNS}, {changes}
+                                 FROM predictions
+                                 WHERE First_Name = ? AND Last_Name = ?
+                                 WINDOW by_year AS (ORDER BY Year, rowid)
+                                 ORDER BY Year, rowid''', connection, params = (first_name, last_name))
+
+
+def top_rows(connection, column='Remuneration', k=10, year=None):
+    '''Find the k rows with the largest values of a numeric column in each year (or in one year).
+
+    Parameters:
+    ----------
+    connection : sqlite3.Connection
+        Connection returned by 'open_salary_store'.
+    column : str
+        Column to rank the rows by (one of NUMERIC_COLUMNS).
+    k : int
+        Number of rows to keep for each year.
+    year : int, optional
+        Only rank the rows of this year (found with the Year index). Every year is ranked if None.
+
+    Returns:
+    -------
+    top : pandas.DataFrame
+        The top rows of each year, largest first, with the columns of the predictions table and 'Rank' (1 to k).
+    '''
+    check_numeric_column(column)
+    year_filter = 'AND Year = ?' if year is not None else ''
+    return pd.read_sql_query(f'''SELECT {ROW_COLUMNS}, Rank
+                                 FROM (SELECT *, ROW_NUMBER() OVER (PARTITION BY Year ORDER BY {column} DESC, rowid) AS Rank
+                                       FROM predictions
+                                       WHERE {column} IS NOT NULL {year_filter})
+                                 WHERE Rank <= ?
+                                 ORDER BY Year, Rank''', connection,
+                             params = (year, k) if year is not None else (k,))
+
+
+def median_query(values_query, group_columns):
+    '''Write the SQL that finds the median 'value' of each group of the rows of another query.
+
+    Parameters:
+    ----------
+    values_query : str
+        SQL query of rows with the group columns and a 'value' column.
+    group_columns : list of str
+        Columns to group by.
+
+    Returns:
+    -------
+    query : str
+        SQL query of the group columns and 'median', the middle value (or the mean of the two middle values)
+        of each group's values that are not NULL.
+    '''
+    groups = ', '.join(group_columns)
+    return f'''SELECT {groups}, AVG(value) AS median
+               FROM (SELECT {groups}, value,
+                            ROW_NUMBER() OVER (PARTITION BY {groups} ORDER BY value) AS position,
+                            COUNT(*) OVER (PARTITION BY {groups}) AS size
+                     FROM ({values_query})
+                     WHERE value IS NOT NULL)
+               WHERE position IN ((size + 1) / 2, (size + 2) / 2)
+               GROUP BY {groups}'''
+
+
+def summary_by_year_and_gender(connection, years=None):
+    '''Compute the count, mean, median, minimum and maximum of the numeric columns for each (year, guessed gender).
+
+    The values are in CAD (the summary_by_year_and_gender.csv file of the plots has salaries in thousands).
+    Rows with no guessed gender are a group of their own (with a missing Guessed_Gender).
+
+    Parameters:
+    ----------
+    connection : sqlite3.Connection
+        Connection returned by 'open_salary_store'.
+    years : list of int, optional
+        Only summarize these years (found with the Year index). Every year is summarized if None.
+
+    Returns:
+    -------
+    summary : pandas.DataFrame
+        One row per (Year, Guessed_Gender), sorted by year and gender (missing gender last), with the columns
+        '{column}_count', '{column}_mean', '{column}_median', '{column}_min' and '{column}_max' of every numeric column.
+    '''
+    year_filter = f"WHERE Year IN ({', '.join('?' for _ in years)})" if years is not None else ''
+    statistics = ', '.join(f'COUNT({column}) AS {column}_count, AVG({column}) AS {column}_mean, '
+                           f'MIN({column}) AS {column}_min, MAX({column}) AS {column}_max'
+                           for column in NUMERIC_COLUMNS)
+    medians = ' '.join(f'''LEFT JOIN ({median_query(f"SELECT Year, Guessed_Gender, {column} AS value FROM predictions {year_filter}",
+                                                    ['Year', 'Guessed_Gender'])}) AS {column}_medians
+                           ON {column}_medians.Year = groups.Year
+                           AND {column}_medians.Guessed_Gender IS groups.Guessed_Gender'''
+                       for column in NUMERIC_COLUMNS)
+    columns = ', '.join(f'{column}_count, {column}_mean, {column}_medians.median AS {column}_median, '
+                        f'{column}_min, {column}_max' for column in NUMERIC_COLUMNS)
+    params = list(years or []) * (len(NUMERIC_COLUMNS) + 1)
+    return pd.read_sql_query(f'''SELECT groups.Year, groups.Guessed_Gender, {columns}
+                                 FROM (SELECT Year, Guessed_Gender, {statistics}
+                                       FROM predictions {year_filter}
+                                       GROUP BY Year, Guessed_Gender) AS groups
+                                 {medians}
+                                 ORDER BY groups.Year, groups.Guessed_Gender IS NULL, groups.Guessed_Gender''',
+                             connection, params = params)
+
+
+def changes_query(column):
+    '''Write the SQL of every change of a numeric column between consecutive years of the same person.
+
+    Parameters:
+    ----------
+    column : str
+        One of NUMERIC_COLUMNS.
+
+    Returns:
+    -------
+    query : str
+        SQL query with the columns 'First_Name', 'Last_Name', 'Guessed_Gender' (of the earlier year),
+        'transition_year', 'change_amount' and 'change_percent' (rounded to 2 decimals).
+    '''
+    check_numeric_column(column)
+    return f'''SELECT First_Name, Last_Name, previous_gender AS Guessed_Gender, Year AS transition_year,
+                      {column} - previous_value AS change_amount,
+                      ROUND(100.0 * ({column} - previous_value) / previous_value, 2) AS change_percent
+               FROM (SELECT First_Name, Last_Name, Year, {column},
+                            LAG(Year) OVER by_person AS previous_year,
+                            LAG({column}) OVER by_person AS previous_value,
+                            LAG(Guessed_Gender) OVER by_person AS previous_gender
+                     FROM (SELECT *, COUNT(*) OVER (PARTITION BY Last_Name, First_Name, Year) AS rows_in_year
+                           FROM predictions)
+                     WHERE rows_in_year = 1
+                     WINDOW by_person AS (PARTITION BY Last_Name, First_Name ORDER BY Year))
+               WHERE previous_year = Year - 1'''
+
+
+def year_over_year_changes(connection, column='Remuneration'):
+    '''Find every change of a numeric column between consecutive years of the same person.
+
+    Parameters:
+    ----------
+    connection : sqlite3.Connection
+        Connection returned by 'open_salary_store'.
+    column : str
+        One of NUMERIC_COLUMNS.
+
+    Returns:
+    -------
+    changes : pandas.DataFrame
+        Columns 'First_Name', 'Last_Name', 'Guessed_Gender' (of the earlier year), 'transition_year',
+        'change_amount' and 'change_percent', sorted by name and transition year.
+    '''
+    return pd.read_sql_query(f'''SELECT * FROM ({changes_query(column)})
+                                 ORDER BY Last_Name, First_Name, transition_year''', connection)
+
+
+def median_changes_by_gender(connection, column='Remuneration', change='amount'):
+    '''Find the median change of a numeric column between consecutive years, by transition year and guessed gender
+    (the values of the line plots of changes).
+
+    Parameters:
+    ----------
+    connection : sqlite3.Connection
+        Connection returned by 'open_salary_store'.
+    column : str
+        One of NUMERIC_COLUMNS.
+    change : str
+        'amount' or 'percent'.
+
+    Returns:
+    -------
+    median_data : pandas.DataFrame
+        Median changes indexed by transition year, with a column for each guessed gender.
+    '''
+    if change not in ('amount', 'percent'):
+        raise ValueError(f"unknown change '{change}', expected 'amount' or 'percent'")
+    query = median_query(f'SELECT transition_year, Guessed_Gender, change_{change} AS value FROM ({changes_query(column)})',
+                         ['transition_year', 'Guessed_Gender'])
+    medians = pd.read_sql_query(f'SELECT * FROM ({query}) WHERE Guessed_Gender IS NOT NULL', connection)
+    return medians.pivot(index = 'transition_year', columns = 'Guessed_Gender', values = 'median')
+
+
+@click.command
+@click.option('--store_path', type=str, default='data/salary_store.sqlite')
+@click.option('--query', type=click.Choice(['summary', 'top', 'person', 'changes', 'median_changes']), default='summary')
+@click.option('--column', type=click.Choice(NUMERIC_COLUMNS), default='Remuneration')
+@click.option('--year', type=int, default=None)
+@click.option('--k', type=int, default=10)
+@click.option('--first_name', type=str, default=None)
+@click.option('--last_name', type=str, default=None)
+@click.option('--change', type=click.Choice(['amount', 'percent']), default='amount')
+def main(store_path, query, column, year, k, first_name, last_name, change):
+    '''Run one query on the salary store and print the result and how long it took.
+
+    Parameters:
+    -----------
+    store_path : str
+        Path to an existing salary store (it is only read).
+    query : str
+        'summary' (statistics by year and gender), 'top' (top k rows of each year), 'person' (one person's history),
+        'changes' (every year-over-year change) or 'median_changes' (median changes by year and gender).
+    column : str
+        Numeric column of the 'top', 'changes' and 'median_changes' queries.
+    year : int
+        Only query this year ('summary' and 'top').
+    k : int
+        Number of rows of each year of the 'top' query.
+    first_name : str
+        First name of the 'person' query.
+    last_name : str
+        Last name of the 'person' query.
+    change : str
+        'amount' or 'percent', for the 'median_changes' query.
+    '''
+    try:
+        connection = open_salary_store(store_path, read_only = True)
+    except FileNotFoundError as error:
+        raise click.ClickException(str(error))
+    tables = [row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+    if 'predictions' not in tables:
+        connection.close()
+        raise click.ClickException(f"the salary store at {store_path} has no predictions table, "
+                                   "run scripts/combine_and_clean_predictions.py with --store_path first")
+    start = time.perf_counter()
+    if query == 'summary':
+        result = summary_by_year_and_gender(connection, [year] if year is not None else None)
+    elif query == 'top':
+        result = top_rows(connection, column, k, year)
+    elif query == 'person':
+        result = person_history(connection, first_name, last_name)
+    elif query == 'changes':
+        result = year_over_year_changes(connection, column)
+    else:
+        result = median_changes_by_gender(connection, column, change)
+    milliseconds = (time.perf_counter() - start) * 1000
+    connection.close()
+
+    with pd.option_context('display.max_columns', None, 'display.width', 200):
+        print(result)
+    print(f"\n{len(result)} rows in {milliseconds:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+# author: Jade Bouchard
+# date: 2026-10-19
+#
+# This module keeps the clean salary data and the clean gender predictions in an optional local SQLite file
+# (the "salary store"), so that analyses can answer targeted questions (one person's history, the top earners
+# of a year, medians by gender) with indexed queries instead of loading the csv files (see scripts/salary_queries.py).
+# The stages that write the csv files also write their table when they are given --store_path:
+# scripts/clean_salary_data.py writes 'salaries' and scripts/combine_and_clean_predictions.py writes 'predictions'.
+# Rows are loaded into a new table that only replaces the table of the last run (with its indexes) once
+# every row is written, so a failed run leaves the last complete table in place.
+#
+# Used by: scripts/clean_salary_data.py, scripts/combine_and_clean_predictions.py, scripts/pipeline_api.py
+# and scripts/salary_queries.py
+
+
+import os
+import pathlib
+import sqlite3
+
+
+# the tables of the store: their columns (with their SQLite types) and the columns of each index
+STORE_TABLES = {'salaries': {'columns': {'Last_Name': 'TEXT', 'First_Name': 'TEXT', 'Remuneration': 'INTEGER',
+                                         'Expenses': 'REAL', 'Year': 'INTEGER'},
+                             'indexes': [['Year'], ['Last_Name', 'First_Name']]},
+                'predictions': {'columns': {'Last_Name': 'TEXT', 'First_Name': 'TEXT', 'Remuneration': 'INTEGER',
+                                            'Expenses': 'REAL', 'Year': 'INTEGER', 'Guessed_Gender': 'TEXT',
+                                            'Confidence_Score': 'REAL'},
+                                'indexes': [['Year'], ['Last_Name', 'First_Name'], ['Guessed_Gender', 'Year']]}}
+
+
+def open_salary_store(store_path, read_only=False):
+    '''Open (or create) the salary store.
+
+    Parameters:
+    ----------
+    store_path : str
+        Path to the SQLite file. Its folder is created if it does not exist.
+    read_only : bool
+        Open an existing store without writing to it (and without creating it if it does not exist).
+
+    Returns:
+    -------
+    connection : sqlite3.Connection
+        Connection to the store.
+    '''
+    if read_only:
+        if not os.path.isfile(store_path):
+            raise FileNotFoundError(f"there is no salary store at {store_path}")
+        return sqlite3.connect(f'{pathlib.Path(store_path).resolve().as_uri()}?mode=ro', uri = True)
+    store_folder = os.path.dirname(store_path)
+    if store_folder:
+        os.makedirs(store_folder, exist_ok = True)
+    return sqlite3.connect(store_path)
+
+
+def start_store_table(connection, table):
+    '''Create an empty loading table for one of STORE_TABLES (replacing the loading table of a run that failed).
+
+    Parameters:
+    ----------
+    connection : sqlite3.Connection
+        Connection returned by 'open_salary_store'.
+    table : str
+        Name of the table (a key of STORE_TABLES).
+    '''
+    columns = ', '.join(f'{column} {column_type}' for column, column_type in STORE_TABLES[table]['columns'].items())
+    connection.execute(f'DROP TABLE IF EXISTS {table}_loading')
+    connection.execute(f'CREATE TABLE {table}_loading ({columns})')
+    connection.commit()
+
+
+def append_store_rows(connection, table, data):
+    '''Add rows to the loading table of one of STORE_TABLES.
+
+    Missing values and empty strings (ex: a guessed gender removed because of its low confidence score) are
+    stored as NULL, like pd.read_csv reads them from the csv files.
+
+    Parameters:
+    ----------
+    connection : sqlite3.Connection
+        Connection returned by 'open_salary_store'.
+    table : str
+        Name of the table (a key of STORE_TABLES), started by 'start_store_table'.
+    data : pandas.DataFrame
+        Rows with (at least) the table's columns.
+    '''
+    columns = list(STORE_TABLES[table]['columns'])
+    rows = data[columns].astype(object)
+    rows = rows.where(rows.notna() & (rows != ''), None)
+    placeholders = ', '.join('?' for _ in columns)
+    connection.executemany(f'INSERT INTO {table}_loading VALUES ({placeholders})', rows.itertuples(index = False))
+    connection.commit()
+
+
+def finish_store_table(connection, table):
+    '''Index the loading table of one of STORE_TABLES and make it the table, in one transaction.
+
+    Parameters:
+    ----------
+    connection : sqlite3.Connection
+        Connection returned by 'open_salary_store'.
+    table : str
+        Name of the table (a key of STORE_TABLES), loaded with 'append_store_rows'.
+    '''
+    connection.commit()
+    connection.execute('BEGIN')
+    try:
+        connection.execute(f'DROP TABLE IF EXISTS {table}')
+        connection.execute(f'ALTER TABLE {table}_loading RENAME TO {table}')
+        # indexes are built after the rows are loaded, which is faster than updating them for every row
+        for index_columns in STORE_TABLES[table]['indexes']:
+            index_name = f"{table}_by_{'_'.join(index_columns).lower()}"
+            connection.execute(f"CREATE INDEX {index_name} ON {table} ({', '.join(index_columns)})")
+        connection.execute('COMMIT')
+    except Exception:
+        connection.execute('ROLLBACK')
+        raise
+    # keep the query planner's statistics up to date
+    connection.execute(f'ANALYZE {table}')
+    connection.commit()
+
+
+def write_store_table(store_path, table, data):
+    '''Replace one of STORE_TABLES in the salary store with the rows of a DataFrame.
+
+    Parameters:
+    ----------
+    store_path : str
+        Path to the SQLite file.
+    table : str
+        Name of the table (a key of STORE_TABLES).
+    data : pandas.DataFrame
+        Rows with (at least) the table's columns.
+
+    Example:
+    -------
+    >>> write_store_table('data/salary_store.sqlite', 'salaries', salary_data)
+    '''
+    connection = open_salary_store(store_path)
+    try:
+        start_store_table(connection, table)
+        append_store_rows(connection, table, data)
+        finish_store_table(connection, table)
+    finally:
+        connection.close()
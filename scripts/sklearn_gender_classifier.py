@@ -0,0 +1,173 @@
+# author: Jade Bouchard
+# date: 2026-10-19
+#
+# This module is an alternative (scikit-learn) backend for the gender classifier.
+# Names are turned into character n-gram counts that are hashed into a fixed number of columns
+# of a sparse matrix (HashingVectorizer), and a multinomial naive bayes or logistic regression
+# model is trained on them. The model has the same size no matter how many distinct names
+# it was trained on, and predictions are made in batches with predict_proba.
+# The model is saved as a folder of JSON metadata plus .npy arrays (no pickles).
+# scikit-learn is only imported when a model is created, so the scripts that import this module
+# (ex: to check whether a model folder is an sklearn model) start without loading it.
+#
+# Used by: scripts/nltk_train_gender_classifier.py, scripts/nltk_make_predictions.py
+
+
+import json
+import os
+import numpy as np
+
+
+# estimator types that can be trained, and the fitted arrays needed to make predictions with each of them
+ESTIMATOR_ARRAYS = {'multinomial_nb': ['class_log_prior_', 'feature_log_prob_'],
+                    'logistic_regression': ['coef_', 'intercept_']}
+
+
+def make_name_vectorizer(n_features=2**18, ngram_range=(1, 5)):
+    '''Create a vectorizer that hashes the character n-grams of names into a fixed number of columns.
+
+    Parameters:
+    ----------
+    n_features : int
+        Number of columns in the hashed feature matrix.
+    ngram_range : tuple of int
+        Smallest and largest n-gram length. N-grams are taken inside word boundaries, so
+        'emily' produces ' e', 'ly ', 'ily ', ... which captures prefixes and suffixes.
+
+    Returns:
+    -------
+    vectorizer : sklearn.feature_extraction.text.HashingVectorizer
+        Stateless vectorizer that produces non-negative n-gram counts.
+    '''
+    from sklearn.feature_extraction.text import HashingVectorizer
+    return HashingVectorizer(analyzer = 'char_wb', ngram_range = tuple(ngram_range), n_features = n_features,
+                             alternate_sign = False, norm = None, lowercase = True)
+
+
+def make_estimator(estimator_type):
+    '''Create an untrained estimator of the given type ('multinomial_nb' or 'logistic_regression').'''
+    if estimator_type == 'multinomial_nb':
+        from sklearn.naive_bayes import MultinomialNB
+        return MultinomialNB(alpha = 0.5)
+    if estimator_type == 'logistic_regression':
+        from sklearn.linear_model import LogisticRegression
+        return LogisticRegression(solver = 'liblinear', C = 1.0)
+    raise ValueError(f"unknown estimator type '{estimator_type}', expected one of {list(ESTIMATOR_ARRAYS)}")
+
+
+def train_sklearn_gender_classifier(names, labels, estimator_type='multinomial_nb', n_features=2**18,
+                                    ngram_range=(1, 5)):
+    '''Train a gender classifier on hashed character n-grams of names.
+
+    Parameters:
+    ----------
+    names : iterable of str
+        First names to train on.
+    labels : iterable of str
+        Gender label of each name.
+    estimator_type : str
+        'multinomial_nb' or 'logistic_regression'.
+    n_features : int
+        Number of hashed feature columns.
+    ngram_range : tuple of int
+        Smallest and largest character n-gram length.
+
+    Returns:
+    -------
+    model : dict
+        Dictionary with the keys 'backend' ('sklearn'), 'estimator_type', 'vectorizer' and 'estimator'.
+    '''
+    vectorizer = make_name_vectorizer(n_features, ngram_range)
+    estimator = make_estimator(estimator_type)
+    estimator.fit(vectorizer.transform([str(name) for name in names]), np.asarray(list(labels)))
+    return {'backend': 'sklearn', 'estimator_type': estimator_type, 'vectorizer': vectorizer, 'estimator': estimator}
+
+
+def predict_sklearn_gender(model, names, batch_size=100_000):
+    '''Predict the gender of each name and the probability of each gender, in batches.
+
+    Parameters:
+    ----------
+    model : dict
+        Model returned by 'train_sklearn_gender_classifier' or 'load_sklearn_gender_model'.
+    names : iterable of str
+        First names to classify.
+    batch_size : int
+        Number of names vectorized and classified at once, which bounds the size of the sparse matrix.
+
+    Returns:
+    -------
+    predicted_labels : numpy.ndarray
+        The most probable gender of each name.
+    probabilities : numpy.ndarray
+        Array of shape [names, labels] with the probability of each label (in the order of
+        model['estimator'].classes_).
+    '''
+    names = [str(name) for name in names]
+    estimator = model['estimator']
+    probabilities = np.zeros((len(names), len(estimator.classes_)))
+    for start in range(0, len(names), batch_size):
+        batch = model['vectorizer'].transform(names[start:start + batch_size])
+        probabilities[start:start + batch_size] = estimator.predict_proba(batch)
+    predicted_labels = estimator.classes_[np.argmax(probabilities, axis = 1)]
+    return predicted_labels, probabilities
+
+
+def save_sklearn_gender_model(model, model_folder):
+    '''Save a trained model as a folder with a 'model.json' metadata file and .npy arrays.
+
+    Parameters:
+    ----------
+    model : dict
+        Model returned by 'train_sklearn_gender_classifier'.
+    model_folder : str
+        Path to the folder to save the model in. It is created if it does not exist.
+    '''
+    os.makedirs(model_folder, exist_ok = True)
+    vectorizer, estimator = model['vectorizer'], model['estimator']
+    metadata = {'backend': 'sklearn',
+                'estimator_type': model['estimator_type'],
+                'n_features': vectorizer.n_features,
+                'ngram_range': list(vectorizer.ngram_range),
+                'classes': [str(label) for label in estimator.classes_]}
+    for array_name in ESTIMATOR_ARRAYS[model['estimator_type']]:
+        np.save(f'{model_folder}/{array_name.rstrip("_")}.npy', getattr(estimator, array_name))
+    with open(f'{model_folder}/model.json', 'w') as metadata_file:
+        json.dump(metadata, metadata_file, indent = 2)
+
+
+def load_sklearn_gender_model(model_folder):
+    '''Load a model saved by 'save_sklearn_gender_model' without unpickling anything.
+
+    Parameters:
+    ----------
+    model_folder : str
+        Path to the model folder.
+
+    Returns:
+    -------
+    model : dict
+        Model that can be passed to 'predict_sklearn_gender'.
+    '''
+    with open(f'{model_folder}/model.json') as metadata_file:
+        metadata = json.load(metadata_file)
+
+    estimator = make_estimator(metadata['estimator_type'])
+    estimator.classes_ = np.array(metadata['classes'], dtype = object)
+    estimator.n_features_in_ = metadata['n_features']
+    for array_name in ESTIMATOR_ARRAYS[metadata['estimator_type']]:
+        setattr(estimator, array_name, np.load(f'{model_folder}/{array_name.rstrip("_")}.npy', allow_pickle = False))
+
+    return {'backend': 'sklearn',
+            'estimator_type': metadata['estimator_type'],
+            'vectorizer': make_name_vectorizer(metadata['n_features'], metadata['ngram_range']),
+            'estimator': estimator}
+
+
+def is_sklearn_model_folder(model_path):
+    '''Return True if model_path is a model folder saved by 'save_sklearn_gender_model'.'''
+    metadata_path = os.path.join(model_path, 'model.json')
+    if not os.path.isfile(metadata_path):
+        return False
+    with open(metadata_path) as metadata_file:
+        return json.load(metadata_file).get('backend') == 'sklearn'
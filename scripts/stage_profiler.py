@@ -0,0 +1,291 @@
+# author: Jade Bouchard
+# date: 2026-10-19
+#
+# This module profiles the pipeline's scripts. Every script's main function takes a --profile option
+# (added by 'profile_options') that writes a JSON report of the run: the wall and CPU time of each named phase
+# (ex: tokenization, name_splitting, shorten_name, merge, classify, render) and the peak resident memory (RSS).
+# With --profile_memory, the report also lists the lines that allocated the most memory (with tracemalloc).
+# Tracing every allocation makes pandas-heavy code several times slower, so the phase times of those reports
+# are only useful relative to each other.
+# With --profile_stats, the run is also profiled with cProfile and the pstats file is saved.
+# Phases are marked in the code with 'profile_phase', which does nothing when the script is not profiled.
+# The reports of one pipeline run are combined into one summary by 'aggregate_profiles'
+# (scripts/run_pipeline.py does this with --profile_folder).
+#
+# Used by: every pipeline script, scripts/pipeline_api.py and scripts/run_pipeline.py
+# Usage: python scripts/stage_profiler.py --report_folder=cache/profiles --summary_path=cache/profiles/summary.json
+
+
+import contextlib
+import cProfile
+import datetime
+import functools
+import glob
+import json
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+import click
+
+
+# the phases timed in this process ({phase name: totals}, None when the process is not profiled),
+# and the tracemalloc snapshot taken when the most memory was traced at the end of a phase
+PROFILE = {'phases': None, 'snapshot': None, 'snapshot_size': 0}
+
+# number of allocating lines and functions listed in a report
+TOP_ALLOCATIONS = 15
+TOP_FUNCTIONS = 25
+
+
+@contextlib.contextmanager
+def profile_phase(name):
+    '''Time a named phase of a script (when the script is profiled).
+
+    Phases with the same name add up (ex: 'shorten_name' for every year), and phases can be nested,
+    so the time of a phase includes the time of the phases inside it.
+
+    Parameters:
+    ----------
+    name : str
+        Name of the phase (ex: 'tokenization').
+
+    Example:
+    --------
+    >>> with profile_phase('merge'):
+    >>>     merged = pd.merge(salary_data, name_corpus, on = ['First_Name'], how = 'left')
+    '''
+    phases = PROFILE['phases']
+    if phases is None:
+        yield
+        return
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    try:
+        yield
+    finally:
+        wall_seconds, cpu_seconds = time.perf_counter() - wall_start, time.process_time() - cpu_start
+        phase = phases.setdefault(name, {'phase': name, 'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0})
+        phase['calls'] += 1
+        phase['wall_seconds'] += wall_seconds
+        phase['cpu_seconds'] += cpu_seconds
+        # keep the allocations of the phase that ended with the most memory in use (snapshots are slow to take,
+        # so a new one is only taken when 10% more memory is traced than in the last one)
+        if tracemalloc.is_tracing() and tracemalloc.get_traced_memory()[0] > 1.1 * PROFILE['snapshot_size']:
+            PROFILE['snapshot'] = tracemalloc.take_snapshot()
+            PROFILE['snapshot_size'] = tracemalloc.get_traced_memory()[0]
+
+
+def peak_rss_mb(who):
+    '''Return the peak resident memory (in MB) of this process (who='self') or of its finished child processes
+    (who='children'), or None where the resource module is not available (ex: on Windows).'''
+    try:
+        import resource
+    except ImportError:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF if who == 'self' else resource.RUSAGE_CHILDREN)
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return round(usage.ru_maxrss / (2**20 if sys.platform == 'darwin' else 2**10), 1)
+
+
+def top_allocations(snapshot):
+    '''List the lines that allocated the most memory still in use in a tracemalloc snapshot.'''
+    statistics = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)]).statistics('lineno')
+    return [{'location': f'{statistic.traceback[0].filename}:{statistic.traceback[0].lineno}',
+             'size_mb': round(statistic.size / 2**20, 3),
+             'blocks': statistic.count}
+            for statistic in statistics[:TOP_ALLOCATIONS]]
+
+
+def top_functions(profiler):
+    '''List the functions with the most cumulative time in a cProfile profile.'''
+    statistics = pstats.Stats(profiler).stats
+    rows = sorted(statistics.items(), key = lambda item: item[1][3], reverse = True)[:TOP_FUNCTIONS]
+    return [{'function': f'{filename}:{line}({function})', 'calls': calls,
+             'own_seconds': round(own_seconds, 4), 'cumulative_seconds': round(cumulative_seconds, 4)}
+            for (filename, line, function), (_, calls, own_seconds, cumulative_seconds, _) in rows]
+
+
+def run_profiled(function, args, kwargs, script, report_path, stats_path=None, trace_memory=False):
+    '''Call a function with the phases of this process timed, and write a profile report.
+
+    Parameters:
+    ----------
+    function : callable
+        The function to profile (a script's main function).
+    args : tuple
+        Positional arguments of the call.
+    kwargs : dict
+        Keyword arguments of the call.
+    script : str
+        Name of the script, saved in the report.
+    report_path : str or None
+        Path to save the JSON report to (ex: cache/profiles/clean_salary_data.json).
+    stats_path : str, optional
+        Path to save a cProfile (pstats) dump of the call to. It is not profiled with cProfile if None.
+    trace_memory : bool
+        Trace memory allocations with tracemalloc, to list the lines that allocated the most memory.
+
+    Returns:
+    -------
+    result
+        What the function returned.
+    '''
+    PROFILE.update({'phases': {}, 'snapshot': None, 'snapshot_size': 0})
+    profiler = cProfile.Profile() if stats_path else None
+    started = datetime.datetime.now().isoformat(timespec = 'seconds')
+    if trace_memory:
+        tracemalloc.start()
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    try:
+        if profiler is not None:
+            profiler.enable()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+    finally:
+        wall_seconds, cpu_seconds = time.perf_counter() - wall_start, time.process_time() - cpu_start
+        report = {'script': script,
+                  'arguments': sys.argv[1:],
+                  'started': started,
+                  'wall_seconds': round(wall_seconds, 4),
+                  'cpu_seconds': round(cpu_seconds, 4),
+                  'phases': [{**phase, 'wall_seconds': round(phase['wall_seconds'], 4),
+                              'cpu_seconds': round(phase['cpu_seconds'], 4)} for phase in PROFILE['phases'].values()],
+                  'peak_rss_mb': peak_rss_mb('self'),
+                  'peak_rss_children_mb': peak_rss_mb('children'),
+                  'memory_traced': trace_memory}
+        if trace_memory:
+            report['traced_peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 2**20, 3)
+            report['top_allocations'] = top_allocations(PROFILE['snapshot'] or tracemalloc.take_snapshot())
+            tracemalloc.stop()
+        if report_path:
+            os.makedirs(os.path.dirname(report_path) or '.', exist_ok = True)
+        if profiler is not None:
+            os.makedirs(os.path.dirname(stats_path) or '.', exist_ok = True)
+            profiler.dump_stats(stats_path)
+            report['cprofile_stats'] = stats_path
+            report['top_functions'] = top_functions(profiler)
+        PROFILE.update({'phases': None, 'snapshot': None, 'snapshot_size': 0})
+        if report_path:
+            with open(report_path, 'w') as report_file:
+                json.dump(report, report_file, indent = 2)
+
+
+def profile_options(main):
+    '''Add the --profile, --profile_memory and --profile_stats options to a script's click main function.
+
+    Put it directly above 'def main', under the script's other click options.
+
+    Parameters:
+    ----------
+    main : callable
+        The script's main function.
+
+    Returns:
+    -------
+    profiled_main : callable
+        The main function, which writes a profile report (see 'run_profiled') when --profile or --profile_stats is given.
+        --profile_memory adds the largest allocating lines to the report.
+
+    Example:
+    --------
+    >>> @click.command
+    >>> @click.option('--raw_salary_data_file', type=str)
+    >>> @profile_options
+    >>> def main(raw_salary_data_file):
+    >>>     ...
+    '''
+    script = os.path.splitext(os.path.basename(sys.modules[main.__module__].__file__))[0]
+
+    @click.option('--profile', type=str, default=None)
+    @click.option('--profile_memory', is_flag=True, default=False)
+    @click.option('--profile_stats', type=str, default=None)
+    @functools.wraps(main)
+    def profiled_main(*args, profile=None, profile_memory=False, profile_stats=None, **kwargs):
+        if profile is None and profile_stats is None:
+            return main(*args, **kwargs)
+        return run_profiled(main, args, kwargs, script, profile, profile_stats, profile_memory)
+
+    return profiled_main
+
+
+def aggregate_profiles(reports):
+    '''Combine the profile reports of one pipeline run into one summary.
+
+    Parameters:
+    ----------
+    reports : dict
+        Dictionary of {stage name: profile report} (the reports written by 'run_profiled').
+
+    Returns:
+    -------
+    summary : dict
+        The total wall and CPU time and largest peak RSS of the run, the time and memory of each stage,
+        every phase of every stage from slowest to fastest, and the largest allocating lines of the stages whose memory was traced.
+    '''
+    stages = [{'stage': stage, 'script': report['script'], 'wall_seconds': report['wall_seconds'],
+               'cpu_seconds': report['cpu_seconds'], 'peak_rss_mb': report['peak_rss_mb'],
+               'memory_traced': report['memory_traced']}
+              for stage, report in reports.items()]
+    phases = [{'stage': stage, **phase} for stage, report in reports.items() for phase in report['phases']]
+    allocations = [{'stage': stage, **allocation} for stage, report in reports.items()
+                   for allocation in report.get('top_allocations', [])]
+    peak_rss = [report['peak_rss_mb'] for report in reports.values() if report['peak_rss_mb'] is not None]
+    return {'stages': stages,
+            'total_wall_seconds': round(sum(stage['wall_seconds'] for stage in stages), 4),
+            'total_cpu_seconds': round(sum(stage['cpu_seconds'] for stage in stages), 4),
+            'peak_rss_mb': max(peak_rss, default = None),
+            'phases': sorted(phases, key = lambda phase: phase['wall_seconds'], reverse = True),
+            'top_allocations': sorted(allocations, key = lambda allocation: allocation['size_mb'],
+                                      reverse = True)[:TOP_ALLOCATIONS]}
+
+
+def write_profile_summary(reports, summary_path):
+    '''Aggregate profile reports (see 'aggregate_profiles'), save the summary as JSON and print the stages and slowest phases.
+
+    Parameters:
+    ----------
+    reports : dict
+        Dictionary of {stage name: profile report}.
+    summary_path : str
+        Path to save the summary to.
+    '''
+    summary = aggregate_profiles(reports)
+    with open(summary_path, 'w') as summary_file:
+        json.dump(summary, summary_file, indent = 2)
+
+    print(f"{'stage':<32} {'wall (s)':>9} {'cpu (s)':>9} {'peak rss (MB)':>14}")
+    for stage in summary['stages']:
+        print(f"{stage['stage']:<32} {stage['wall_seconds']:>9.2f} {stage['cpu_seconds']:>9.2f} {stage['peak_rss_mb'] or 0:>14.0f}")
+    print(f"\n{'slowest phases':<52} {'wall (s)':>9} {'cpu (s)':>9}")
+    for phase in summary['phases'][:10]:
+        print(f"{phase['stage'] + ': ' + phase['phase']:<52} {phase['wall_seconds']:>9.2f} {phase['cpu_seconds']:>9.2f}")
+
+
+@click.command
+@click.option('--report_folder', type=str)
+@click.option('--summary_path', type=str, default=None)
+def main(report_folder, summary_path):
+    '''Combine the profile reports in a folder (one per stage, named after the stage) into one summary.
+
+    Parameters:
+    -----------
+    report_folder : str
+        Folder of the JSON profile reports (ex: the reports written with --profile=cache/profiles/<stage>.json).
+    summary_path : str
+        Path to save the summary to (report_folder/summary.json by default).
+    '''
+    summary_path = summary_path or f'{report_folder}/summary.json'
+    reports = {}
+    for report_path in sorted(glob.glob(f'{report_folder}/*.json')):
+        if os.path.abspath(report_path) != os.path.abspath(summary_path):
+            with open(report_path) as report_file:
+                reports[os.path.splitext(os.path.basename(report_path))[0]] = json.load(report_file)
+    write_profile_summary(reports, summary_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,419 @@
+# author: Jade Bouchard
+# date: 2026-10-19
+#
+# This script generates synthetic input data for the pipeline, to benchmark it at sizes larger than UBC's:
+# raw salary schedule text in the format of UBC's Statement of Financial Information (the text
+# 'clean_salary_data' expects, with page headers, names wrapped onto two lines, middle names and initials,
+# and '-' for missing expenses), the four raw babyname datasets (canadian, american, indian female and
+# indian male, in the formats of the real files) and a small gender overrides file.
+# The data is parameterized by the number of people per year, the number of years and the number of distinct
+# first names, last names and babynames. Most first names are babynames, some are misspelled babynames
+# (found by fuzzy matching) and the rest are not in the babyname data (predicted by the gender model).
+# Names ending in a vowel are mostly female, so the gender model has something to learn.
+#
+# Usage: python scripts/synthetic_data.py --output_folder=cache/synthetic_data --scale=10
+# Usage: python scripts/synthetic_data.py --output_folder=cache/synthetic_data --people=50000 --years=8 --first_names=20000
+
+
+import os
+import pickle
+import click
+import numpy as np
+import pandas as pd
+
+
+# size of the real data (UBC fiscal years 2020 to 2024), the 1x scale of the synthetic data
+UBC_SCALE = {'people': 7_500, 'years': 5, 'first_names': 4_100, 'last_names': 7_300, 'babynames': 20_000,
+             'babyname_years': 10}
+
+# building blocks of the synthetic names
+ONSETS = np.array(['b', 'c', 'd', 'f', 'g', 'h', 'j', 'k', 'l', 'm', 'n', 'p', 'r', 's', 't', 'v', 'w', 'z',
+                   'br', 'ch', 'cl', 'dr', 'gr', 'kr', 'sh', 'st', 'th', 'tr'])
+VOWELS = np.array(['a', 'e', 'i', 'o', 'u', 'ai', 'ea', 'ie', 'ou', 'y'])
+CODAS = np.array(['', '', '', '', '', 'n', 'l', 'r', 's', 'nd'])
+
+# text around the schedule of each year, as it is extracted from UBC's pdf reports
+SCHEDULE_START = ('* Expenses paid to employees or on behalf of employees are reported on a gross basis and are not adjusted for \n'
+                  'external cost recoveries.  \n \nName  Remuneration  Expenses*  \n   \n')
+PAGE_BREAK = ('   SCHEDULE OF REMUNERATION AND EXPENSES  \nPAID TO EMPLOYEES OR ON BEHALF OF EMPLOYEES  \n'
+              'YEAR ENDED MARCH 31, {year} \nUnaudited Schedule  \n \n Page | {page} \nName  Remuneration  Expenses*  \n   \n')
+SCHEDULE_END = ('Earnings greater than \nor equal to $75,000   {total:,}  {expenses:,}    \nEarnings under \n'
+                '$75,000   664,830,675   13,404,856   \n')
+LINES_PER_PAGE = 48
+
+
+def make_names(n_names, rng, min_syllables=1, max_syllables=3):
+    '''Create distinct, pronounceable Title Case names out of random syllables.
+
+    Parameters:
+    ----------
+    n_names : int
+        Number of names to create.
+    rng : numpy.random.Generator
+        Random number generator.
+    min_syllables : int
+        Smallest number of syllables of a name.
+    max_syllables : int
+        Largest number of syllables of a name.
+
+    Returns:
+    -------
+    names : numpy.ndarray
+        Array of n_names distinct names.
+    '''
+    names = pd.Index([])
+    while len(names) < n_names:
+        n_new = int((n_names - len(names)) * 1.2) + 10
+        syllables = rng.integers(min_syllables, max_syllables + 1, size = n_new)
+        new_names = np.full(n_new, '', dtype = object)
+        for position in range(max_syllables):
+            syllable = (ONSETS[rng.integers(0, len(ONSETS), n_new)].astype(object) +
+                        VOWELS[rng.integers(0, len(VOWELS), n_new)].astype(object))
+            new_names = np.where(syllables > position, new_names + syllable, new_names)
+        new_names = new_names + CODAS[rng.integers(0, len(CODAS), n_new)].astype(object)
+        names = names.append(pd.Index(new_names)).unique()
+    return np.array([name.title() for name in names[:n_names]], dtype = object)
+
+
+def make_name_pool(n_names, rng):
+    '''Create first names with a share of female babies and a popularity weight for each.
+
+    Parameters:
+    ----------
+    n_names : int
+        Number of distinct first names.
+    rng : numpy.random.Generator
+        Random number generator.
+
+    Returns:
+    -------
+    name_pool : pandas.DataFrame
+        Data with the columns 'First_Name', 'Female_Share' (between 0 and 1) and 'Weight'
+        (popularity, the weights follow a power law and add up to 1).
+    '''
+    names = make_names(n_names, rng, min_syllables = 1, max_syllables = 3)
+    # names ending in a vowel are mostly given to girls, the others mostly to boys, with a few unisex names
+    vowel_ending = np.isin(np.array([name[-1] for name in names]), list('aeiy'))
+    female_share = np.where(vowel_ending, rng.beta(8, 2, n_names), rng.beta(2, 8, n_names))
+    unisex = rng.random(n_names) < 0.05
+    female_share[unisex] = rng.uniform(0.4, 0.6, unisex.sum())
+    weight = 1 / (np.arange(n_names) + 20.0)**1.1
+    return pd.DataFrame({'First_Name': names, 'Female_Share': female_share, 'Weight': weight / weight.sum()})
+
+
+def misspell(names, rng):
+    '''Replace one letter (not the first) of each name with another letter, to make names that are
+    one edit away from the originals.'''
+    letters = np.array(list('aeioulnrst'))
+    misspelled = []
+    for name, position, letter in zip(names, rng.integers(1, 1_000_000, len(names)), letters[rng.integers(0, 10, len(names))]):
+        position = 1 + position % max(len(name) - 1, 1)
+        misspelled.append(name[:position] + letter + name[position + 1:])
+    return np.array(misspelled, dtype = object)
+
+
+def make_salary_first_names(name_pool, n_first_names, rng):
+    '''Choose the distinct first names of the salary data: mostly babynames, some misspelled babynames
+    and some names that are not babynames.
+
+    Parameters:
+    ----------
+    name_pool : pandas.DataFrame
+        Babynames made by 'make_name_pool'.
+    n_first_names : int
+        Number of distinct first names.
+    rng : numpy.random.Generator
+        Random number generator.
+
+    Returns:
+    -------
+    first_names : numpy.ndarray
+        The first names, in random order.
+    '''
+    n_misspelled, n_unseen = n_first_names // 12, n_first_names // 14
+    n_babynames = min(n_first_names - n_misspelled - n_unseen, len(name_pool))
+    babynames = rng.choice(name_pool['First_Name'].to_numpy(), size = n_babynames, replace = False,
+                           p = name_pool['Weight'].to_numpy())
+    misspelled = misspell(rng.choice(babynames, size = n_misspelled), rng)
+    # names with 4 syllables are not in the babyname pool (its names have 1 to 3)
+    unseen = make_names(n_first_names - n_babynames - n_misspelled, rng, min_syllables = 4, max_syllables = 4)
+    first_names = np.concatenate([babynames, misspelled, unseen])
+    return first_names[rng.permutation(len(first_names))]
+
+
+def make_people(n_people, n_years, n_first_names, n_last_names, name_pool, rng):
+    '''Create the people employed each year, with their names (as written in the schedule) and pay.
+
+    About a tenth of the people leave each year and are replaced by new people. The pay of the people who stay
+    grows a little every year.
+
+    Parameters:
+    ----------
+    n_people : int
+        Number of people employed each year.
+    n_years : int
+        Number of years.
+    n_first_names : int
+        Number of distinct first names.
+    n_last_names : int
+        Number of distinct last names.
+    name_pool : pandas.DataFrame
+        Babynames made by 'make_name_pool'.
+    rng : numpy.random.Generator
+        Random number generator.
+
+    Returns:
+    -------
+    people : pandas.DataFrame
+        One row per person and year employed, with the columns 'Person', 'Year_Index', 'Last_Name', 'First_Name'
+        (the first names as written in the schedule, sometimes with a middle name or initial), 'Remuneration'
+        and 'Expenses' (NaN when missing).
+    '''
+    n_total = n_people + int(n_people * 0.1) * (n_years - 1)
+    first_names = make_salary_first_names(name_pool, n_first_names, rng)
+    first_weights = 1 / (np.arange(len(first_names)) + 10.0)
+    first = first_names[rng.choice(len(first_names), size = n_total, p = first_weights / first_weights.sum())]
+    # a few first names have a middle name or a middle initial (shortened away when the data is cleaned)
+    middle = rng.random(n_total)
+    first = np.where(middle < 0.04, first + ' ' + np.array(list('ABCDEFGHJKLMNPRST'))[rng.integers(0, 17, n_total)].astype(object), first)
+    first = np.where((middle >= 0.04) & (middle < 0.08), first + ' ' + first_names[rng.integers(0, len(first_names), n_total)], first)
+
+    last_names = make_names(n_last_names, rng, min_syllables = 2, max_syllables = 4)
+    last = last_names[rng.integers(0, n_last_names, n_total)]
+    # a few last names have two parts, separated by a space or by a hyphen (sometimes with a space before it)
+    two_parts = rng.random(n_total)
+    second_part = last_names[rng.integers(0, n_last_names, n_total)]
+    last = np.where(two_parts < 0.02, last + ' ' + second_part, last)
+    last = np.where((two_parts >= 0.02) & (two_parts < 0.035), last + '-' + second_part, last)
+    last = np.where((two_parts >= 0.035) & (two_parts < 0.04), last + ' -' + second_part, last)
+
+    # each year keeps about 90% of the people of the year before, and hires new people to replace the rest
+    rows, employed, next_person = [], np.arange(n_people), n_people
+    for year_index in range(n_years):
+        if year_index > 0:
+            n_hired = int(n_people * 0.1)
+            employed = np.concatenate([rng.choice(employed, size = n_people - n_hired, replace = False),
+                                       np.arange(next_person, next_person + n_hired)])
+            next_person += n_hired
+        rows.append(pd.DataFrame({'Person': employed, 'Year_Index': year_index}))
+    people = pd.concat(rows, ignore_index = True)
+
+    base_pay = np.round(75_000 + rng.lognormal(10.4, 0.6, n_total))
+    people['Last_Name'] = last[people['Person']]
+    people['First_Name'] = first[people['Person']]
+    people['Remuneration'] = np.round(base_pay[people['Person']] * 1.03**people['Year_Index'] *
+                                      rng.uniform(0.97, 1.03, len(people))).astype(np.int64)
+    expenses = np.round(rng.lognormal(7.3, 1.4, len(people)))
+    people['Expenses'] = np.where(rng.random(len(people)) < 0.25, np.nan, expenses)
+    return people
+
+
+def format_schedule(people, year):
+    '''Write the salary schedule of one year as text, in the format of the text extracted from UBC's pdf reports.
+
+    Parameters:
+    ----------
+    people : pandas.DataFrame
+        The people employed in the year, from 'make_people'.
+    year : str
+        The fiscal year.
+
+    Returns:
+    -------
+    text : str
+        The schedule text, with the people in alphabetical order.
+    '''
+    people = people.sort_values(['Last_Name', 'First_Name'], kind = 'stable')
+    expenses = ['-' if np.isnan(value) else f'{int(value):,}' for value in people['Expenses']]
+    # about 3% of the names are wrapped onto two lines in the pdf text
+    wrapped = (np.arange(len(people)) * 7919) % 100 < 3
+    lines = [f"{last}, {wrap}{first}  {pay:,}   {expense}  \n"
+             for last, first, pay, expense, wrap in zip(people['Last_Name'], people['First_Name'], people['Remuneration'],
+                                                        expenses, np.where(wrapped, '\n', ''))]
+    pages = [''.join(lines[start:start + LINES_PER_PAGE]) for start in range(0, len(lines), LINES_PER_PAGE)]
+    page_breaks = [PAGE_BREAK.format(year = year, page = 100 + page) for page in range(len(pages))]
+    body = ''.join(page + page_break for page, page_break in zip(pages, page_breaks))
+    return (SCHEDULE_START + body +
+            SCHEDULE_END.format(total = int(people['Remuneration'].sum()), expenses = int(people['Expenses'].sum())))
+
+
+def make_raw_salary_data(people, first_year=2020):
+    '''Write the schedule of every year of the people made by 'make_people'.
+
+    Returns:
+    -------
+    raw_salary_text_data : dict
+        Dictionary of {year: schedule text}, like the raw salary data saved by scripts/fetch_salary_data.py.
+    '''
+    return {str(first_year + year_index): format_schedule(year_people, str(first_year + year_index))
+            for year_index, year_people in people.groupby('Year_Index')}
+
+
+def make_babyname_data(name_pool, n_years, rng):
+    '''Create the four raw babyname datasets from the name pool, in the formats of the real files.
+
+    Parameters:
+    ----------
+    name_pool : pandas.DataFrame
+        Babynames made by 'make_name_pool'.
+    n_years : int
+        Number of birth years in the canadian and american data.
+    rng : numpy.random.Generator
+        Random number generator.
+
+    Returns:
+    -------
+    babyname_data : dict
+        Raw babyname DataFrames with the keys 'canadian_names', 'american_names', 'f_indian_names' and
+        'm_indian_names' (the keys of BABYNAME_FILES in scripts/pipeline_api.py).
+    '''
+    n_names = len(name_pool)
+
+    def yearly_counts(coverage, first_year, births):
+        # each name is in about 'coverage' of the years, with a number of female and male babies each year
+        name_index = np.tile(np.arange(n_names), n_years)
+        year = np.repeat(np.arange(first_year, first_year + n_years), n_names)
+        present = rng.random(len(name_index)) < coverage
+        name_index, year = name_index[present], year[present]
+        total = rng.poisson(name_pool['Weight'].to_numpy()[name_index] * births) + 5
+        female = rng.binomial(total, name_pool['Female_Share'].to_numpy()[name_index])
+        counts = pd.DataFrame({'name': np.concatenate([name_pool['First_Name'].to_numpy()[name_index]] * 2),
+                               'sex': np.repeat(['Female', 'Male'], len(name_index)),
+                               'count': np.concatenate([female, total - female]),
+                               'year': np.concatenate([year, year])})
+        return counts[counts['count'] > 0]
+
+    canadian = yearly_counts(0.6, 1991, 350_000)
+    canadian['rank'] = canadian.groupby(['year', 'sex'])['count'].rank(ascending = False, method = 'min').astype(int)
+    canadian_names = pd.concat([
+        canadian.assign(Indicator = 'Frequency').rename(columns = {'count': 'VALUE'}),
+        canadian.assign(Indicator = 'Rank').rename(columns = {'rank': 'VALUE'})])
+    canadian_names = canadian_names.rename(columns = {'name': 'First name at birth', 'sex': 'Sex at birth', 'year': 'Year'})
+    canadian_names = canadian_names[['First name at birth', 'Sex at birth', 'Indicator', 'VALUE', 'Year']]
+
+    american = yearly_counts(0.8, 1980, 3_500_000)
+    american_names = pd.DataFrame({'Name': american['name'], 'Gender': american['sex'].str[0],
+                                   'Count': american['count'], 'Year': american['year']})
+
+    # about a third of the names are in the indian data (lowercase, sometimes with a surname),
+    # and a few of them are in both the female and male files
+    indian = name_pool[rng.random(n_names) < 0.3]
+    indian_names = indian['First_Name'].str.lower().to_numpy()
+    with_surname = rng.random(len(indian)) < 0.1
+    indian_names = np.where(with_surname, indian_names + ' ' + indian['First_Name'].sample(frac = 1, random_state = 1).str.lower().to_numpy(),
+                            indian_names)
+    female = indian['Female_Share'].to_numpy() > 0.5
+    both = rng.random(len(indian)) < 0.02
+    f_indian_names = pd.DataFrame({'name': indian_names[female | both], 'gender': 'f', 'race': 'indian'})
+    m_indian_names = pd.DataFrame({'name': indian_names[~female | both], 'gender': 'm', 'race': 'indian'})
+
+    return {'canadian_names': canadian_names.reset_index(drop = True), 'american_names': american_names.reset_index(drop = True),
+            'f_indian_names': f_indian_names, 'm_indian_names': m_indian_names}
+
+
+def make_gender_overrides(people, first_year=2020):
+    '''Make a small gender overrides file for people of the last year whose names are not changed by cleaning
+    (two overrides for every year and one for the last year only).'''
+    last_year = people[people['Year_Index'] == people['Year_Index'].max()]
+    plain = last_year[~last_year['First_Name'].str.contains(' ') & ~last_year['Last_Name'].str.contains(' ')]
+    plain = plain.drop_duplicates(subset = ['First_Name', 'Last_Name']).head(3)
+    return pd.DataFrame({'First_Name': plain['First_Name'].to_numpy(), 'Last_Name': plain['Last_Name'].to_numpy(),
+                         'Year': pd.array([None, None, first_year + people['Year_Index'].max()][:len(plain)], dtype = 'Int64'),
+                         'Guessed_Gender': ['Female', 'Male', 'Female'][:len(plain)]})
+
+
+def scale_parameters(scale, scale_babynames=False):
+    '''Return the data parameters at a multiple of UBC's size (see UBC_SCALE).
+
+    The number of people and of distinct first and last names grow with the scale. The babyname data stays the
+    size of the real corpus unless scale_babynames is True.
+    '''
+    return {'people': int(UBC_SCALE['people'] * scale), 'years': UBC_SCALE['years'],
+            'first_names': int(UBC_SCALE['first_names'] * scale), 'last_names': int(UBC_SCALE['last_names'] * scale),
+            'babynames': int(UBC_SCALE['babynames'] * (scale if scale_babynames else 1)),
+            'babyname_years': UBC_SCALE['babyname_years']}
+
+
+def write_synthetic_dataset(folder, people, years, first_names, last_names, babynames, babyname_years, seed=123):
+    '''Generate a synthetic dataset and save it where the pipeline reads its inputs (relative to folder):
+    data/salary_data/raw_salary_data.pickle, the babyname files in data/gender_corpus and data/gender_overrides.csv.
+
+    Parameters:
+    ----------
+    folder : str
+        Folder to save the data in (the pipeline is run from this folder).
+    people : int
+        Number of people employed each year.
+    years : int
+        Number of fiscal years (starting in 2020).
+    first_names : int
+        Number of distinct first names in the salary data.
+    last_names : int
+        Number of distinct last names in the salary data.
+    babynames : int
+        Number of distinct names in the babyname data.
+    babyname_years : int
+        Number of birth years in the canadian and american babyname data.
+    seed : int
+        Random seed.
+
+    Returns:
+    -------
+    sizes : dict
+        The number of person-years and of rows of each babyname file.
+    '''
+    rng = np.random.default_rng(seed)
+    name_pool = make_name_pool(babynames, rng)
+    salary_people = make_people(people, years, first_names, last_names, name_pool, rng)
+    babyname_data = make_babyname_data(name_pool, babyname_years, rng)
+
+    os.makedirs(f'{folder}/data/salary_data', exist_ok = True)
+    os.makedirs(f'{folder}/data/gender_corpus', exist_ok = True)
+    with open(f'{folder}/data/salary_data/raw_salary_data.pickle', 'wb') as raw_salary_file:
+        pickle.dump(make_raw_salary_data(salary_people), raw_salary_file)
+    file_names = {'canadian_names': 'canadian_babyname.csv', 'american_names': 'american_babyname.csv',
+                  'f_indian_names': 'Indian-Female-Names.csv', 'm_indian_names': 'Indian-Male-Names.csv'}
+    for name, data in babyname_data.items():
+        data.to_csv(f'{folder}/data/gender_corpus/{file_names[name]}', index = False)
+    make_gender_overrides(salary_people).to_csv(f'{folder}/data/gender_overrides.csv', index = False)
+
+    return {'person_years': len(salary_people), **{name: len(data) for name, data in babyname_data.items()}}
+
+
+@click.command
+@click.option('--output_folder', type=str)
+@click.option('--scale', type=float, default=1.0)
+@click.option('--scale_babynames', is_flag=True, default=False)
+@click.option('--people', type=int, default=None)
+@click.option('--years', type=int, default=None)
+@click.option('--first_names', type=int, default=None)
+@click.option('--last_names', type=int, default=None)
+@click.option('--babynames', type=int, default=None)
+@click.option('--babyname_years', type=int, default=None)
+@click.option('--seed', type=int, default=123)
+def main(output_folder, scale, scale_babynames, people, years, first_names, last_names, babynames, babyname_years, seed):
+    '''Generate a synthetic dataset at a multiple of UBC's size, or with the given sizes, in the output folder.
+
+    Parameters:
+    -----------
+    output_folder : str
+        Folder to save the data in (in data/..., where the pipeline reads it).
+    scale : float
+        Multiple of UBC's size (see UBC_SCALE), used for every size that is not given.
+    scale_babynames : bool
+        Also multiply the number of babynames by the scale.
+    people, years, first_names, last_names, babynames, babyname_years : int
+        Sizes of the data (see 'write_synthetic_dataset').
+    seed : int
+        Random seed.
+    '''
+    parameters = scale_parameters(scale, scale_babynames)
+    given = {'people': people, 'years': years, 'first_names': first_names, 'last_names': last_names,
+             'babynames': babynames, 'babyname_years': babyname_years}
+    parameters.update({name: value for name, value in given.items() if value is not None})
+    sizes = write_synthetic_dataset(output_folder, **parameters, seed = seed)
+    print(', '.join(f'{name}: {value:,}' for name, value in sizes.items()))
+
+
+if __name__ == "__main__":
+    main()
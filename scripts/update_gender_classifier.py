@@ -0,0 +1,115 @@
+# author: Jade Bouchard
+# date: 2026-10-19
+#
+# This script updates a trained naive bayes gender model folder with a delta corpus instead of retraining
+# from scratch. Names to add (ex: a new national babyname corpus) are counted and their counts are added
+# to the model's count tables, and names to remove are counted and subtracted. Probabilities are then
+# re-derived from the merged counts, which gives the same model as training on the updated set of names.
+# The time taken depends on the size of the delta and the number of feature values, not on the size
+# of the corpus the model was originally trained on.
+# Only unpruned model folders (trained with --prune_min_count=0) can be updated, since pruning drops counts.
+# Cached predictions and stored metrics of the old model are invalidated automatically through the model fingerprint.
+# The updated model is written to a temporary folder that only replaces the model folder once it is completely saved.
+# When the model is updated in place, the pickled classifier saved next to it (gender_classifier.pickle) is deleted,
+# since it would still describe the old model.
+#
+# Usage: python scripts/update_gender_classifier.py \
+# --model_folder=models/gender_classifier \
+# --add_names_path=data/gender_corpus/new_names.csv \
+# --remove_names_path=data/gender_corpus/removed_names.csv
+
+
+import json
+import os
+import shutil
+import time
+import click
+import pandas as pd
+from naive_bayes_engine import count_naive_bayes, merge_naive_bayes_counts, load_naive_bayes_counts, save_naive_bayes_counts
+from gender_features import vectorized_gender_features
+
+
+def count_name_corpus(name_data_path, gamma):
+    '''Count the feature values of every name in a babyname corpus file.
+
+    Parameters:
+    ----------
+    name_data_path : str
+        Path to a csv file with the columns 'First_Name' and 'Sex_at_birth' (like clean_name_corpus.csv).
+    gamma : float
+        Smoothing value of the model the counts will be merged into.
+
+    Returns:
+    -------
+    counts : dict
+        Count tables created by 'count_naive_bayes'.
+    n_names : int
+        Number of names in the file.
+    '''
+    name_corpus = pd.read_csv(name_data_path)
+    features = vectorized_gender_features(name_corpus['First_Name'])
+    return count_naive_bayes(features, name_corpus['Sex_at_birth'], gamma = gamma), len(name_corpus)
+
+
+@click.command
+@click.option('--model_folder', type=str)
+@click.option('--add_names_path', type=str, default=None)
+@click.option('--remove_names_path', type=str, default=None)
+@click.option('--output_folder', type=str, default=None)
+def main(model_folder, add_names_path, remove_names_path, output_folder):
+    '''Add and/or remove names from a trained gender model folder by merging count tables.
+
+    Parameters:
+    -----------
+    model_folder : str
+        Path to the model folder saved by nltk_train_gender_classifier.py (nltk backend).
+    add_names_path : str
+        Optional path to a csv file of names to add to the model.
+    remove_names_path : str
+        Optional path to a csv file of names to remove from the model. They must have been part of its training data.
+    output_folder : str
+        Path to save the updated model folder to. Defaults to updating model_folder in place
+        (which also deletes the pickled classifier saved next to it).
+    '''
+    with open(f'{model_folder}/model.json') as metadata_file:
+        metadata = json.load(metadata_file)
+    if metadata.get('backend', 'nltk') != 'nltk':
+        raise click.UsageError(f"{model_folder} is not a naive bayes count model, retrain it with --backend=nltk")
+    if metadata['pruned_min_count'] > 0:
+        raise click.UsageError(f"{model_folder} was pruned (--prune_min_count={metadata['pruned_min_count']}), "
+                               "so its counts cannot be updated. Retrain it with --prune_min_count=0")
+
+    start = time.perf_counter()
+    # read the counts into memory, since the folder may be overwritten
+    counts = load_naive_bayes_counts(model_folder, mmap = False)
+    n_model_names = int(counts['label_counts'].sum())
+
+    if add_names_path:
+        added_counts, n_added = count_name_corpus(add_names_path, counts['label_gamma'])
+        counts = merge_naive_bayes_counts(counts, added_counts)
+        print(f"Added {n_added} names from {add_names_path}")
+    if remove_names_path:
+        removed_counts, n_removed = count_name_corpus(remove_names_path, counts['label_gamma'])
+        counts = merge_naive_bayes_counts(counts, removed_counts, subtract = True)
+        print(f"Removed {n_removed} names listed in {remove_names_path}")
+
+    output_folder = (output_folder or model_folder).rstrip('/')
+    temporary_folder = f'{output_folder}.tmp'
+    shutil.rmtree(temporary_folder, ignore_errors = True)
+    save_naive_bayes_counts(counts, temporary_folder)
+    # a folder can only be replaced by another folder when it is empty, so the old model is moved aside first
+    if os.path.exists(output_folder):
+        os.replace(output_folder, f'{output_folder}.old')
+    os.replace(temporary_folder, output_folder)
+    shutil.rmtree(f'{output_folder}.old', ignore_errors = True)
+
+    pickle_path = os.path.join(os.path.dirname(output_folder), 'gender_classifier.pickle')
+    if output_folder == model_folder.rstrip('/') and os.path.exists(pickle_path):
+        os.remove(pickle_path)
+        print(f"Deleted {pickle_path}, which described the model before the update")
+    print(f"Updated model trained on {n_model_names} names to {int(counts['label_counts'].sum())} names "
+          f"in {time.perf_counter() - start:.2f} seconds, saved to {output_folder}")
+
+
+if __name__ == "__main__":
+    main()